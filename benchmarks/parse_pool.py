@@ -0,0 +1,69 @@
+"""Benchmark parsing throughput of ParsePool from 1 to N worker processes.
+
+Usage: python benchmarks/parse_pool.py [--pages 400] [--items 100] [--max-workers N]
+
+Parses synthetic Bangumi works pages (built from the test fixture) in-process
+and through the pool with 1, 2, 4, ... workers, and prints pages per second.
+"""
+
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from animator_credit_monitor.archive import KIND_BANGUMI_WORKS
+from animator_credit_monitor.parsepool import ParsePool
+from animator_credit_monitor.scraper import BangumiScraper
+
+FIXTURE = Path(__file__).parent.parent / "tests" / "fixtures" / "bangumi_works.html"
+
+
+def build_page(items: int) -> bytes:
+    html = FIXTURE.read_text(encoding="utf-8")
+    item = re.search(r'<li class="item[^"]*" id="item_100001">.*?</li>', html, re.S)
+    assert item, "fixture has no work items"
+    repeated = "".join(item.group(0).replace("item_100001", f"item_{i}") for i in range(items))
+    return re.sub(r'(<ul class="browserFull[^"]*">).*?(</ul>)', lambda m: m.group(1) + repeated + m.group(2), html,
+                  count=1, flags=re.S).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    body = build_page(args.items)
+    scraper = BangumiScraper(request_interval=0)
+    expected = len(scraper._parse_works(BeautifulSoup(body, "html.parser")))
+    print(f"{args.pages} pages x {expected} works ({len(body) // 1024} KiB each)")
+
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        scraper._parse_works(BeautifulSoup(body, "html.parser"))
+    baseline = args.pages / (time.perf_counter() - start)
+    print(f"  in-process   {baseline:8.1f} pages/s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        pool = ParsePool(workers)
+        # Warm up: spawn every worker and import the parsers before timing
+        for future in [pool.submit(KIND_BANGUMI_WORKS, body) for _ in range(workers * 2)]:
+            future.result()
+
+        start = time.perf_counter()
+        futures = [pool.submit(KIND_BANGUMI_WORKS, body) for _ in range(args.pages)]
+        assert all(len(future.result()) == expected for future in futures)
+        rate = args.pages / (time.perf_counter() - start)
+        pool.close()
+
+        print(f"  {workers:2d} workers   {rate:8.1f} pages/s  ({rate / baseline:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
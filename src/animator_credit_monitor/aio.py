@@ -0,0 +1,150 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+
+from animator_credit_monitor.ratelimit import HostRateLimiter
+
+DEFAULT_MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+SNIFF_BYTES = 4096
+CHUNK_BYTES = 64 * 1024
+
+# Markers of Cloudflare interstitials. "challenge-platform" alone is not one:
+# Cloudflare injects that script into ordinary pages too.
+CHALLENGE_MARKERS = (
+    b"<title>Just a moment...</title>",
+    b"_cf_chl_opt",
+    b"cf-browser-verification",
+    b"<title>Attention Required! | Cloudflare</title>",
+)
+
+
+class ResponseRejected(requests.RequestException):
+    """A response was aborted before its body was fully downloaded."""
+
+
+class ChallengePage(ResponseRejected):
+    """The response is a bot-protection challenge page, not content."""
+
+
+class AsyncHttpClient:
+    """Coroutine front end for HTTP requests with per-host concurrency and rate limits.
+
+    Coroutines waiting for a host slot or for the rate limiter cost no thread;
+    only requests on the wire hold one of ``max_in_flight`` threads running the
+    blocking ``requests`` session. Every request is bounded by ``asyncio.timeout``
+    and can be cancelled; the response of a cancelled request is dropped.
+
+    Bodies are streamed: a request is aborted as soon as it has an unexpected
+    content type, exceeds ``max_bytes``, is cancelled, or its first few KB show a
+    challenge page. Error responses are returned with only those first few KB,
+    so ``raise_for_status()`` keeps working.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        rate_limiter: HostRateLimiter,
+        per_host: int = 2,
+        timeout: float = 30.0,
+        max_in_flight: int = 16,
+        max_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+    ) -> None:
+        self._session = session
+        self._limiter = rate_limiter
+        self._per_host = per_host
+        self._timeout = timeout
+        self._max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="http")
+        # Semaphores belong to one event loop; the sync wrappers start a new loop per call
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def request(
+        self, method: str, url: str, content_types: tuple[str, ...] = (), **kwargs: Any
+    ) -> requests.Response:
+        """Send a request once the host has a free slot.
+
+        ``content_types`` lists accepted media type prefixes of a successful
+        response (any type when empty). Raises ``requests.Timeout`` after
+        ``timeout`` and ``ResponseRejected`` when the body is aborted.
+        """
+        loop = asyncio.get_running_loop()
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(loop, {}).setdefault(host, asyncio.Semaphore(self._per_host))
+
+        async with semaphore:
+            # A shared limiter claims its slot under a file lock, so keep that off the loop
+            await asyncio.sleep(await asyncio.to_thread(self._limiter.reserve, url))
+            cancelled = threading.Event()
+            call = functools.partial(self._download, method, url, content_types, cancelled, kwargs)
+            try:
+                async with asyncio.timeout(self._timeout):
+                    return await loop.run_in_executor(self._executor, call)
+            except TimeoutError:
+                raise requests.Timeout(f"{method} {url} timed out after {self._timeout}s") from None
+            finally:
+                # Stops the worker thread at its next chunk if we gave up waiting
+                cancelled.set()
+
+    def _download(
+        self,
+        method: str,
+        url: str,
+        content_types: tuple[str, ...],
+        cancelled: threading.Event,
+        kwargs: dict[str, Any],
+    ) -> requests.Response:
+        """Stream a response body in the calling thread, aborting as early as possible."""
+        resp = self._session.request(method, url, timeout=self._timeout, stream=True, **kwargs)
+        try:
+            length = resp.headers.get("Content-Length", "")
+            if length.isdigit() and int(length) > self._max_bytes:
+                raise ResponseRejected(f"{url} is {length} bytes, over the {self._max_bytes} byte limit")
+            if resp.headers.get("cf-mitigated") == "challenge":
+                raise ChallengePage(f"{url} returned a Cloudflare challenge")
+
+            media_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if resp.ok and content_types and media_type and not media_type.startswith(content_types):
+                raise ResponseRejected(f"{url} returned unexpected content type {media_type}")
+
+            body = bytearray()
+            sniffed = False
+            for chunk in resp.iter_content(CHUNK_BYTES):
+                if cancelled.is_set():
+                    raise ResponseRejected(f"{url} was cancelled")
+                body += chunk
+                if not sniffed and len(body) >= SNIFF_BYTES:
+                    sniffed = True
+                    self._check_challenge(url, bytes(body[:SNIFF_BYTES]))
+                    if not resp.ok:
+                        break
+                if len(body) > self._max_bytes:
+                    raise ResponseRejected(f"{url} is over the {self._max_bytes} byte limit")
+            if not sniffed:
+                self._check_challenge(url, bytes(body))
+        finally:
+            resp.close()
+
+        resp._content = bytes(body)
+        return resp
+
+    @staticmethod
+    def _check_challenge(url: str, head: bytes) -> None:
+        if any(marker in head for marker in CHALLENGE_MARKERS):
+            raise ChallengePage(f"{url} returned a Cloudflare challenge")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
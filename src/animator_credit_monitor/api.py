@@ -0,0 +1,220 @@
+import bisect
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from animator_credit_monitor.history import HistoryManager
+from animator_credit_monitor.matching import DATE_RE
+
+logger = logging.getLogger(__name__)
+
+# History key prefixes, longest first so "bangumi_episodes_1" is not read as Bangumi target "episodes_1"
+SOURCE_KINDS = ("bangumi_episodes", "sakugawiki_credits", "bangumi", "sakugawiki", "anilist")
+
+
+def split_source_key(key: str) -> tuple[str, str]:
+    """Split a history key such as ``anilist_Name`` into ``(source, target)``."""
+    for kind in SOURCE_KINDS:
+        if key.startswith(f"{kind}_"):
+            return kind, key[len(kind) + 1:]
+    return key, ""
+
+
+def item_date(item: dict) -> str:
+    """Air date of a credit as ``YYYY-MM``, or an empty string."""
+    match = DATE_RE.search(item.get("date", "") or item.get("info", ""))
+    return f"{match.group(1)}-{int(match.group(2)):02d}" if match else ""
+
+
+class CreditStore:
+    """In-memory indexes over every stored history, refreshed incrementally.
+
+    ``refresh`` only stats the history files and reloads those whose size or
+    mtime changed, so queries never touch the disk. Each source keeps its credits
+    sorted by date, with a role index of positions into that list. A refresh
+    swaps in a new mapping, so concurrent queries always see a consistent one.
+
+    ``target_labels`` maps history keys to the label of the watchlist target
+    they belong to, so a target's Bangumi and name-keyed sources are grouped
+    under one name. Keys without a label fall back to their key suffix.
+    """
+
+    def __init__(
+        self,
+        history: HistoryManager,
+        refresh_interval: float = 2.0,
+        target_labels: dict[str, str] | None = None,
+    ) -> None:
+        self._history = history
+        self._refresh_interval = refresh_interval
+        self._target_labels = target_labels or {}
+        self._lock = threading.Lock()
+        self._last_refresh = float("-inf")
+        self._signatures: dict[str, tuple[int, int]] = {}
+        # history key -> (credits sorted by month, their months, role -> positions)
+        self._sources: dict[str, tuple[list[dict], list[str], dict[str, list[int]]]] = {}
+        self.version = ""
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload changed histories, at most once per ``refresh_interval``. Returns True if anything changed."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self._refresh_interval:
+                return False
+            self._last_refresh = now
+
+            sources = dict(self._sources)
+            keys = set(self._history.sources())
+            changed = False
+            for key in set(self._signatures) - keys:
+                del self._signatures[key]
+                sources.pop(key, None)
+                changed = True
+            for key in keys:
+                signature = self._history.signature(key)
+                if signature is None or signature == self._signatures.get(key):
+                    continue
+                sources[key] = self._index(key, self._history.load(key))
+                self._signatures[key] = signature
+                changed = True
+
+            if changed or not self.version:
+                self._sources = sources
+                state = json.dumps(sorted(self._signatures.items()))
+                self.version = hashlib.sha1(state.encode("utf-8")).hexdigest()[:16]
+                logger.info("Credit store refreshed: %d sources, version %s", len(sources), self.version)
+            return changed
+
+    def _split(self, key: str) -> tuple[str, str]:
+        """``(source, target)`` of a history key, with the target as its watchlist label if known."""
+        source, suffix = split_source_key(key)
+        return source, self._target_labels.get(key, suffix)
+
+    def _index(self, key: str, items: list[dict]) -> tuple[list[dict], list[str], dict[str, list[int]]]:
+        source, target = self._split(key)
+        credits = sorted(
+            ({**item, "source": source, "target": target, "month": item_date(item)} for item in items),
+            key=lambda credit: credit["month"],
+        )
+        roles: dict[str, list[int]] = defaultdict(list)
+        for position, credit in enumerate(credits):
+            roles[credit.get("role", "")].append(position)
+
+        return credits, [credit["month"] for credit in credits], dict(roles)
+
+    def targets(self) -> list[dict]:
+        """Every target with the sources stored for it and their credit counts."""
+        grouped: dict[str, dict[str, int]] = defaultdict(dict)
+        for key, (credits, _, _) in self._sources.items():
+            source, target = self._split(key)
+            grouped[target][source] = len(credits)
+        return [{"target": target, "sources": sources} for target, sources in sorted(grouped.items())]
+
+    def query(
+        self,
+        target: str = "",
+        source: str = "",
+        role: str = "",
+        date_from: str = "",
+        date_to: str = "",
+    ) -> list[dict]:
+        """Credits matching every given filter, newest first.
+
+        ``role`` matches exactly; ``date_from`` / ``date_to`` are inclusive
+        ``YYYY-MM`` bounds and exclude credits without a date.
+        """
+        results: list[dict] = []
+        for key, (credits, dates, roles) in self._sources.items():
+            key_source, key_target = self._split(key)
+            if (target and key_target != target) or (source and key_source != source):
+                continue
+
+            low, high = 0, len(credits)
+            if date_from or date_to:
+                # Undated credits sort first, as "", and fall below any bound
+                low = bisect.bisect_left(dates, date_from or "0")
+                high = bisect.bisect_right(dates, date_to) if date_to else high
+            positions = roles.get(role, []) if role else range(low, high)
+            results.extend(credits[p] for p in positions if low <= p < high)
+
+        results.sort(key=lambda credit: credit["month"], reverse=True)
+        return results
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Read-only JSON endpoints: ``/targets`` and ``/credits``."""
+
+    store: CreditStore
+    # Serialized bodies by ETag; an ETag covers the store version, so entries never go stale
+    cache: dict[str, bytes]
+    max_limit = 1000
+    max_cached = 1024
+
+    def do_GET(self) -> None:
+        self.store.refresh()
+        url = urlsplit(self.path)
+        etag = '"' + hashlib.sha1(f"{self.store.version}:{self.path}".encode()).hexdigest()[:20] + '"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self._send(304, b"", etag)
+            return
+        cached = self.cache.get(etag)
+        if cached is not None:
+            self._send(200, cached, etag)
+            return
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == "/targets":
+            body: dict = {"targets": self.store.targets()}
+        elif url.path == "/credits":
+            try:
+                limit = min(int(params.get("limit", "100")), self.max_limit)
+                offset = int(params.get("offset", "0"))
+            except ValueError:
+                self._send_json(400, {"error": "limit and offset must be integers"})
+                return
+            credits = self.store.query(
+                target=params.get("target", ""),
+                source=params.get("source", ""),
+                role=params.get("role", ""),
+                date_from=params.get("from", ""),
+                date_to=params.get("to", ""),
+            )
+            body = {"count": len(credits), "credits": credits[offset:offset + limit]}
+        else:
+            self._send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        if len(self.cache) >= self.max_cached:
+            self.cache.clear()
+        self.cache[etag] = payload
+        self._send(200, payload, etag)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"))
+
+    def _send(self, status: int, payload: bytes, etag: str = "") -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(store: CreditStore, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """Create an HTTP server answering from ``store``; call ``serve_forever()`` on it."""
+    handler = type("BoundApiHandler", (ApiHandler,), {"store": store, "cache": {}})
+    return ThreadingHTTPServer((host, port), handler)
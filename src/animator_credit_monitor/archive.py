@@ -0,0 +1,175 @@
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from animator_credit_monitor.fileio import write_atomic
+from animator_credit_monitor.locks import FileLock
+
+logger = logging.getLogger(__name__)
+
+KIND_BANGUMI_WORKS = "bangumi_works"
+KIND_SAKUGAWIKI_SEARCH = "sakugawiki_search"
+KIND_ANILIST_STAFF = "anilist_staff"
+
+
+class ResponseArchive:
+    """Content-addressed archive of raw response bodies.
+
+    Bodies are stored gzip-compressed under ``objects/`` keyed by their SHA-256,
+    so identical responses are kept only once. ``index.jsonl`` records which
+    source/URL each body was fetched for, so history can be rebuilt offline.
+
+    Each archive instance is one fetch run: its entries share a ``run`` ID, and
+    the page that ends a source's pagination is stored with ``last``. Only a
+    source's latest run that reached its last page is used for reparsing.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        retention_days: float | None = 30.0,
+        keep_per_url: int | None = 5,
+    ) -> None:
+        self._root = Path(root)
+        self._retention_days = retention_days
+        self._keep_per_url = keep_per_url
+        self.run_id = uuid.uuid4().hex
+
+    @property
+    def _index_path(self) -> Path:
+        return self._root / "index.jsonl"
+
+    def _lock(self) -> FileLock:
+        return FileLock(self._root / ".index.lock")
+
+    def _object_path(self, digest: str) -> Path:
+        return self._root / "objects" / digest[:2] / f"{digest}.gz"
+
+    def store(self, kind: str, source: str, url: str, body: str, page: int = 1, last: bool = True) -> str:
+        """Archive a response body and return its content hash.
+
+        ``last`` is False for a page that is followed by more pages of the same source.
+        """
+        self._root.mkdir(parents=True, exist_ok=True)
+        raw = body.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        entry = {
+            "kind": kind,
+            "source": source,
+            "url": url,
+            "page": page,
+            "hash": digest,
+            "fetched_at": time.time(),
+            "run": self.run_id,
+            "last": last,
+        }
+        # The object and its index entry are written under the lock so that a
+        # concurrent prune never sees an object that is not yet referenced.
+        path = self._object_path(digest)
+        with self._lock():
+            if not path.exists():
+                write_atomic(path, gzip.compress(raw, mtime=0))
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return digest
+
+    def read(self, digest: str) -> str:
+        """Read an archived body by its content hash."""
+        return gzip.decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+
+    def entries(self) -> list[dict]:
+        """Return all index entries, oldest first."""
+        if not self._index_path.exists():
+            return []
+        with open(self._index_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def latest_entries(self) -> dict[str, list[dict]]:
+        """Return the pages of each source's latest complete run, ordered by page.
+
+        A run is complete once it stored the source's last page; runs cut short
+        by an error are skipped. Entries archived before run IDs were recorded
+        count as a single complete run. Within a run the newest entry per URL wins.
+        """
+        runs: dict[tuple[str, str], dict[str, dict]] = defaultdict(dict)
+        latest_run: dict[str, str] = {}
+        for entry in self.entries():
+            source, run = entry["source"], entry.get("run", "")
+            runs[(source, run)][entry["url"]] = entry
+            if entry.get("last", True):
+                latest_run[source] = run
+
+        grouped: dict[str, list[dict]] = {}
+        for source, run in latest_run.items():
+            grouped[source] = sorted(runs[(source, run)].values(), key=lambda e: e["page"])
+        return grouped
+
+    def prune(self) -> int:
+        """Apply retention limits and delete unreferenced objects. Returns the number of objects removed."""
+        with self._lock():
+            return self._prune()
+
+    def _prune(self) -> int:
+        entries = self.entries()
+        if self._retention_days is not None:
+            cutoff = time.time() - self._retention_days * 86400
+            entries = [e for e in entries if e["fetched_at"] >= cutoff]
+
+        if self._keep_per_url is not None:
+            per_url: dict[str, list[dict]] = defaultdict(list)
+            for entry in entries:
+                per_url[entry["url"]].append(entry)
+            kept = {id(e) for group in per_url.values() for e in group[-self._keep_per_url:]}
+            entries = [e for e in entries if id(e) in kept]
+
+        if self._index_path.exists():
+            lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+            write_atomic(self._index_path, lines.encode("utf-8"))
+
+        referenced = {e["hash"] for e in entries}
+        removed = 0
+        for path in self._root.glob("objects/*/*.gz"):
+            if path.name.removesuffix(".gz") not in referenced:
+                path.unlink()
+                removed += 1
+
+        logger.info("Pruned response archive: %d entries kept, %d objects removed", len(entries), removed)
+        return removed
+
+    def reparse(self, workers: int | None = None) -> dict[str, list[dict]]:
+        """Re-run the scraper parsers over the latest archived pages of every source.
+
+        Pages are parsed in parallel across CPU cores with ``parsepool.parse_body``;
+        no network access is made.
+        """
+        # Imported lazily: parsepool imports this module for the archive kinds
+        from animator_credit_monitor.parsepool import parse_body
+
+        grouped = self.latest_entries()
+        ordered = [entry for entries in grouped.values() for entry in entries]
+        if not ordered:
+            return {}
+
+        kinds = [entry["kind"] for entry in ordered]
+        bodies = [self.read(entry["hash"]) for entry in ordered]
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as executor:
+            parsed = list(executor.map(parse_body, kinds, bodies, chunksize=4))
+
+        results: dict[str, list[dict]] = {}
+        parsed_iter = iter(parsed)
+        for source, entries in grouped.items():
+            items: list[dict] = []
+            for _ in entries:
+                items.extend(next(parsed_iter))
+            results[source] = items
+        return results
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from animator_credit_monitor.fileio import load_json, write_json_atomic
+from animator_credit_monitor.locks import FileLock
+from animator_credit_monitor.ratelimit import SharedHostRateLimiter
+
+
+class BudgetedRateLimiter(SharedHostRateLimiter):
+    """Shared per-host limiter that also counts requests against a per-run budget."""
+
+    def __init__(self, state_dir: Path | str, interval: float, budget: int) -> None:
+        super().__init__(state_dir, interval)
+        self._budget = budget
+        self.used = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self._budget
+
+    def reserve(self, url: str) -> float:
+        # Reservations run in worker threads
+        with self._lock:
+            self.used += 1
+        return super().reserve(url)
+
+
+class BootstrapState:
+    """Targets whose history seeding has started but not finished.
+
+    A target is added before its first request and removed once its history is
+    saved, so an interrupted run resumes it instead of treating it as seeded.
+    Each change is merged into the file under a lock, so shards sharing it keep
+    each other's targets.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self._path = Path(path)
+        self._in_progress: list[str] = self._load()
+
+    def _load(self) -> list[str]:
+        in_progress: list[str] = load_json(self._path, {}, "bootstrap state").get("in_progress", [])
+        return in_progress
+
+    def _save(self, key: str, started: bool) -> None:
+        """Add or remove one target in the file as other workers left it."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(self._path.with_name(f".{self._path.name}.lock")):
+            in_progress = self._load()
+            if started and key not in in_progress:
+                in_progress.append(key)
+            elif not started and key in in_progress:
+                in_progress.remove(key)
+            write_json_atomic(self._path, {"in_progress": in_progress})
+        self._in_progress = in_progress
+
+    def in_progress(self, key: str) -> bool:
+        return key in self._in_progress
+
+    def start(self, key: str) -> None:
+        self._save(key, started=True)
+
+    def finish(self, key: str) -> None:
+        self._save(key, started=False)
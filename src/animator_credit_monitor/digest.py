@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+from animator_credit_monitor.fileio import write_json_atomic
+from animator_credit_monitor.locks import FileLock
+from animator_credit_monitor.matching import TITLE_FIELDS, WorkIndex
+from animator_credit_monitor.notifier import Notifier
+
+logger = logging.getLogger(__name__)
+
+
+class DigestCollector:
+    """Coalesce new credits into one message per window.
+
+    Credits from every target and source are kept in a pending file until the
+    window (counted from the first pending credit) has elapsed, then sent as a
+    single notification. The same work reported by several sources for the same
+    target is linked through a ``WorkIndex`` and listed once. The pending file
+    is re-read and rewritten under a file lock, so sharded workers can share it.
+    """
+
+    def __init__(self, state_path: Path | str, window_seconds: float, max_lines: int = 200) -> None:
+        self._state_path = Path(state_path)
+        self._window = window_seconds
+        self._max_lines = max_lines
+        self._lock = FileLock(self._state_path.with_suffix(".lock"))
+        self._state = self._load()
+
+    def _load(self) -> dict:
+        if not self._state_path.exists():
+            return {"window_started_at": None, "entries": []}
+        with open(self._state_path, encoding="utf-8") as f:
+            state: dict = json.load(f)
+        return state
+
+    def _save(self) -> None:
+        write_json_atomic(self._state_path, self._state)
+
+    def add(self, target: str, source: str, items: list[dict]) -> None:
+        """Queue new credits of one target from one source."""
+        if not items:
+            return
+        with self._lock:
+            self._state = self._load()
+            if self._state["window_started_at"] is None:
+                self._state["window_started_at"] = time.time()
+
+            for item in items:
+                entry = {field: item[field] for field in TITLE_FIELDS if item.get(field)}
+                entry.setdefault("title", "Unknown")
+                entry.update({
+                    "target": target,
+                    "source": source,
+                    "role": item.get("role", ""),
+                    "date": item.get("date", "") or item.get("info", ""),
+                })
+                self._state["entries"].append(entry)
+            self._save()
+
+    def pending(self) -> int:
+        return len(self._state["entries"])
+
+    def flush(self, notifier: Notifier, force: bool = False) -> bool:
+        """Send the digest if the window has elapsed (or ``force``). Returns True if sent."""
+        with self._lock:
+            self._state = self._load()
+            return self._flush_locked(notifier, force)
+
+    def _flush_locked(self, notifier: Notifier, force: bool) -> bool:
+        started = self._state["window_started_at"]
+        if not self._state["entries"] or started is None:
+            return False
+        if not force and time.time() - started < self._window:
+            logger.info("Digest window still open, %d credits pending", self.pending())
+            return False
+
+        works = self._coalesce()
+        notifier.notify(f"新しいクレジット まとめ ({len(works)}件)", self._format(works))
+
+        self._state = {"window_started_at": None, "entries": []}
+        self._save()
+        return True
+
+    def _coalesce(self) -> list[dict]:
+        """Merge entries for the same target and work, keeping every source and role."""
+        indexes: dict[str, WorkIndex] = {}
+        merged: dict[tuple[str, int], dict] = {}
+        for entry in self._state["entries"]:
+            work_id = indexes.setdefault(entry["target"], WorkIndex()).add(entry["source"], entry)
+            work = merged.setdefault((entry["target"], work_id), {
+                "target": entry["target"],
+                "title": entry["title"],
+                "roles": [],
+                "sources": [],
+                "date": entry["date"],
+            })
+            if entry["role"] and entry["role"] not in work["roles"]:
+                work["roles"].append(entry["role"])
+            if entry["source"] not in work["sources"]:
+                work["sources"].append(entry["source"])
+        return list(merged.values())
+
+    def _format(self, works: list[dict]) -> str:
+        lines: list[str] = []
+        current_target = None
+        for shown, work in enumerate(sorted(works, key=lambda w: w["target"])):
+            if shown >= self._max_lines:
+                lines.append(f"  ... 他 {len(works) - shown} 件")
+                break
+            if work["target"] != current_target:
+                current_target = work["target"]
+                lines.append(f"■ {current_target}")
+            line = f"  - {work['title']}"
+            if work["roles"]:
+                line += f" [{' / '.join(work['roles'])}]"
+            line += f" ({', '.join(work['sources'])})"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,171 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+from animator_credit_monitor.bootstrap import BudgetedRateLimiter
+from animator_credit_monitor.fileio import load_json, write_json_atomic
+from animator_credit_monitor.history import HistoryManager
+from animator_credit_monitor.scraper import BangumiScraper
+
+logger = logging.getLogger(__name__)
+
+# Subjects fetched at once; the budget is checked between batches
+SUBJECT_BATCH = 8
+
+
+class DiscoverState:
+    """Resumable breadth-first crawl from watched persons through their subjects' staff.
+
+    ``frontier`` is the BFS queue of ``[person_id, depth]`` still to expand and
+    ``visited`` the depth of every person ever queued, so no one is queued
+    twice. ``expanded`` keeps the subjects of each expanded person for ranking.
+    ``persons`` caches the works of non-watched persons across crawls, so a
+    repeat crawl only fetches persons it has not seen within ``person_ttl_days``.
+    """
+
+    def __init__(self, path: Path | str, person_ttl_days: int = 30) -> None:
+        self._path = Path(path)
+        self._person_ttl = timedelta(days=person_ttl_days)
+        state = self._load()
+        self.max_depth: int = state.get("max_depth", 1)
+        self.roles: list[str] = state.get("roles", [])
+        self.frontier: list[list] = state.get("frontier", [])
+        self.visited: dict[str, int] = state.get("visited", {})
+        self.expanded: dict[str, dict] = state.get("expanded", {})
+        self.persons: dict[str, dict] = state.get("persons", {})
+
+    def _load(self) -> dict:
+        state: dict = load_json(self._path, {}, "discover state")
+        return state
+
+    def save(self) -> None:
+        state = {
+            "max_depth": self.max_depth,
+            "roles": self.roles,
+            "frontier": self.frontier,
+            "visited": self.visited,
+            "expanded": self.expanded,
+            "persons": self.persons,
+        }
+        write_json_atomic(self._path, state)
+
+    @property
+    def in_progress(self) -> bool:
+        return bool(self.frontier)
+
+    def start(self, seeds: list[str], max_depth: int, roles: list[str]) -> None:
+        """Begin a new crawl from ``seeds``, keeping the person cache."""
+        self.max_depth = max_depth
+        self.roles = roles
+        self.frontier = [[seed, 0] for seed in seeds]
+        self.visited = dict.fromkeys(seeds, 0)
+        self.expanded = {}
+        self.save()
+
+    def cached_works(self, person_id: str) -> list[dict] | None:
+        entry = self.persons.get(person_id)
+        if not entry or date.today() - date.fromisoformat(entry["fetched"]) > self._person_ttl:
+            return None
+        works: list[dict] = entry["works"]
+        return works
+
+    def cache_works(self, person_id: str, works: list[dict]) -> None:
+        self.persons[person_id] = {
+            "fetched": date.today().isoformat(),
+            "works": [{"id": work["id"], "info": work.get("info", "")} for work in works],
+        }
+
+
+def role_matches(role: str, roles: list[str]) -> bool:
+    """True if ``role`` contains any of ``roles`` (or no roles are given)."""
+    return not roles or any(wanted in role for wanted in roles)
+
+
+async def crawl(
+    scraper: BangumiScraper,
+    state: DiscoverState,
+    history: HistoryManager,
+    limiter: BudgetedRateLimiter,
+    max_frontier: int = 1000,
+) -> int:
+    """Expand persons from the frontier until it is empty or the budget is spent.
+
+    State is saved after every person. A person whose subjects were not all
+    fetched when the budget ran out stays at the head of the frontier, and its
+    fetched subjects are reused from the subject cache on the next run.
+    Returns the number of persons expanded.
+    """
+    expanded = dropped = 0
+    while state.frontier and not limiter.exhausted:
+        person_id, depth = state.frontier[0]
+
+        # Watched persons' works are already in their history; others come from the cache or Bangumi
+        works = (history.load(f"bangumi_{person_id}") if depth == 0 else []) or state.cached_works(person_id)
+        if not works:
+            works = await scraper.fetch_works_async(person_id)
+            state.cache_works(person_id, works)
+
+        staff_by_subject: dict[str, list[dict]] = {}
+        for start in range(0, len(works), SUBJECT_BATCH):
+            if limiter.exhausted:
+                state.save()
+                return expanded
+            staff_by_subject.update(await scraper.fetch_subject_staff_async(works[start:start + SUBJECT_BATCH]))
+
+        if depth + 1 < state.max_depth:
+            for staff in staff_by_subject.values():
+                for member in staff:
+                    collaborator = member["person_id"]
+                    if collaborator in state.visited or not role_matches(member["role"], state.roles):
+                        continue
+                    if len(state.frontier) >= max_frontier:
+                        dropped += 1
+                        continue
+                    state.visited[collaborator] = depth + 1
+                    state.frontier.append([collaborator, depth + 1])
+
+        state.expanded[person_id] = {"depth": depth, "subjects": list(staff_by_subject)}
+        state.frontier.pop(0)
+        state.save()
+        expanded += 1
+        logger.info("Expanded person %s (depth %d, %d subjects)", person_id, depth, len(staff_by_subject))
+
+    if dropped:
+        logger.warning("Frontier full: %d collaborators were not queued", dropped)
+    return expanded
+
+
+def rank_candidates(state: DiscoverState, scraper: BangumiScraper, exclude: set[str]) -> list[dict]:
+    """Collaborators of the expanded persons, most shared subjects first.
+
+    A shared subject counts 1 when reached from a watched person and
+    ``1 / (depth + 1)`` from a person ``depth`` hops away; each subject counts
+    once per candidate, at its highest weight.
+    """
+    weights: dict[str, dict[str, float]] = defaultdict(dict)
+    names: dict[str, str] = {}
+    roles: dict[str, set[str]] = defaultdict(set)
+    for person_id, entry in state.expanded.items():
+        weight = 1 / (entry["depth"] + 1)
+        for subject_id in entry["subjects"]:
+            for member in scraper.cached_subject_staff(subject_id) or []:
+                candidate = member["person_id"]
+                if candidate == person_id or candidate in exclude or not role_matches(member["role"], state.roles):
+                    continue
+                weights[candidate][subject_id] = max(weights[candidate].get(subject_id, 0.0), weight)
+                names[candidate] = member["name"]
+                roles[candidate].add(member["role"])
+
+    candidates: list[dict] = [
+        {
+            "person_id": candidate,
+            "name": names[candidate],
+            "score": round(sum(subjects.values()), 2),
+            "subjects": len(subjects),
+            "roles": sorted(roles[candidate]),
+        }
+        for candidate, subjects in weights.items()
+    ]
+    candidates.sort(key=lambda c: (-c["score"], -c["subjects"], c["person_id"]))
+    return candidates
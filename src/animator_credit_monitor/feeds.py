@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from xml.etree import ElementTree
+
+from animator_credit_monitor.fileio import load_json, write_atomic, write_json_atomic
+from animator_credit_monitor.locks import FileLock
+
+logger = logging.getLogger(__name__)
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+COMBINED_FEED = "all"
+
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+ElementTree.register_namespace("", ATOM_NS)
+
+
+class FeedWriter:
+    """Atom feeds of new credits, one per target plus a combined one.
+
+    Each feed keeps only its latest ``max_entries`` entries in a small JSON
+    ring next to the XML, so ``flush`` costs O(new credits + max_entries)
+    regardless of how much history exists. Only feeds that received entries
+    are rewritten, each under a file lock and via an atomic rename, so readers
+    and sharded workers never see a partial file.
+    """
+
+    def __init__(self, feed_dir: Path | str, max_entries: int = 50, title: str = "新しいクレジット") -> None:
+        self._feed_dir = Path(feed_dir)
+        self._max_entries = max_entries
+        self._title = title
+        self._pending: dict[str, list[dict]] = defaultdict(list)
+        self._feed_titles: dict[str, str] = {}
+
+    def add(self, target: str, source: str, items: list[dict]) -> None:
+        """Queue new credits of one target from one source for the next ``flush``."""
+        now = time.time()
+        for item in items:
+            entry = _make_entry(target, source, item, now)
+            slug = feed_slug(target)
+            self._pending[slug].append(entry)
+            self._pending[COMBINED_FEED].append(entry)
+            self._feed_titles[slug] = f"{self._title} - {target}"
+
+    def flush(self) -> list[Path]:
+        """Write every feed with queued entries. Returns the XML files written."""
+        written = []
+        self._feed_dir.mkdir(parents=True, exist_ok=True)
+        for slug, entries in self._pending.items():
+            with FileLock(self._feed_dir / f".{slug}.lock"):
+                ring = self._load(slug)
+                seen = {entry["id"] for entry in ring}
+                ring.extend(entry for entry in entries if entry["id"] not in seen)
+                ring = ring[-self._max_entries:]
+                write_json_atomic(self._feed_dir / f"{slug}.json", ring)
+                xml_path = self._feed_dir / f"{slug}.xml"
+                write_atomic(xml_path, self._render(slug, ring))
+            written.append(xml_path)
+        logger.info("Updated %d feeds", len(written))
+        self._pending.clear()
+        return written
+
+    def _load(self, slug: str) -> list[dict]:
+        ring: list[dict] = load_json(self._feed_dir / f"{slug}.json", [], "feed entries")
+        return ring
+
+    def _render(self, slug: str, ring: list[dict]) -> bytes:
+        feed = ElementTree.Element(f"{{{ATOM_NS}}}feed")
+        _sub(feed, "id", f"urn:animator-credit-monitor:feed:{slug}")
+        _sub(feed, "title", self._feed_titles.get(slug, self._title))
+        _sub(feed, "updated", ring[-1]["updated"] if ring else _timestamp(time.time()))
+        author = _sub(feed, "author")
+        _sub(author, "name", "animator-credit-monitor")
+
+        # Newest first, as feed readers expect
+        for entry in reversed(ring):
+            element = _sub(feed, "entry")
+            _sub(element, "id", entry["id"])
+            _sub(element, "title", entry["title"])
+            _sub(element, "updated", entry["updated"])
+            if entry.get("link"):
+                ElementTree.SubElement(element, f"{{{ATOM_NS}}}link", href=entry["link"])
+            _sub(element, "category").set("term", entry["source"])
+            _sub(element, "summary", entry["summary"])
+
+        xml: bytes = ElementTree.tostring(feed, encoding="utf-8", xml_declaration=True)
+        return xml
+
+
+def feed_slug(target: str) -> str:
+    """File-name-safe feed name of a target label."""
+    return "target_" + _UNSAFE_FILENAME_RE.sub("_", target)
+
+
+def _make_entry(target: str, source: str, item: dict, now: float) -> dict:
+    title = item.get("title_cn") or item.get("title") or "Unknown"
+    details = [value for value in (item.get("role", ""), item.get("date") or item.get("info", "")) if value]
+    if item.get("episode"):
+        details.insert(0, f"第{item['episode']}話")
+    key = json.dumps([target, source, item], ensure_ascii=False, sort_keys=True)
+    return {
+        "id": "urn:sha1:" + hashlib.sha1(key.encode("utf-8")).hexdigest(),
+        "title": f"{target}: {title}" + (f" [{item['role']}]" if item.get("role") else ""),
+        "summary": f"{source}: {title}" + (f" ({' / '.join(details)})" if details else ""),
+        "link": item.get("url", ""),
+        "source": source,
+        "updated": _timestamp(now),
+    }
+
+
+def _sub(parent: ElementTree.Element, tag: str, text: str = "") -> ElementTree.Element:
+    element = ElementTree.SubElement(parent, f"{{{ATOM_NS}}}{tag}")
+    if text:
+        element.text = text
+    return element
+
+
+def _timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
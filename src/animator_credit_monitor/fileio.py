@@ -0,0 +1,41 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to a temporary file next to ``path`` and rename it into place.
+
+    Readers never see a partial file, and the temporary name is unique per
+    process and thread, so concurrent writers never share one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_json_atomic(path: Path, data: Any, indent: int | None = None) -> None:
+    """``write_atomic`` for JSON: compact unless ``indent`` is given, non-ASCII kept as is."""
+    separators = None if indent is not None else (",", ":")
+    write_atomic(path, json.dumps(data, ensure_ascii=False, indent=indent, separators=separators).encode("utf-8"))
+
+
+def load_json(path: Path | None, default: Any, description: str) -> Any:
+    """Read a JSON file, or return ``default`` if it is missing or unreadable (logging a warning)."""
+    if path is None or not path.exists():
+        return default
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable %s %s: %s", description, path, e)
+        return default
@@ -1,46 +1,252 @@
+import gzip
+import hashlib
 import json
 import logging
+from datetime import date, timedelta
 from pathlib import Path
 
+from animator_credit_monitor.fileio import load_json, write_atomic, write_json_atomic
+from animator_credit_monitor.locks import FileLock
+from animator_credit_monitor.search_index import CreditSearchIndex
+
 logger = logging.getLogger(__name__)
 
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # Python < 3.14
+    zstd = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+SUFFIXES: dict[str | None, str] = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
 
 class HistoryManager:
-    def __init__(self, data_dir: Path | str = "data") -> None:
+    """Per-source snapshots of scraped items, used to detect new ones.
+
+    ``save`` merges rather than replaces: an item missing from a fetch stays in
+    the history for ``grace_days`` after it was last seen, so a partial fetch
+    does not make it "new" again next run. After that it is dropped and leaves
+    a tombstone, which keeps ``detect_diff`` from reporting it again for
+    ``tombstone_days``. Last-seen dates and tombstones live in a
+    ``{source}_history.seen.json`` file next to the history.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path | str = "data",
+        compression: str | None = None,
+        search_index: CreditSearchIndex | None = None,
+        grace_days: int = 7,
+        tombstone_days: int = 90,
+    ) -> None:
+        if compression not in SUFFIXES:
+            raise ValueError(f"Unknown history compression: {compression}")
+        if compression == "zstd" and zstd is None:
+            logger.warning("zstd is not available in this Python, falling back to gzip")
+            compression = "gzip"
+
         self._data_dir = Path(data_dir)
+        self._compression = compression
+        self._hashes: dict[str, str] = {}
+        self._search_index = search_index
+        self._grace = timedelta(days=grace_days)
+        self._tombstone_retention = timedelta(days=tombstone_days)
+
+    def sources(self) -> list[str]:
+        """Names of every source with a history file, in any format."""
+        names = set()
+        for suffix in SUFFIXES.values():
+            for path in self._data_dir.glob(f"*_history.json{suffix}"):
+                names.add(path.name.removesuffix(f"_history.json{suffix}"))
+        return sorted(names)
+
+    def signature(self, source: str) -> tuple[int, int] | None:
+        """(mtime_ns, size) of a source's history file, to detect changes without reading it."""
+        path = self._find_existing(source)
+        if path is None:
+            return None
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def lock(self, source: str) -> FileLock:
+        """Advisory lock for a source, held by a run while it reads and rewrites that history."""
+        return FileLock(self._data_dir / "locks" / f"{source}.lock")
 
     def _get_path(self, source: str) -> Path:
-        return self._data_dir / f"{source}_history.json"
+        return self._data_dir / f"{source}_history.json{SUFFIXES[self._compression]}"
+
+    def _find_existing(self, source: str) -> Path | None:
+        """Find the history file for a source in any supported format, preferring the configured one."""
+        preferred = self._get_path(source)
+        if preferred.exists():
+            return preferred
+
+        for suffix in SUFFIXES.values():
+            path = self._data_dir / f"{source}_history.json{suffix}"
+            if path.exists():
+                return path
+        return None
+
+    @staticmethod
+    def _content_hash(data: list[dict]) -> str:
+        canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _decode(raw: bytes) -> list[dict]:
+        """Decode a history file, detecting compression from its magic bytes."""
+        if raw.startswith(GZIP_MAGIC):
+            raw = gzip.decompress(raw)
+        elif raw.startswith(ZSTD_MAGIC):
+            if zstd is None:
+                raise RuntimeError("History file is zstd-compressed but zstd is not available")
+            raw = zstd.decompress(raw)
+
+        data: list[dict] = json.loads(raw.decode("utf-8"))
+        return data
+
+    def _encode(self, data: list[dict]) -> bytes:
+        if self._compression is None:
+            return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+        compact = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self._compression == "zstd":
+            compressed: bytes = zstd.compress(compact)
+            return compressed
+        return gzip.compress(compact, mtime=0)
+
+    @staticmethod
+    def _item_key(item: dict) -> str:
+        canonical = json.dumps(item, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+    def _seen_path(self, source: str) -> Path:
+        return self._data_dir / f"{source}_history.seen.json"
+
+    def _load_seen(self, source: str) -> dict[str, dict[str, str]]:
+        """``{"seen": {item key: last seen date}, "tombstones": {item key: removal date}}``."""
+        seen: dict[str, dict[str, str]] = load_json(
+            self._seen_path(source), {"seen": {}, "tombstones": {}}, "last-seen state"
+        )
+        return seen
+
+    def _save_seen(self, source: str, seen: dict[str, dict[str, str]]) -> None:
+        write_json_atomic(self._seen_path(source), seen)
 
     def load(self, source: str) -> list[dict]:
         """Load previous data from JSON file. Returns empty list if not found."""
-        path = self._get_path(source)
-        if not path.exists():
+        path = self._find_existing(source)
+        if path is None:
             logger.info("No history file found for %s (first run)", source)
             return []
 
-        with open(path, encoding="utf-8") as f:
-            data: list[dict] = json.load(f)
+        data = self._decode(path.read_bytes())
+        if path == self._get_path(source):
+            self._hashes[source] = self._content_hash(data)
         logger.info("Loaded %d items from %s history", len(data), source)
         return data
 
     def save(self, source: str, data: list[dict]) -> None:
-        """Save current data to JSON file for next comparison."""
+        """Save current data to JSON file for next comparison.
+
+        Previously stored items missing from ``data`` are kept until their grace
+        period ends (see the class docstring). The write is skipped when the
+        content hash matches what is already on disk.
+        """
+        data = self._merge(source, data)
+        self._write(source, data)
+
+    def compact(self, source: str) -> None:
+        """Apply the grace period and tombstone retention without fetching, e.g. for targets no longer checked."""
+        if self._find_existing(source) is None:
+            return
+        # Nothing is seen today, so every item is kept or tombstoned by its last-seen date
+        self._write(source, self._merge(source, []))
+
+    def _merge(self, source: str, data: list[dict]) -> list[dict]:
+        """Add last-seen dates for ``data`` and carry over or tombstone items it lacks."""
+        path = self._find_existing(source)
+        previous = self._decode(path.read_bytes()) if path else []
+        state = self._load_seen(source)
+        today = _today()
+        stamp = today.isoformat()
+
+        seen = {self._item_key(item): stamp for item in data}
+        tombstones = {
+            key: removed for key, removed in state["tombstones"].items()
+            if key not in seen and today - date.fromisoformat(removed) <= self._tombstone_retention
+        }
+        merged = list(data)
+        carried = dropped = 0
+        for item in previous:
+            key = self._item_key(item)
+            if key in seen:
+                continue
+            # Items stored before last-seen dates were tracked start their grace period now
+            last_seen = state["seen"].get(key, stamp)
+            if today - date.fromisoformat(last_seen) <= self._grace:
+                merged.append(item)
+                seen[key] = last_seen
+                carried += 1
+            else:
+                tombstones[key] = stamp
+                dropped += 1
+
+        if carried or dropped:
+            logger.info("%s: kept %d missing items within grace, tombstoned %d", source, carried, dropped)
+        new_state = {"seen": seen, "tombstones": tombstones}
+        if new_state != state:
+            self._data_dir.mkdir(parents=True, exist_ok=True)
+            self._save_seen(source, new_state)
+        return merged
+
+    def _write(self, source: str, data: list[dict]) -> None:
+        self._write_file(source, data)
+        if self._search_index is not None:
+            # Also for unchanged histories: the index may be missing or behind them
+            self._search_index.update(source, data, self.signature(source))
+
+    def _write_file(self, source: str, data: list[dict]) -> None:
         path = self._get_path(source)
-        self._data_dir.mkdir(parents=True, exist_ok=True)
+        content_hash = self._content_hash(data)
+
+        if path.exists():
+            if source not in self._hashes:
+                self._hashes[source] = self._content_hash(self._decode(path.read_bytes()))
+            if self._hashes[source] == content_hash:
+                logger.info("History for %s is unchanged, skipping write", source)
+                return
+
+        write_atomic(path, self._encode(data))
+        self._hashes[source] = content_hash
+
+        # Remove copies in other formats so load() never picks up stale data
+        for suffix in SUFFIXES.values():
+            other = self._data_dir / f"{source}_history.json{suffix}"
+            if other != path and other.exists():
+                other.unlink()
 
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
         logger.info("Saved %d items to %s history", len(data), source)
 
     def detect_diff(self, source: str, new_data: list[dict]) -> list[dict]:
-        """Detect new items by comparing with saved history."""
+        """Detect new items by comparing with saved history and recent tombstones."""
         old_data = self.load(source)
-        if not old_data:
+        tombstones = self._load_seen(source)["tombstones"]
+        if not old_data and not tombstones:
             return new_data
 
-        old_set = {json.dumps(item, sort_keys=True) for item in old_data}
-        diff = [item for item in new_data if json.dumps(item, sort_keys=True) not in old_set]
+        known = {self._item_key(item) for item in old_data} | tombstones.keys()
+        diff = [item for item in new_data if self._item_key(item) not in known]
 
         logger.info("Detected %d new items for %s", len(diff), source)
         return diff
+
+
+def _today() -> date:
+    return date.today()
@@ -0,0 +1,57 @@
+import time
+from pathlib import Path
+
+from animator_credit_monitor.fileio import load_json, write_json_atomic
+from animator_credit_monitor.locks import FileLock
+
+
+class IdentityCache:
+    """Persistent mapping from a target name to its ID on each service.
+
+    Entries older than ``ttl_days`` are reported as needing revalidation, but
+    the cached ID stays pinned until the caller replaces or forgets it. Each
+    change is merged into the file under a lock, so workers sharing it keep
+    each other's entries.
+    """
+
+    def __init__(self, path: Path | str, ttl_days: float = 30.0) -> None:
+        self._path = Path(path)
+        self._ttl = ttl_days * 86400
+        self._entries: dict[str, dict[str, dict]] = self._load()
+
+    def _load(self) -> dict[str, dict[str, dict]]:
+        entries: dict[str, dict[str, dict]] = load_json(self._path, {}, "identity cache")
+        return entries
+
+    def _save(self, service: str, name: str) -> None:
+        """Write one entry (or its removal) over the file as other workers left it."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(self._path.with_name(f".{self._path.name}.lock")):
+            entries = self._load()
+            entry = self._entries.get(service, {}).get(name)
+            if entry is None:
+                entries.get(service, {}).pop(name, None)
+            else:
+                entries.setdefault(service, {})[name] = entry
+            write_json_atomic(self._path, entries, indent=2)
+        self._entries = entries
+
+    def get(self, service: str, name: str) -> str | None:
+        """Return the cached ID for a name on a service, regardless of age."""
+        entry = self._entries.get(service, {}).get(name)
+        return entry["id"] if entry else None
+
+    def needs_revalidation(self, service: str, name: str) -> bool:
+        """Return True if the name is unresolved or its entry is older than the TTL."""
+        entry = self._entries.get(service, {}).get(name)
+        return entry is None or time.time() - entry["resolved_at"] > self._ttl
+
+    def set(self, service: str, name: str, value: str) -> None:
+        """Record (or revalidate) the ID for a name on a service."""
+        self._entries.setdefault(service, {})[name] = {"id": value, "resolved_at": time.time()}
+        self._save(service, name)
+
+    def forget(self, service: str, name: str) -> None:
+        """Drop a cached ID, e.g. when the service no longer knows it."""
+        if self._entries.get(service, {}).pop(name, None) is not None:
+            self._save(service, name)
@@ -1,17 +1,50 @@
+import asyncio
 import logging
 import os
 import sys
+from collections.abc import Callable
+from contextlib import ExitStack
+from dataclasses import replace
 from pathlib import Path
 
 import click
 from dotenv import load_dotenv
 
-from animator_credit_monitor.history import HistoryManager
-from animator_credit_monitor.notifier import ConsoleNotifier
-from animator_credit_monitor.scraper import AniListScraper, BangumiScraper, SakugaWikiScraper
+from animator_credit_monitor.aio import DEFAULT_MAX_RESPONSE_BYTES
+from animator_credit_monitor.api import CreditStore, make_server
+from animator_credit_monitor.archive import ResponseArchive
+from animator_credit_monitor.bootstrap import BootstrapState, BudgetedRateLimiter
+from animator_credit_monitor.digest import DigestCollector
+from animator_credit_monitor.discover import DiscoverState, crawl, rank_candidates
+from animator_credit_monitor.feeds import FeedWriter
+from animator_credit_monitor.history import SUFFIXES, HistoryManager
+from animator_credit_monitor.identity import IdentityCache
+from animator_credit_monitor.matching import WorkIndex
+from animator_credit_monitor.notifier import (
+    ConsoleNotifier,
+    MultiNotifier,
+    Notifier,
+    OutboxNotifier,
+    SmtpNotifier,
+    WebhookNotifier,
+)
+from animator_credit_monitor.parsepool import ParsePool
+from animator_credit_monitor.ratelimit import SharedHostRateLimiter
+from animator_credit_monitor.scraper import (
+    ANILIST_REQUEST_INTERVAL,
+    AniListScraper,
+    BangumiScraper,
+    SakugaWikiScraper,
+)
+from animator_credit_monitor.search_index import CreditSearchIndex
+from animator_credit_monitor.sharding import HashRing, parse_shard, target_key
+from animator_credit_monitor.watchlist import Target, load_watchlist
 
 logger = logging.getLogger(__name__)
 
+# Targets checked at once; each holds the locks of its histories while it runs
+MAX_CONCURRENT_TARGETS = 16
+
 
 def setup_logging() -> None:
     logging.basicConfig(
@@ -30,83 +63,698 @@ def cli() -> None:
 @click.option("--dry-run", is_flag=True, help="Check for changes without saving state.")
 @click.option("--bangumi-only", is_flag=True, help="Only check Bangumi.")
 @click.option("--anilist-only", is_flag=True, help="Only check AniList.")
-def check(dry_run: bool, bangumi_only: bool, anilist_only: bool) -> None:
+@click.option("--shard", envvar="SHARD", default="", help="Only check the targets of shard I of N, e.g. 1/4.")
+@click.option(
+    "--include-unseeded", is_flag=True,
+    help="Also check targets without history, reporting every credit they have as new.",
+)
+def check(dry_run: bool, bangumi_only: bool, anilist_only: bool, shard: str, include_unseeded: bool) -> None:
     """Check for new animation credits."""
     setup_logging()
 
-    bangumi_id = os.environ.get("TARGET_BANGUMI_ID", "")
-    target_name = os.environ.get("TARGET_NAME", "")
     data_dir = os.environ.get("DATA_DIR", "data")
+    targets = _load_targets()
 
-    if not bangumi_id and not target_name:
+    if not targets:
         click.echo("Error: TARGET_BANGUMI_ID or TARGET_NAME must be set in .env")
         sys.exit(1)
 
-    if bangumi_only and not bangumi_id:
+    if shard:
+        targets = _shard_targets(targets, shard)
+
+    history = _get_history(data_dir)
+    if not include_unseeded:
+        # Their whole filmography would be reported as new; bootstrap seeds them silently
+        state = BootstrapState(Path(data_dir) / "bootstrap_state.json")
+        existing = set(history.sources())
+        unseeded = [target for target in targets if _needs_seeding(target, existing, state)]
+        for target in unseeded:
+            click.echo(f"Skipping {target.label}: no history yet. Run `bootstrap` or pass --include-unseeded.")
+        targets = [target for target in targets if target not in unseeded]
+
+    identity = IdentityCache(Path(data_dir) / "identity_cache.json")
+    archive = _get_archive(data_dir)
+    rate_limiter = SharedHostRateLimiter(Path(data_dir) / "ratelimit", 2.0)
+    parse_workers = _env_int("PARSE_WORKERS", 0, minimum=0)
+    max_response_bytes = _env_int("MAX_RESPONSE_BYTES", DEFAULT_MAX_RESPONSE_BYTES, minimum=1)
+    flush_timeout = _env_float("NOTIFY_FLUSH_TIMEOUT", 30.0, minimum=0)
+    digest = _get_digest(data_dir) if not dry_run else None
+    feeds = _get_feeds(data_dir) if not dry_run else None
+    parse_pool = ParsePool(parse_workers) if parse_workers > 0 else None
+    bangumi_scraper = BangumiScraper(
+        archive=archive,
+        identity=identity,
+        page_cache_path=Path(data_dir) / "bangumi_page_cache.json",
+        subject_cache_path=Path(data_dir) / "bangumi_subject_cache.json",
+        rate_limiter=rate_limiter,
+        parse_pool=parse_pool,
+        max_response_bytes=max_response_bytes,
+    )
+
+    if _env_flag("RESOLVE_BANGUMI_ID"):
+        targets = [_resolve_bangumi_id(bangumi_scraper, target) for target in targets]
+
+    if bangumi_only and not any(target.bangumi_id for target in targets):
         click.echo("Error: TARGET_BANGUMI_ID must be set for --bangumi-only")
         sys.exit(1)
 
-    if anilist_only and not target_name:
+    if anilist_only and not any(target.name for target in targets):
         click.echo("Error: TARGET_NAME must be set for --anilist-only")
         sys.exit(1)
 
-    history = HistoryManager(data_dir=Path(data_dir))
-    notifier = ConsoleNotifier()
-    found_new = False
+    notifier = _build_notifier(data_dir)
 
-    # Bangumi check
-    if not anilist_only and bangumi_id:
-        click.echo(f"Checking Bangumi (person ID: {bangumi_id})...")
-        scraper = BangumiScraper()
-        works = scraper.fetch_works(bangumi_id)
+    def report(
+        target: Target,
+        source_label: str,
+        diff: list[dict],
+        formatter: Callable[[list[dict]], str],
+        known: WorkIndex | None = None,
+    ) -> bool:
+        """Notify (or queue for the digest) new credits. Returns False if nothing was left to report."""
+        if known is not None:
+            diff = _drop_cross_source_duplicates(known, source_label, diff)
+            if not diff:
+                return False
+        if feeds:
+            feeds.add(target.label, source_label, diff)
+        if digest:
+            click.echo(f"  {len(diff)} new credits from {source_label} queued for the digest.")
+            digest.add(target.label, source_label, diff)
+            return True
+        title = f"新しいクレジット ({source_label})"
+        if len(targets) > 1:
+            title += f" - {target.label}"
+        notifier.notify(title, formatter(diff))
+        return True
 
-        if works:
-            diff = history.detect_diff(f"bangumi_{bangumi_id}", works)
-            if diff:
-                found_new = True
-                notifier.notify(
-                    "新しいクレジット (Bangumi)",
-                    _format_bangumi_diff(diff),
-                )
-            if not dry_run:
-                history.save(f"bangumi_{bangumi_id}", works)
-        else:
-            click.echo("  No data retrieved from Bangumi.")
+    wiki_scraper = SakugaWikiScraper(
+        archive=archive,
+        page_cache_path=Path(data_dir) / "sakugawiki_page_cache.json",
+        rate_limiter=rate_limiter,
+        parse_pool=parse_pool,
+        max_response_bytes=max_response_bytes,
+    )
+    anilist_scraper = AniListScraper(
+        archive=archive,
+        identity=identity,
+        rate_limiter=SharedHostRateLimiter(Path(data_dir) / "ratelimit", ANILIST_REQUEST_INTERVAL),
+        max_response_bytes=max_response_bytes,
+    )
 
-    # AniList check (with Sakuga@wiki fallback attempt)
-    if not bangumi_only and target_name:
-        # Try Sakuga@wiki first, fall back to AniList
-        click.echo(f"Checking Sakuga@wiki (name: {target_name})...")
-        scraper_wiki = SakugaWikiScraper()
-        results = scraper_wiki.search(target_name)
+    async def check_target(target: Target) -> bool:
+        """Check every source of one target. Returns True if anything new was reported."""
+        bangumi_id = target.bangumi_id
+        target_name = target.name
+        known = _build_work_index(history, target)
+        found = False
 
-        if results:
-            source_label = "作画@wiki"
-            source_key = f"sakugawiki_{target_name}"
-        else:
-            click.echo("  Sakuga@wiki unavailable, falling back to AniList...")
-            scraper_anilist = AniListScraper()
-            results = scraper_anilist.fetch_works(target_name)
-            source_label = "AniList"
-            source_key = f"anilist_{target_name}"
+        # Bangumi check
+        if not anilist_only and bangumi_id:
+            click.echo(f"Checking Bangumi (person ID: {bangumi_id})...")
+            works = await bangumi_scraper.fetch_works_async(bangumi_id)
 
-        if results:
-            diff = history.detect_diff(source_key, results)
-            if diff:
-                found_new = True
-                notifier.notify(
-                    f"新しいクレジット ({source_label})",
-                    _format_anilist_diff(diff) if source_label == "AniList" else _format_wiki_diff(diff),
-                )
-            if not dry_run:
-                history.save(source_key, results)
+            if works:
+                diff = history.detect_diff(f"bangumi_{bangumi_id}", works)
+                if diff:
+                    found = report(target, "Bangumi", diff, _format_bangumi_diff, known) or found
+                if not dry_run:
+                    history.save(f"bangumi_{bangumi_id}", works)
+
+                if _env_flag("BANGUMI_EPISODES"):
+                    new_ids = {item["id"] for item in diff}
+                    episode_credits = await bangumi_scraper.fetch_episode_credits_async(bangumi_id, works, new_ids)
+                    episodes_key = f"bangumi_episodes_{bangumi_id}"
+                    episode_diff = history.detect_diff(episodes_key, episode_credits)
+                    if episode_diff:
+                        found = True
+                        report(target, "Bangumi 話数", episode_diff, _format_episode_diff)
+                    if not dry_run:
+                        history.save(episodes_key, episode_credits)
+            else:
+                click.echo(f"  No data retrieved from Bangumi (person ID: {bangumi_id}).")
+
+        # AniList check (with Sakuga@wiki fallback attempt)
+        if not bangumi_only and target_name:
+            # Try Sakuga@wiki first, fall back to AniList
+            click.echo(f"Checking Sakuga@wiki (name: {target_name})...")
+            results = await wiki_scraper.search_async(target_name)
+
+            if results:
+                source_label = "作画@wiki"
+                source_key = f"sakugawiki_{target_name}"
+            else:
+                click.echo(f"  Sakuga@wiki unavailable for {target_name}, falling back to AniList...")
+                results = await anilist_scraper.fetch_works_async(target_name)
+                source_label = "AniList"
+                source_key = f"anilist_{target_name}"
+
+            if results:
+                diff = history.detect_diff(source_key, results)
+                if diff:
+                    formatter = _format_anilist_diff if source_label == "AniList" else _format_wiki_diff
+                    found = report(target, source_label, diff, formatter, known) or found
+                if not dry_run:
+                    history.save(source_key, results)
+            else:
+                click.echo(f"  No data retrieved from {source_label} (name: {target_name}).")
+
+            # Crawl the wiki pages themselves for the actual credit lines
+            if results and source_label == "作画@wiki":
+                click.echo(f"  Crawling {len(results)} Sakuga@wiki pages for credit lines of {target_name}...")
+                credits = await wiki_scraper.fetch_credits_async(target_name, results)
+                credits_key = f"sakugawiki_credits_{target_name}"
+                diff = history.detect_diff(credits_key, credits)
+                if diff:
+                    found = True
+                    report(target, "作画@wiki 本文", diff, _format_wiki_credit_diff)
+                if not dry_run:
+                    history.save(credits_key, credits)
+
+        return found
+
+    async def check_all() -> list[bool | BaseException]:
+        # One event loop for every target, so the scrapers' per-host limits bound the whole run
+        slots = asyncio.Semaphore(MAX_CONCURRENT_TARGETS)
+
+        async def check_locked(target: Target) -> bool:
+            # Skip targets another run is already checking; locks are released as each target finishes
+            async with slots:
+                with ExitStack() as target_locks:
+                    if not _lock_target(target_locks, history, target):
+                        return False
+                    return await check_target(target)
+
+        return await asyncio.gather(*(check_locked(target) for target in targets), return_exceptions=True)
+
+    found_new = False
+    for target, result in zip(targets, asyncio.run(check_all()), strict=True):
+        if isinstance(result, BaseException):
+            logger.error("Checking %s failed", target.label, exc_info=result)
         else:
-            click.echo(f"  No data retrieved from {source_label}.")
+            found_new = result or found_new
+
+    if digest and digest.flush(notifier):
+        click.echo("Sent the credit digest.")
+
+    if feeds:
+        feeds.flush()
+
+    if archive:
+        archive.prune()
+
+    bangumi_scraper.close()
+    wiki_scraper.close()
+    anilist_scraper.close()
+    if parse_pool:
+        parse_pool.close()
+
+    notifier.close(timeout=flush_timeout)
 
     if not found_new:
         click.echo("No new credits found.")
 
 
+@cli.command()
+@click.option("--workers", type=int, default=None, help="Number of parser processes (default: CPU count).")
+@click.option("--dry-run", is_flag=True, help="Parse the archive without saving history.")
+def reparse(workers: int | None, dry_run: bool) -> None:
+    """Rebuild history from archived responses without network access."""
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+
+    history = _get_history(data_dir)
+    archive = ResponseArchive(Path(data_dir) / "archive")
+    results = archive.reparse(workers=workers)
+    if not results:
+        click.echo("Archive is empty. Set ARCHIVE_RESPONSES=1 and run check first.")
+        return
+
+    for source, items in results.items():
+        click.echo(f"  {source}: {len(items)} items")
+        if dry_run:
+            continue
+        # A check holding the source would overwrite what we save, or we would overwrite its newer data
+        lock = history.lock(source)
+        if not lock.acquire(blocking=False):
+            click.echo(f"  Skipping {source}: another run holds it.")
+            continue
+        try:
+            history.save(source, items)
+        finally:
+            lock.release()
+
+
+@cli.command()
+@click.option("--depth", type=int, default=1, show_default=True, help="Hops from watched persons to crawl.")
+@click.option("--role", "roles", multiple=True, help="Only follow and rank staff whose role contains this.")
+@click.option("--budget", type=int, default=200, show_default=True, help="Maximum number of requests for this run.")
+@click.option("--interval", type=float, default=2.0, show_default=True, help="Seconds between requests to one host.")
+@click.option("--max-frontier", type=int, default=1000, show_default=True, help="Maximum number of queued persons.")
+@click.option("--limit", type=int, default=20, show_default=True, help="Number of candidates to show.")
+@click.option("--restart", is_flag=True, help="Start a new crawl even if the previous one is unfinished.")
+def discover(
+    depth: int, roles: tuple[str, ...], budget: int, interval: float, max_frontier: int, limit: int, restart: bool
+) -> None:
+    """Find frequent collaborators of watched persons through Bangumi staff lists.
+
+    An unfinished crawl is resumed by the next run, with its original options.
+    """
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+    seeds = list(dict.fromkeys(target.bangumi_id for target in _load_targets() if target.bangumi_id))
+    if not seeds:
+        click.echo("Error: TARGET_BANGUMI_ID or a watchlist with bangumi_id must be set in .env")
+        sys.exit(1)
+
+    history = _get_history(data_dir)
+    limiter = BudgetedRateLimiter(Path(data_dir) / "ratelimit", interval, budget)
+    scraper = BangumiScraper(
+        page_cache_path=Path(data_dir) / "bangumi_page_cache.json",
+        subject_cache_path=Path(data_dir) / "bangumi_subject_cache.json",
+        rate_limiter=limiter,
+    )
+    state = DiscoverState(Path(data_dir) / "discover_state.json")
+    if restart or not state.in_progress:
+        state.start(seeds, depth, list(roles))
+    else:
+        click.echo(f"Resuming crawl with {len(state.frontier)} persons in the frontier.")
+
+    expanded = asyncio.run(crawl(scraper, state, history, limiter, max_frontier=max_frontier))
+    scraper.close()
+    click.echo(f"Expanded {expanded} persons with {limiter.used} requests.")
+    if state.in_progress:
+        click.echo(f"Request budget of {budget} spent; {len(state.frontier)} persons left for the next run.")
+
+    candidates = rank_candidates(state, scraper, exclude=set(seeds))
+    if not candidates:
+        click.echo("No collaborators found.")
+    for candidate in candidates[:limit]:
+        click.echo(
+            f"  {candidate['score']:6.2f}  {candidate['name']} (bangumi {candidate['person_id']}): "
+            f"{candidate['subjects']} subjects, {' / '.join(candidate['roles'])}"
+        )
+
+
+@cli.command()
+def compact() -> None:
+    """Drop history items unseen past the grace period and expired tombstones."""
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+    history = _get_history(data_dir)
+    compacted = 0
+    for key in history.sources():
+        lock = history.lock(key)
+        if not lock.acquire(blocking=False):
+            click.echo(f"Skipping {key}: another run holds it.")
+            continue
+        try:
+            history.compact(key)
+        finally:
+            lock.release()
+        compacted += 1
+    click.echo(f"Compacted {compacted} histories.")
+
+
+@cli.command()
+@click.argument("query")
+@click.option("--source", default="", help="Only search history keys starting with this (e.g. bangumi_, anilist_).")
+@click.option("--limit", type=int, default=20, show_default=True, help="Maximum number of results.")
+@click.option("--rebuild", is_flag=True, help="Rebuild the index from all history files first.")
+def search(query: str, source: str, limit: int, rebuild: bool) -> None:
+    """Search stored credits by title, role or date."""
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+    history = _get_history(data_dir)
+    index = CreditSearchIndex(Path(data_dir) / "search_index.sqlite3")
+
+    if rebuild:
+        index.clear()
+    # Index histories written without the index, or since changed; unchanged files are not read
+    sources = history.sources()
+    for key in sources:
+        signature = history.signature(key)
+        if signature is None or signature != index.signature(key):
+            index.update(key, history.load(key), signature)
+    for key in set(index.sources()) - set(sources):
+        index.remove(key)
+
+    results = index.search(query, source_prefix=source, limit=limit)
+    if not results:
+        click.echo("No matching credits.")
+    for item in results:
+        title = item.get("title_cn") or item.get("title", "")
+        role = item.get("role", "")
+        date = item.get("date") or item.get("info", "")
+        click.echo(f"  [{item['source']}] {title} / {role} ({date})")
+    index.close()
+
+
+@cli.command()
+@click.option("--budget", type=int, default=200, show_default=True, help="Maximum number of requests for this run.")
+@click.option("--interval", type=float, default=2.0, show_default=True, help="Seconds between requests to one host.")
+@click.option("--shard", envvar="SHARD", default="", help="Only seed the targets of shard I of N, e.g. 1/4.")
+def bootstrap(budget: int, interval: float, shard: str) -> None:
+    """Seed history for targets without any, without notifying.
+
+    Run it repeatedly (e.g. from cron) until no targets remain; an interrupted
+    target is resumed by the next run.
+    """
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+    targets = _load_targets()
+    if not targets:
+        click.echo("Error: TARGET_BANGUMI_ID or TARGET_NAME must be set in .env")
+        sys.exit(1)
+    if shard:
+        targets = _shard_targets(targets, shard)
+
+    history = _get_history(data_dir)
+    state = BootstrapState(Path(data_dir) / "bootstrap_state.json")
+    existing = set(history.sources())
+    pending = [target for target in targets if _needs_seeding(target, existing, state)]
+    if not pending:
+        click.echo("All targets already have history.")
+        return
+
+    identity = IdentityCache(Path(data_dir) / "identity_cache.json")
+    limiter = BudgetedRateLimiter(Path(data_dir) / "ratelimit", interval, budget)
+    bangumi_scraper = BangumiScraper(
+        identity=identity,
+        page_cache_path=Path(data_dir) / "bangumi_page_cache.json",
+        subject_cache_path=Path(data_dir) / "bangumi_subject_cache.json",
+        rate_limiter=limiter,
+    )
+    wiki_scraper = SakugaWikiScraper(
+        page_cache_path=Path(data_dir) / "sakugawiki_page_cache.json",
+        rate_limiter=limiter,
+    )
+    anilist_scraper = AniListScraper(identity=identity, rate_limiter=limiter)
+
+    seeded = 0
+    for position, target in enumerate(pending):
+        # A target that is started always finishes, so the budget may be exceeded by one target
+        if limiter.exhausted:
+            click.echo(f"Request budget of {budget} spent; {len(pending) - position} targets left for the next run.")
+            break
+        with ExitStack() as target_locks:
+            if not _lock_target(target_locks, history, target):
+                continue
+
+            key = target_key(target)
+            state.start(key)
+            if _env_flag("RESOLVE_BANGUMI_ID"):
+                target = _resolve_bangumi_id(bangumi_scraper, target)
+            counts = _seed_target(target, history, bangumi_scraper, wiki_scraper, anilist_scraper)
+            summary = ", ".join(f"{k} {n}" for k, n in counts.items())
+            # The name is seeded from Sakuga@wiki or its AniList fallback, so each source adds one count
+            if len(counts) == bool(target.bangumi_id) + bool(target.name):
+                state.finish(key)
+                seeded += 1
+                click.echo(f"Seeded {target.label}: {summary}")
+            elif counts:
+                click.echo(f"Partly seeded {target.label}: {summary}; the other sources will be retried next run.")
+            else:
+                click.echo(f"No data retrieved for {target.label}; it will be retried next run.")
+
+    for scraper in (bangumi_scraper, wiki_scraper, anilist_scraper):
+        scraper.close()
+    click.echo(f"Seeded {seeded} targets with {limiter.used} requests.")
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", type=int, default=8080, show_default=True, help="Port to listen on.")
+@click.option(
+    "--refresh-interval", type=float, default=2.0, show_default=True,
+    help="Minimum seconds between checks for changed history files.",
+)
+def serve(host: str, port: int, refresh_interval: float) -> None:
+    """Serve stored credits as a read-only JSON API (/targets, /credits)."""
+    setup_logging()
+
+    data_dir = os.environ.get("DATA_DIR", "data")
+    store = CreditStore(
+        _get_history(data_dir), refresh_interval=refresh_interval, target_labels=_target_labels(data_dir)
+    )
+    store.refresh(force=True)
+    server = make_server(store, host, port)
+    click.echo(f"Serving credits on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _seed_target(
+    target: Target,
+    history: HistoryManager,
+    bangumi_scraper: BangumiScraper,
+    wiki_scraper: SakugaWikiScraper,
+    anilist_scraper: AniListScraper,
+) -> dict[str, int]:
+    """Fetch every source check would and save it as history. Returns item counts per title-level source."""
+    counts: dict[str, int] = {}
+    if target.bangumi_id:
+        works = bangumi_scraper.fetch_works(target.bangumi_id)
+        if works:
+            history.save(f"bangumi_{target.bangumi_id}", works)
+            counts["Bangumi"] = len(works)
+            if _env_flag("BANGUMI_EPISODES"):
+                episode_credits = bangumi_scraper.fetch_episode_credits(target.bangumi_id, works, set())
+                history.save(f"bangumi_episodes_{target.bangumi_id}", episode_credits)
+
+    if target.name:
+        results = wiki_scraper.search(target.name)
+        if results:
+            history.save(f"sakugawiki_{target.name}", results)
+            counts["作画@wiki"] = len(results)
+            credits = wiki_scraper.fetch_credits(target.name, results)
+            history.save(f"sakugawiki_credits_{target.name}", credits)
+        else:
+            works = anilist_scraper.fetch_works(target.name)
+            if works:
+                history.save(f"anilist_{target.name}", works)
+                counts["AniList"] = len(works)
+    return counts
+
+
+def _shard_targets(targets: list[Target], shard: str) -> list[Target]:
+    """Keep the targets consistent hashing assigns to shard ``I/N``. Exits on a malformed spec."""
+    try:
+        shard_index, shard_count = parse_shard(shard)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        sys.exit(1)
+    ring = HashRing(shard_count)
+    targets = [target for target in targets if ring.owner(target_key(target)) == shard_index]
+    click.echo(f"Shard {shard_index}/{shard_count}: {len(targets)} targets")
+    return targets
+
+
+def _get_history(data_dir: str) -> HistoryManager:
+    """History with the search index kept up to date on every save."""
+    compression = os.environ.get("HISTORY_COMPRESSION", "").strip().lower() or None
+    if compression not in SUFFIXES:
+        choices = ", ".join(name for name in SUFFIXES if name)
+        click.echo(f"Error: HISTORY_COMPRESSION must be empty or one of {choices}, not {compression!r}")
+        sys.exit(1)
+    return HistoryManager(
+        data_dir=Path(data_dir),
+        compression=compression,
+        search_index=CreditSearchIndex(Path(data_dir) / "search_index.sqlite3"),
+        grace_days=_env_int("HISTORY_GRACE_DAYS", 7, minimum=0),
+        tombstone_days=_env_int("HISTORY_TOMBSTONE_DAYS", 90, minimum=0),
+    )
+
+
+def _load_targets() -> list[Target]:
+    """Targets from WATCHLIST_FILE, or the single TARGET_NAME / TARGET_BANGUMI_ID target."""
+    watchlist_file = os.environ.get("WATCHLIST_FILE", "")
+    if watchlist_file:
+        return load_watchlist(watchlist_file)
+
+    target = Target(name=os.environ.get("TARGET_NAME", ""), bangumi_id=os.environ.get("TARGET_BANGUMI_ID", ""))
+    return [target] if target.name or target.bangumi_id else []
+
+
+def _resolve_bangumi_id(scraper: BangumiScraper, target: Target) -> Target:
+    if target.bangumi_id or not target.name:
+        return target
+    bangumi_id = scraper.resolve_person_id(target.name)
+    if not bangumi_id:
+        return target
+    click.echo(f"Resolved {target.name} to Bangumi person ID {bangumi_id}")
+    return replace(target, bangumi_id=bangumi_id)
+
+
+def _target_labels(data_dir: str) -> dict[str, str]:
+    """Label of the configured target each history key belongs to, including Bangumi IDs resolved by name."""
+    identity = IdentityCache(Path(data_dir) / "identity_cache.json")
+    labels: dict[str, str] = {}
+    for target in _load_targets():
+        if not target.bangumi_id and target.name:
+            target = replace(target, bangumi_id=identity.get("bangumi", target.name) or "")
+        for key in _history_keys(target):
+            labels[key] = target.label
+    return labels
+
+
+def _source_keys(target: Target) -> list[tuple[str, str]]:
+    """(label, history key) of the title-level sources checked for a target."""
+    keys = []
+    if target.bangumi_id:
+        keys.append(("Bangumi", f"bangumi_{target.bangumi_id}"))
+    if target.name:
+        keys.append(("作画@wiki", f"sakugawiki_{target.name}"))
+        keys.append(("AniList", f"anilist_{target.name}"))
+    return keys
+
+
+def _needs_seeding(target: Target, existing: set[str], state: BootstrapState) -> bool:
+    """True if a target has no history yet, or its seeding was started but not finished."""
+    return state.in_progress(target_key(target)) or not existing & set(_history_keys(target))
+
+
+def _history_keys(target: Target) -> list[str]:
+    """Every history key a check of the target may read or write."""
+    keys = [key for _, key in _source_keys(target)]
+    if target.bangumi_id:
+        keys.append(f"bangumi_episodes_{target.bangumi_id}")
+    if target.name:
+        keys.append(f"sakugawiki_credits_{target.name}")
+    return keys
+
+
+def _lock_target(target_locks: ExitStack, history: HistoryManager, target: Target) -> bool:
+    """Take the locks of every history of a target without blocking. Returns False if any is held elsewhere."""
+    # A Bangumi ID resolved later is not locked here, but the name keys already cover the target
+    taken = ExitStack()
+    for key in sorted(set(_history_keys(target))):
+        lock = history.lock(key)
+        try:
+            acquired = lock.acquire(blocking=False)
+        except OSError as e:
+            taken.close()
+            click.echo(f"Skipping {target.label}: could not lock {key}: {e}")
+            return False
+        if not acquired:
+            taken.close()
+            click.echo(f"Skipping {target.label}: already being checked by another run.")
+            return False
+        taken.callback(lock.release)
+    target_locks.enter_context(taken)
+    return True
+
+
+def _build_work_index(history: HistoryManager, target: Target) -> WorkIndex:
+    """Index every credit already stored for a target, so other sources can be linked to it."""
+    index = WorkIndex()
+    for label, key in _source_keys(target):
+        for item in history.load(key):
+            index.add(label, item)
+    return index
+
+
+def _drop_cross_source_duplicates(known: WorkIndex, source_label: str, diff: list[dict]) -> list[dict]:
+    """Drop new credits another source has already reported for the same work and role, then index them."""
+    fresh = []
+    for item in diff:
+        work_id = known.match(item)
+        if work_id is None or not known.has_role(work_id, item.get("role", ""), exclude_source=source_label):
+            fresh.append(item)
+        known.add(source_label, item)
+
+    if len(fresh) < len(diff):
+        click.echo(f"  {len(diff) - len(fresh)} credits from {source_label} already reported by another source.")
+    return fresh
+
+
+def _get_digest(data_dir: str) -> DigestCollector | None:
+    window_minutes = _env_float("DIGEST_WINDOW_MINUTES", 0.0)
+    if window_minutes <= 0:
+        return None
+    return DigestCollector(Path(data_dir) / "digest_pending.json", window_seconds=window_minutes * 60)
+
+
+def _get_feeds(data_dir: str) -> FeedWriter | None:
+    max_entries = _env_int("FEED_ENTRIES", 0)
+    if max_entries <= 0:
+        return None
+    return FeedWriter(Path(data_dir) / "feeds", max_entries=max_entries)
+
+
+def _build_notifier(data_dir: str) -> Notifier:
+    """Console output, plus queued delivery to any sinks configured in the environment."""
+    sinks: list[Notifier] = [
+        WebhookNotifier(url.strip()) for url in os.environ.get("WEBHOOK_URLS", "").split(",") if url.strip()
+    ]
+    if os.environ.get("SMTP_HOST"):
+        sinks.append(SmtpNotifier(
+            host=os.environ["SMTP_HOST"],
+            port=_env_int("SMTP_PORT", 25, minimum=1),
+            sender=os.environ.get("SMTP_FROM", ""),
+            recipients=[r.strip() for r in os.environ.get("SMTP_TO", "").split(",") if r.strip()],
+            username=os.environ.get("SMTP_USER", ""),
+            password=os.environ.get("SMTP_PASSWORD", ""),
+            starttls=_env_flag("SMTP_STARTTLS"),
+        ))
+
+    if not sinks:
+        return ConsoleNotifier()
+    return MultiNotifier([ConsoleNotifier(), OutboxNotifier(Path(data_dir) / "outbox", sinks)])
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _env_int(name: str, default: int, minimum: int | None = None) -> int:
+    """Whole number from the environment, or ``default`` if unset. Exits on a malformed or too small value."""
+    value = os.environ.get(name, "").strip()
+    number: int | None
+    try:
+        number = int(value) if value else default
+    except ValueError:
+        number = None
+    if number is None or (minimum is not None and number < minimum):
+        bound = f" of at least {minimum}" if minimum is not None else ""
+        click.echo(f"Error: {name} must be a whole number{bound}, not {value!r}")
+        sys.exit(1)
+    return number
+
+
+def _env_float(name: str, default: float, minimum: float | None = None) -> float:
+    """Number from the environment, or ``default`` if unset. Exits on a malformed or too small value."""
+    value = os.environ.get(name, "").strip()
+    number: float | None
+    try:
+        number = float(value) if value else default
+    except ValueError:
+        number = None
+    if number is None or (minimum is not None and number < minimum):
+        bound = f" of at least {minimum:g}" if minimum is not None else ""
+        click.echo(f"Error: {name} must be a number{bound}, not {value!r}")
+        sys.exit(1)
+    return number
+
+
+def _get_archive(data_dir: str) -> ResponseArchive | None:
+    if not _env_flag("ARCHIVE_RESPONSES"):
+        return None
+    return ResponseArchive(
+        Path(data_dir) / "archive",
+        retention_days=_env_float("ARCHIVE_RETENTION_DAYS", 30.0, minimum=0),
+    )
+
+
 def _format_bangumi_diff(diff: list[dict]) -> str:
     lines = []
     for item in diff:
@@ -122,6 +770,21 @@ def _format_bangumi_diff(diff: list[dict]) -> str:
     return "\n".join(lines)
 
 
+def _format_episode_diff(diff: list[dict]) -> str:
+    lines = []
+    for item in diff:
+        title = item.get("title", "Unknown")
+        role = item.get("role", "")
+        episodes = item.get("episodes", "")
+        line = f"  - {title}"
+        if role:
+            line += f" [{role}]"
+        if episodes:
+            line += f" (ep. {episodes})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
 def _format_wiki_diff(diff: list[dict]) -> str:
     lines = []
     for item in diff:
@@ -134,6 +797,22 @@ def _format_wiki_diff(diff: list[dict]) -> str:
     return "\n".join(lines)
 
 
+def _format_wiki_credit_diff(diff: list[dict]) -> str:
+    lines = []
+    for item in diff:
+        title = item.get("title", "Unknown")
+        episode = item.get("episode", "")
+        role = item.get("role", "")
+        line = f"  - {title}"
+        if episode:
+            line += f" 第{episode}話"
+        if role:
+            line += f" [{role}]"
+        line += f": {item.get('line', '')}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
 def _format_anilist_diff(diff: list[dict]) -> str:
     lines = []
     for item in diff:
@@ -0,0 +1,186 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+TITLE_FIELDS = ("title", "title_cn", "title_romaji")
+
+# Trailing qualifiers such as "（TV）" or "(劇場版)" on Sakuga@wiki page titles
+QUALIFIER_RE = re.compile(r"[(\[【（][^()\[\]【】（）]*[)\]】）]\s*$")
+DATE_RE = re.compile(r"(\d{4})[-年/](\d{1,2})")
+
+# Episode or note qualifiers such as "(ep 3)" on AniList roles
+ROLE_QUALIFIER_RE = re.compile(r"\([^()]*\)")
+ROLE_SEPARATOR_RE = re.compile(r"[\s/、,・]+")
+
+# Bangumi (Chinese or Japanese), AniList (English) and Sakuga@wiki spellings of one role
+ROLE_ALIASES: dict[str, str] = {
+    "key animation": "原画",
+    "2nd key animation": "第二原画",
+    "二原": "第二原画",
+    "animation director": "作画監督",
+    "作画监督": "作画監督",
+    "作監": "作画監督",
+    "作监": "作画監督",
+    "chief animation director": "総作画監督",
+    "总作画监督": "総作画監督",
+    "総作監": "総作画監督",
+    "assistant animation director": "作画監督補佐",
+    "作画监督助理": "作画監督補佐",
+    "作監補佐": "作画監督補佐",
+    "in-between animation": "動画",
+    "动画": "動画",
+    "character design": "キャラクターデザイン",
+    "人物设定": "キャラクターデザイン",
+    "director": "監督",
+    "导演": "監督",
+    "episode director": "演出",
+    "storyboard": "絵コンテ",
+    "分镜": "絵コンテ",
+    "コンテ": "絵コンテ",
+    "mechanical animation director": "メカ作画監督",
+    "机械作画监督": "メカ作画監督",
+    "action animation director": "アクション作画監督",
+    "effects animation": "エフェクト作画",
+}
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title for matching: NFKC, lowercase, no qualifiers, whitespace or punctuation."""
+    normalized = unicodedata.normalize("NFKC", title).lower()
+    normalized = QUALIFIER_RE.sub("", normalized.strip())
+    return re.sub(r"[\W_]+", "", normalized)
+
+
+def title_ngrams(normalized: str, n: int = 2) -> set[str]:
+    """Character n-grams of a normalized title (bigrams suit CJK and short romaji alike)."""
+    if len(normalized) <= n:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+def item_month(item: dict) -> int | None:
+    """Air month of a credit as ``year * 12 + month``, from ``date`` (AniList) or ``info`` (Bangumi)."""
+    match = DATE_RE.search(item.get("date", "") or item.get("info", ""))
+    if not match:
+        return None
+    return int(match.group(1)) * 12 + int(match.group(2))
+
+
+def normalize_roles(role: str) -> set[str]:
+    """Canonical names of the roles in a credit's role text, e.g. ``"作画监督 (ep 3)"`` -> ``{"作画監督"}``."""
+    text = ROLE_QUALIFIER_RE.sub(" ", unicodedata.normalize("NFKC", role)).strip().lower()
+    if text in ROLE_ALIASES:
+        return {ROLE_ALIASES[text]}
+    return {ROLE_ALIASES.get(part, part) for part in ROLE_SEPARATOR_RE.split(text) if part}
+
+
+class WorkIndex:
+    """Canonical works linked across sources through an inverted character n-gram index.
+
+    Each added credit is matched against existing works by the Dice coefficient of
+    title n-grams over all of its title variants; titles whose numbers differ (sequels,
+    seasons) never match fuzzily. Only works sharing an n-gram are
+    scored, and very common n-grams are ignored, so linking N credits is close to
+    linear rather than pairwise. When both sides have an air date they must be
+    within ``max_month_gap`` months of each other.
+    """
+
+    def __init__(self, threshold: float = 0.85, max_month_gap: int = 12, max_posting: int = 200) -> None:
+        self._threshold = threshold
+        self._max_month_gap = max_month_gap
+        self._max_posting = max_posting
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._exact: dict[str, int] = {}
+        self._works: list[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._works)
+
+    def work(self, work_id: int) -> dict:
+        """Return a canonical work: its title variants, month and ``(source, item)`` members."""
+        return self._works[work_id]
+
+    def match(self, item: dict) -> int | None:
+        """Return the ID of the canonical work a credit belongs to, if any."""
+        variants = self._variants(item)
+        month = item_month(item)
+
+        for normalized in variants:
+            work_id = self._exact.get(normalized)
+            if work_id is not None and self._months_compatible(month, self._works[work_id]["month"]):
+                return work_id
+
+        best_id, best_score = None, self._threshold
+        for normalized in variants:
+            grams = title_ngrams(normalized)
+            digits = re.findall(r"\d+", normalized)
+            shared: Counter[int] = Counter()
+            for gram in grams:
+                posting = self._postings.get(gram, set())
+                if len(posting) <= self._max_posting:
+                    shared.update(posting)
+
+            # Dice >= t needs at least t * |A| / (2 - t) shared n-grams
+            min_shared = self._threshold * len(grams) / (2 - self._threshold)
+            for work_id, count in shared.items():
+                if count < min_shared:
+                    continue
+                work = self._works[work_id]
+                if not self._months_compatible(month, work["month"]):
+                    continue
+                for other_title, other_grams in zip(work["titles"], work["grams"], strict=True):
+                    # "Season 2" and "Season 3" share almost every n-gram but are different works
+                    if re.findall(r"\d+", other_title) != digits:
+                        continue
+                    score = 2 * len(grams & other_grams) / (len(grams) + len(other_grams))
+                    if score >= best_score:
+                        best_id, best_score = work_id, score
+        return best_id
+
+    def add(self, source: str, item: dict) -> int:
+        """Link a credit to its canonical work, creating one if nothing matches. Returns the work ID."""
+        work_id = self.match(item)
+        if work_id is None:
+            work_id = len(self._works)
+            self._works.append({"titles": [], "grams": [], "month": item_month(item), "members": []})
+
+        work = self._works[work_id]
+        work["members"].append((source, item))
+        if work["month"] is None:
+            work["month"] = item_month(item)
+        for normalized in self._variants(item):
+            if normalized in work["titles"]:
+                continue
+            grams = title_ngrams(normalized)
+            work["titles"].append(normalized)
+            work["grams"].append(grams)
+            self._exact.setdefault(normalized, work_id)
+            for gram in grams:
+                self._postings[gram].add(work_id)
+        return work_id
+
+    def sources(self, work_id: int) -> set[str]:
+        return {source for source, _ in self._works[work_id]["members"]}
+
+    def has_role(self, work_id: int, role: str, exclude_source: str = "") -> bool:
+        """True if credits of other sources already cover every role in ``role``.
+
+        A credit without a role is covered by any credit of the work.
+        """
+        members = [item for source, item in self._works[work_id]["members"] if source != exclude_source]
+        if not members:
+            return False
+        known_roles = set().union(*(normalize_roles(item.get("role", "")) for item in members))
+        return normalize_roles(role) <= known_roles
+
+    @staticmethod
+    def _variants(item: dict) -> list[str]:
+        variants = []
+        for field in TITLE_FIELDS:
+            normalized = normalize_title(item.get(field, "") or "")
+            if normalized and normalized not in variants:
+                variants.append(normalized)
+        return variants
+
+    def _months_compatible(self, a: int | None, b: int | None) -> bool:
+        return a is None or b is None or abs(a - b) <= self._max_month_gap
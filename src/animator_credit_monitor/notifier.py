@@ -1,4 +1,21 @@
+import contextlib
+import hashlib
+import json
+import logging
+import smtplib
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from pathlib import Path
+
+import requests
+
+from animator_credit_monitor.fileio import write_json_atomic
+from animator_credit_monitor.locks import FileLock
+
+logger = logging.getLogger(__name__)
 
 
 class Notifier(ABC):
@@ -6,7 +23,269 @@ class Notifier(ABC):
     def notify(self, title: str, message: str) -> None:
         ...
 
+    @property
+    def name(self) -> str:
+        """Stable identifier, used to keep a separate outbox queue per sink."""
+        return type(self).__name__
+
+    def close(self, timeout: float | None = None) -> None:
+        """Release resources and flush pending deliveries. No-op by default."""
+        return None
+
 
 class ConsoleNotifier(Notifier):
     def notify(self, title: str, message: str) -> None:
         print(f"[{title}] {message}")
+
+
+class MultiNotifier(Notifier):
+    """Send every notification to several notifiers in order."""
+
+    def __init__(self, notifiers: list[Notifier]) -> None:
+        self._notifiers = notifiers
+
+    def notify(self, title: str, message: str) -> None:
+        for notifier in self._notifiers:
+            notifier.notify(title, message)
+
+    def close(self, timeout: float | None = None) -> None:
+        for notifier in self._notifiers:
+            notifier.close(timeout)
+
+
+class WebhookNotifier(Notifier):
+    """POST notifications as JSON to a webhook URL over a pooled session.
+
+    Raises ``requests.RequestException`` on failure so the outbox can retry.
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0) -> None:
+        self._url = url
+        self._timeout = timeout
+        self._session = requests.Session()
+
+    @property
+    def name(self) -> str:
+        return f"webhook-{hashlib.sha1(self._url.encode()).hexdigest()[:8]}"
+
+    def notify(self, title: str, message: str) -> None:
+        resp = self._session.post(
+            self._url,
+            json={"title": title, "message": message, "text": f"[{title}] {message}"},
+            timeout=self._timeout,
+        )
+        resp.raise_for_status()
+
+    def close(self, timeout: float | None = None) -> None:
+        self._session.close()
+
+
+class SmtpNotifier(Notifier):
+    """Send notifications by email, reusing one SMTP connection across messages.
+
+    Raises ``smtplib.SMTPException`` / ``OSError`` on failure so the outbox can retry.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        recipients: list[str],
+        username: str = "",
+        password: str = "",
+        starttls: bool = False,
+        timeout: float = 10.0,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._sender = sender
+        self._recipients = recipients
+        self._username = username
+        self._password = password
+        self._starttls = starttls
+        self._timeout = timeout
+        self._smtp: smtplib.SMTP | None = None
+
+    @property
+    def name(self) -> str:
+        return f"smtp-{self._host}-{self._port}"
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._smtp = None
+
+        smtp = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+        if self._starttls:
+            smtp.starttls()
+        if self._username:
+            smtp.login(self._username, self._password)
+        self._smtp = smtp
+        return smtp
+
+    def notify(self, title: str, message: str) -> None:
+        email = EmailMessage()
+        email["Subject"] = title
+        email["From"] = self._sender
+        email["To"] = ", ".join(self._recipients)
+        email.set_content(message)
+        try:
+            self._connect().send_message(email)
+        except (smtplib.SMTPException, OSError):
+            self._smtp = None
+            raise
+
+    def close(self, timeout: float | None = None) -> None:
+        if self._smtp is not None:
+            with contextlib.suppress(smtplib.SMTPException, OSError):
+                self._smtp.quit()
+            self._smtp = None
+
+
+class OutboxNotifier(Notifier):
+    """Durable, asynchronous delivery to several sinks.
+
+    ``notify`` only writes one JSON file per sink under ``outbox_dir`` and returns.
+    A worker thread per sink delivers queued messages with exponential backoff, so
+    a slow or failing sink never blocks the caller. Messages left undelivered when
+    the process exits are picked up again by the next run. A worker holds the
+    sink's queue lock while it delivers, so processes sharing ``outbox_dir``
+    never send the same message twice.
+    """
+
+    # Seconds to wait before looking at a queue another process is delivering
+    lock_retry = 0.2
+
+    def __init__(
+        self,
+        outbox_dir: Path | str,
+        sinks: list[Notifier],
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+    ) -> None:
+        self._outbox_dir = Path(outbox_dir)
+        self._sinks = sinks
+        self._max_attempts = max_attempts
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._closing = threading.Event()
+        self._wakeups = {sink.name: threading.Event() for sink in sinks}
+        self._workers: list[threading.Thread] = []
+
+        for sink in sinks:
+            (self._outbox_dir / sink.name).mkdir(parents=True, exist_ok=True)
+            worker = threading.Thread(target=self._run_worker, args=(sink,), name=f"outbox-{sink.name}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def notify(self, title: str, message: str) -> None:
+        created_at = time.time()
+        for sink in self._sinks:
+            entry = {"title": title, "message": message, "attempts": 0, "next_attempt_at": created_at}
+            path = self._outbox_dir / sink.name / f"{created_at:.6f}-{uuid.uuid4().hex}.json"
+            write_json_atomic(path, entry)
+            self._wakeups[sink.name].set()
+
+    def pending(self) -> int:
+        """Number of queued deliveries across all sinks."""
+        return sum(len(list((self._outbox_dir / sink.name).glob("*.json"))) for sink in self._sinks)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting work and wait up to ``timeout`` for due messages to be delivered."""
+        self._closing.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker, sink in zip(self._workers, self._sinks, strict=True):
+            worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            # A worker still stuck on a slow sink keeps its connection; it is a daemon thread
+            if not worker.is_alive():
+                sink.close()
+
+        if self.pending():
+            logger.warning("%d notifications left in outbox for the next run", self.pending())
+
+    def _run_worker(self, sink: Notifier) -> None:
+        queue_dir = self._outbox_dir / sink.name
+        queue_lock = FileLock(self._outbox_dir / f"{sink.name}.lock")
+        wakeup = self._wakeups[sink.name]
+        while True:
+            # Read the flag before scanning so messages queued before close() are always seen
+            closing = self._closing.is_set()
+            wakeup.clear()
+            if not queue_lock.acquire(blocking=False):
+                # Another process is delivering this queue; look again once it is done
+                wakeup.wait(self.lock_retry)
+                continue
+            try:
+                next_due = self._deliver_due(sink, queue_dir)
+            except Exception:
+                # Never let one bad pass end delivery for the rest of the run
+                logger.exception("Outbox pass for %s failed", sink.name)
+                next_due = time.time() + self._backoff_base
+            finally:
+                queue_lock.release()
+            if closing and (next_due is None or next_due > time.time()):
+                return
+            delay = None if next_due is None else max(0.0, next_due - time.time())
+            wakeup.wait(delay)
+
+    def _deliver_due(self, sink: Notifier, queue_dir: Path) -> float | None:
+        """Deliver every due message in order. Returns when the next retry is due, if any."""
+        next_due: float | None = None
+        for path in sorted(queue_dir.glob("*.json")):
+            try:
+                due = self._deliver_one(sink, path)
+            except Exception:
+                # A broken message must not hold up the rest of the queue
+                logger.exception("Skipping outbox message %s for %s", path.name, sink.name)
+                continue
+            if due is not None:
+                next_due = min(next_due or due, due)
+        return next_due
+
+    def _deliver_one(self, sink: Notifier, path: Path) -> float | None:
+        """Deliver one queued message if it is due. Returns when it is due again if it stays queued."""
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # Already delivered by another run, or still being written
+            return None
+
+        if entry["next_attempt_at"] > time.time():
+            next_attempt_at: float = entry["next_attempt_at"]
+            return next_attempt_at
+
+        try:
+            sink.notify(entry["title"], entry["message"])
+        except Exception as e:
+            entry["attempts"] += 1
+            if entry["attempts"] >= self._max_attempts:
+                logger.error("Giving up on notification to %s after %d attempts: %s", sink.name, entry["attempts"], e)
+                failed_dir = self._outbox_dir / "failed" / sink.name
+                failed_dir.mkdir(parents=True, exist_ok=True)
+                write_json_atomic(failed_dir / path.name, entry)
+                path.unlink(missing_ok=True)
+                return None
+
+            delay = min(self._backoff_max, self._backoff_base * 2 ** (entry["attempts"] - 1))
+            entry["next_attempt_at"] = time.time() + delay
+            if not path.exists():
+                # Removed by another run in the meantime
+                return None
+            write_json_atomic(path, entry)
+            logger.warning(
+                "Notification to %s failed (attempt %d), retrying in %.0fs: %s",
+                sink.name, entry["attempts"], delay, e,
+            )
+            retry_at: float = entry["next_attempt_at"]
+            return retry_at
+
+        path.unlink(missing_ok=True)
+        return None
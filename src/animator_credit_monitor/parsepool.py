@@ -0,0 +1,77 @@
+import functools
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+from bs4 import BeautifulSoup
+
+from animator_credit_monitor.archive import KIND_ANILIST_STAFF, KIND_BANGUMI_WORKS, KIND_SAKUGAWIKI_SEARCH
+
+KIND_BANGUMI_SUBJECT_STAFF = "bangumi_subject_staff"
+KIND_SAKUGAWIKI_PAGE = "sakugawiki_page"
+
+
+class ParsePool:
+    """Parse raw response bodies in worker processes.
+
+    Scrapers submit the undecoded body and get back a future of compact item
+    records, so HTML decoding and DOM building run on other cores while the
+    caller keeps fetching. Workers are spawned rather than forked, since the
+    caller may already be running threads.
+    """
+
+    def __init__(self, workers: int | None = None) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def submit(self, kind: str, body: bytes | str, *args: str) -> "Future[list[dict]]":
+        """Queue a body for parsing. ``args`` are passed to parsers that need context (see ``parse_body``)."""
+        return self._executor.submit(parse_body, kind, body, *args)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+
+def parse_body(kind: str, body: bytes | str, *args: str) -> list[dict]:
+    """Parse a raw body with the matching scraper parser.
+
+    Bytes are decoded by BeautifulSoup from the page's own charset declaration.
+    Sakuga@wiki pages take ``(name, title, url)`` as ``args``. AniList bodies
+    are GraphQL JSON responses.
+    """
+    bangumi, wiki, anilist = _parsers()
+    if kind == KIND_ANILIST_STAFF:
+        member = (json.loads(body).get("data") or {}).get("Staff")
+        edges: list[dict] = anilist._parse_edges(member["staffMedia"]["edges"]) if member else []
+        return edges
+
+    soup = BeautifulSoup(body, "html.parser")
+
+    if kind == KIND_BANGUMI_WORKS:
+        works: list[dict] = bangumi._parse_works(soup)
+        return works
+    if kind == KIND_BANGUMI_SUBJECT_STAFF:
+        staff: list[dict] = bangumi._parse_subject_staff(soup)
+        return staff
+    if kind == KIND_SAKUGAWIKI_SEARCH:
+        results: list[dict] = wiki._parse_search_results(soup)
+        return results
+    if kind == KIND_SAKUGAWIKI_PAGE:
+        name, title, url = args
+        credits: list[dict] = wiki._parse_credit_lines(soup, name, title, url)
+        return credits
+
+    raise ValueError(f"Unknown parse kind: {kind}")
+
+
+@functools.cache
+def _parsers() -> tuple[Any, Any, Any]:
+    """The scraper classes, whose parsers are static so no session or HTTP client is built."""
+    # Imported lazily: scraper imports this module to submit bodies
+    from animator_credit_monitor.scraper import AniListScraper, BangumiScraper, SakugaWikiScraper
+
+    return BangumiScraper, SakugaWikiScraper, AniListScraper
@@ -0,0 +1,61 @@
+import json
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from animator_credit_monitor.locks import FileLock
+
+
+class HostRateLimiter:
+    """Thread-safe minimum interval between requests to the same host."""
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._next_slot: dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the URL's host is allowed."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def reserve(self, url: str) -> float:
+        """Claim the next slot for the URL's host and return how long to wait for it.
+
+        Lets coroutines wait with ``asyncio.sleep`` instead of blocking a thread.
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        return slot - now
+
+
+class SharedHostRateLimiter(HostRateLimiter):
+    """Per-host interval shared by every process using the same state directory.
+
+    The next free slot of each host is kept in ``{state_dir}/{host}.json`` and
+    claimed under a file lock, so sharded workers and overlapping runs on one
+    or several machines stay within a single request budget per host.
+    """
+
+    def __init__(self, state_dir: Path | str, interval: float) -> None:
+        super().__init__(interval)
+        self._state_dir = Path(state_dir)
+
+    def reserve(self, url: str) -> float:
+        host = urlsplit(url).netloc
+        state_path = self._state_dir / f"{host}.json"
+        with FileLock(self._state_dir / f"{host}.lock"):
+            try:
+                next_slot = float(json.loads(state_path.read_text(encoding="utf-8"))["next_slot"])
+            except (OSError, ValueError, KeyError):
+                next_slot = 0.0
+            # Wall-clock time: monotonic clocks are not comparable across processes
+            now = time.time()
+            slot = max(now, next_slot)
+            state_path.write_text(json.dumps({"next_slot": slot + self._interval}), encoding="utf-8")
+        return slot - now
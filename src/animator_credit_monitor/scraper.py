@@ -1,16 +1,37 @@
+import asyncio
+import hashlib
 import logging
 import re
-import time
-from urllib.parse import urljoin
+import threading
+from collections.abc import Callable, Iterable
+from datetime import date
+from pathlib import Path
+from urllib.parse import quote, urljoin
 
 import requests
 from bs4 import BeautifulSoup, Tag
 
+from animator_credit_monitor.aio import DEFAULT_MAX_RESPONSE_BYTES, AsyncHttpClient
+from animator_credit_monitor.archive import (
+    KIND_ANILIST_STAFF,
+    KIND_BANGUMI_WORKS,
+    KIND_SAKUGAWIKI_SEARCH,
+    ResponseArchive,
+)
+from animator_credit_monitor.fileio import load_json, write_json_atomic
+from animator_credit_monitor.identity import IdentityCache
+from animator_credit_monitor.locks import FileLock
+from animator_credit_monitor.parsepool import KIND_BANGUMI_SUBJECT_STAFF, KIND_SAKUGAWIKI_PAGE, ParsePool
+from animator_credit_monitor.ratelimit import HostRateLimiter
+
 logger = logging.getLogger(__name__)
 
 BASE_URL_BANGUMI = "https://bangumi.tv"
 BASE_URL_SAKUGAWIKI = "https://w.atwiki.jp"
 
+# Media type prefixes accepted for scraped pages; anything else (images, downloads) is aborted
+HTML_TYPES = ("text/", "application/xhtml+xml")
+
 DEFAULT_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -22,42 +43,216 @@ DEFAULT_HEADERS = {
 }
 
 
+def _load_json_cache(path: Path | None) -> dict[str, dict]:
+    """Load a JSON page cache, treating a missing or unreadable file as empty."""
+    cache: dict[str, dict] = load_json(path, {}, "cache")
+    return cache
+
+
+def _save_json_cache(
+    path: Path,
+    cache: dict[str, dict],
+    keys: Iterable[str],
+    merge: Callable[[dict, dict], dict] | None = None,
+) -> None:
+    """Write the ``keys`` entries of ``cache`` to the file, keeping every other entry on disk.
+
+    Several workers share each cache file, so it is re-read under a lock and
+    only our updated entries are written over it (through ``merge`` when the
+    file has one too). Entries other workers added are copied into ``cache``.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(path.with_name(f".{path.name}.lock")):
+        merged = _load_json_cache(path)
+        for key in keys:
+            if key in cache:
+                merged[key] = merge(merged[key], cache[key]) if merge and key in merged else cache[key]
+        write_json_atomic(path, merged)
+    cache.update(merged)
+
+
 class BangumiScraper:
-    def __init__(self, request_interval: float = 2.0) -> None:
-        self._interval = request_interval
+    def __init__(
+        self,
+        request_interval: float = 2.0,
+        archive: ResponseArchive | None = None,
+        page_cache_path: Path | str | None = None,
+        identity: IdentityCache | None = None,
+        subject_cache_path: Path | str | None = None,
+        max_workers: int = 4,
+        recent_days: int = 180,
+        rate_limiter: HostRateLimiter | None = None,
+        parse_pool: ParsePool | None = None,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+    ) -> None:
+        self._archive = archive
+        self._identity = identity
+        self._limiter = rate_limiter or HostRateLimiter(request_interval)
+        self._parse_pool = parse_pool
+        self._recent_days = recent_days
+        self._subject_cache_path = Path(subject_cache_path) if subject_cache_path else None
+        self._subject_cache: dict[str, dict] = _load_json_cache(self._subject_cache_path)
         self._session = requests.Session()
         self._session.headers.update(DEFAULT_HEADERS)
+        self._page_cache_path = Path(page_cache_path) if page_cache_path else None
+        self._page_cache: dict[str, dict] = _load_json_cache(self._page_cache_path)
+        self._page_cache_updated: set[str] = set()
+        self._http = AsyncHttpClient(
+            self._session, self._limiter, per_host=max_workers, max_bytes=max_response_bytes
+        )
+
+    def close(self) -> None:
+        """Release the HTTP worker threads and connections."""
+        self._http.close()
+        self._session.close()
 
     def fetch_works(self, person_id: str) -> list[dict]:
         """Fetch all works for a person from Bangumi, handling pagination."""
-        all_works: list[dict] = []
+        works: list[dict] = asyncio.run(self.fetch_works_async(person_id))
+        return works
+
+    async def fetch_works_async(self, person_id: str) -> list[dict]:
+        """Coroutine version of ``fetch_works``.
+
+        With a parse pool, each page is parsed in a worker process while the next
+        one is fetched; only the pager is parsed here to find the next URL.
+        """
+        pages: list[list[dict] | asyncio.Future[list[dict]]] = []
+        pending: list[tuple[str, str, asyncio.Future[list[dict]], str | None]] = []
         url: str | None = f"{BASE_URL_BANGUMI}/person/{person_id}/works"
 
         try:
             page = 1
             while url:
-                if page > 1:
-                    time.sleep(self._interval)
-
                 logger.info("Fetching Bangumi page %d: %s", page, url)
-                resp = self._session.get(url, timeout=30)
+                resp = await self._http.get(url, content_types=HTML_TYPES)
                 resp.raise_for_status()
-                resp.encoding = resp.apparent_encoding
-
-                soup = BeautifulSoup(resp.text, "html.parser")
-                works = self._parse_works(soup)
-                all_works.extend(works)
 
-                url = self._get_next_page_url(soup, person_id)
+                fingerprint = self._fingerprint(resp.content)
+                cached = self._page_cache.get(url)
+                if fingerprint and cached and cached["fingerprint"] == fingerprint:
+                    logger.info("Bangumi page %d is unchanged, reusing parsed items", page)
+                    pages.append(cached["works"])
+                    next_url = cached["next_url"]
+                elif self._parse_pool:
+                    future = asyncio.wrap_future(self._parse_pool.submit(KIND_BANGUMI_WORKS, resp.content))
+                    next_url = self._peek_next_page_url(resp.content, person_id)
+                    pages.append(future)
+                    if fingerprint:
+                        pending.append((url, fingerprint, future, next_url))
+                else:
+                    resp.encoding = resp.apparent_encoding
+                    soup = BeautifulSoup(resp.text, "html.parser")
+                    works = self._parse_works(soup)
+                    next_url = self._get_next_page_url(soup, person_id)
+                    pages.append(works)
+                    if fingerprint:
+                        self._page_cache[url] = {"fingerprint": fingerprint, "works": works, "next_url": next_url}
+                        self._page_cache_updated.add(url)
+
+                if self._archive:
+                    # Only a run that reached the last page is reparsed, so pages of different runs never mix
+                    resp.encoding = resp.apparent_encoding
+                    self._archive.store(
+                        KIND_BANGUMI_WORKS, f"bangumi_{person_id}", url, resp.text, page=page, last=not next_url
+                    )
+
+                url = next_url
                 page += 1
 
         except (requests.RequestException, ConnectionError) as e:
             logger.error("Failed to fetch Bangumi works: %s", e)
-            return all_works if all_works else []
 
-        return all_works
+        finally:
+            for page_url, fingerprint, future, next_url in pending:
+                entry = {"fingerprint": fingerprint, "works": await future, "next_url": next_url}
+                self._page_cache[page_url] = entry
+                self._page_cache_updated.add(page_url)
+            self._save_page_cache()
+
+        return [work for works in pages for work in (await works if isinstance(works, asyncio.Future) else works)]
+
+    def resolve_person_id(self, name: str) -> str | None:
+        """Resolve a person name to a Bangumi person ID, using the identity cache when fresh."""
+        person_id: str | None = asyncio.run(self.resolve_person_id_async(name))
+        return person_id
+
+    async def resolve_person_id_async(self, name: str) -> str | None:
+        pinned_id = self._identity.get("bangumi", name) if self._identity else None
+        if pinned_id and self._identity and not self._identity.needs_revalidation("bangumi", name):
+            return pinned_id
 
-    def _parse_works(self, soup: BeautifulSoup) -> list[dict]:
+        url = f"{BASE_URL_BANGUMI}/mono_search/{quote(name)}?cat=prsn"
+        try:
+            logger.info("Searching Bangumi persons for: %s", name)
+            resp = await self._http.get(url, content_types=HTML_TYPES)
+            resp.raise_for_status()
+            resp.encoding = resp.apparent_encoding
+            found_id = self._parse_person_search(BeautifulSoup(resp.text, "html.parser"))
+        except (requests.RequestException, ConnectionError) as e:
+            logger.error("Failed to search Bangumi persons: %s", e)
+            return pinned_id
+
+        if found_id and pinned_id and found_id != pinned_id:
+            logger.warning(
+                "Bangumi search for %s now matches person %s, keeping pinned person %s",
+                name, found_id, pinned_id,
+            )
+        person_id = pinned_id or found_id
+        if person_id and self._identity:
+            self._identity.set("bangumi", name, person_id)
+        return person_id
+
+    def _parse_person_search(self, soup: BeautifulSoup) -> str | None:
+        """Return the person ID of the first person search result."""
+        results = soup.find("div", id="columnSearchB")
+        if not results:
+            return None
+
+        link = results.find("a", href=re.compile(r"^/person/\d+"))
+        if not link:
+            return None
+
+        match = re.match(r"^/person/(\d+)", str(link.get("href", "")))
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _fingerprint(content: bytes) -> str | None:
+        """Hash the works list and pager regions of a raw page without building a DOM.
+
+        Returns None when the works list cannot be located, so the page is always parsed.
+        """
+        marker = content.find(b"browserFull")
+        if marker < 0:
+            return None
+        start = content.rfind(b"<ul", 0, marker)
+        end = content.find(b"</ul>", marker)
+        if start < 0 or end < 0:
+            return None
+
+        digest = hashlib.blake2b(content[start:end], digest_size=16)
+        pager = content.find(b"page_inner", end)
+        if pager >= 0:
+            digest.update(content[pager:content.find(b"</div>", pager)])
+        return digest.hexdigest()
+
+    def _peek_next_page_url(self, content: bytes, person_id: str) -> str | None:
+        """Find the next page URL by parsing only the pager region of a raw page."""
+        start = content.find(b"page_inner")
+        if start < 0:
+            return None
+        start = content.rfind(b"<div", 0, start)
+        region = content[start:content.find(b"</div>", start) + len(b"</div>")]
+        return self._get_next_page_url(BeautifulSoup(region.decode("utf-8", "replace"), "html.parser"), person_id)
+
+    def _save_page_cache(self) -> None:
+        if not self._page_cache_path or not self._page_cache_updated:
+            return
+        _save_json_cache(self._page_cache_path, self._page_cache, self._page_cache_updated)
+        self._page_cache_updated = set()
+
+    @staticmethod
+    def _parse_works(soup: BeautifulSoup) -> list[dict]:
         """Parse works from a single page."""
         works: list[dict] = []
         browser_list = soup.find("ul", class_="browserFull")
@@ -65,13 +260,14 @@ class BangumiScraper:
             return works
 
         for item in browser_list.find_all("li", class_="item"):
-            work = self._parse_item(item)
+            work = BangumiScraper._parse_item(item)
             if work:
                 works.append(work)
 
         return works
 
-    def _parse_item(self, item: Tag) -> dict | None:
+    @staticmethod
+    def _parse_item(item: Tag) -> dict | None:
         """Parse a single work item."""
         item_id = item.get("id", "")
         if isinstance(item_id, str):
@@ -128,23 +324,186 @@ class BangumiScraper:
         next_page = current_page + 1
         return f"{BASE_URL_BANGUMI}/person/{person_id}/works?sort=date&page={next_page}"
 
+    def fetch_episode_credits(self, person_id: str, works: list[dict], new_ids: set[str]) -> list[dict]:
+        """Enrich works with per-episode credits from each subject's staff page.
+
+        Only new or recently aired subjects are fetched. Subjects that aired more than
+        ``recent_days`` ago are cached permanently and never fetched again.
+        """
+        credits: list[dict] = asyncio.run(self.fetch_episode_credits_async(person_id, works, new_ids))
+        return credits
+
+    async def fetch_episode_credits_async(self, person_id: str, works: list[dict], new_ids: set[str]) -> list[dict]:
+        today = date.today()
+        to_fetch: list[str] = []
+        for work in works:
+            cached = self._subject_cache.get(work["id"])
+            if cached and cached["finished"]:
+                continue
+            aired = _parse_info_date(work.get("info", ""))
+            if work["id"] in new_ids or (aired and (today - aired).days <= self._recent_days):
+                to_fetch.append(work["id"])
+
+        await self._update_subject_cache(works, to_fetch)
+
+        credits: list[dict] = []
+        for work in works:
+            entry = self._subject_cache.get(work["id"])
+            if not entry:
+                continue
+            for member in entry["staff"]:
+                if member["person_id"] == person_id:
+                    credits.append({
+                        "id": work["id"],
+                        "title": work["title"],
+                        "role": member["role"],
+                        "episodes": member["episodes"],
+                    })
+        return credits
+
+    async def fetch_subject_staff_async(self, works: list[dict]) -> dict[str, list[dict]]:
+        """Staff of each work's subject by subject ID, fetching only subjects not cached yet.
+
+        Subjects that fail to load are left out.
+        """
+        await self._update_subject_cache(works, [work["id"] for work in works if work["id"] not in self._subject_cache])
+        return {
+            work["id"]: self._subject_cache[work["id"]]["staff"] for work in works if work["id"] in self._subject_cache
+        }
+
+    def cached_subject_staff(self, subject_id: str) -> list[dict] | None:
+        """Staff of a subject from the cache only, without any request."""
+        entry = self._subject_cache.get(subject_id)
+        return entry["staff"] if entry else None
+
+    async def _update_subject_cache(self, works: list[dict], subject_ids: list[str]) -> None:
+        """Fetch the staff of ``subject_ids`` concurrently and store them in the subject cache."""
+        today = date.today()
+        staff_lists = await asyncio.gather(*(self._fetch_subject_staff(subject_id) for subject_id in subject_ids))
+        fetched = dict(zip(subject_ids, staff_lists, strict=True))
+
+        aired_by_id = {work["id"]: _parse_info_date(work.get("info", "")) for work in works}
+        for subject_id, staff in fetched.items():
+            if staff is None:
+                continue
+            aired = aired_by_id[subject_id]
+            self._subject_cache[subject_id] = {
+                "finished": bool(aired and (today - aired).days > self._recent_days),
+                "staff": staff,
+            }
+        if self._subject_cache_path and fetched:
+            _save_json_cache(self._subject_cache_path, self._subject_cache, fetched)
+
+    async def _fetch_subject_staff(self, subject_id: str) -> list[dict] | None:
+        """Fetch and parse a subject's staff page. Returns None on failure."""
+        url = f"{BASE_URL_BANGUMI}/subject/{subject_id}/persons"
+        try:
+            logger.info("Fetching Bangumi subject staff: %s", url)
+            resp = await self._http.get(url, content_types=HTML_TYPES)
+            resp.raise_for_status()
+        except (requests.RequestException, ConnectionError) as e:
+            logger.error("Failed to fetch Bangumi subject %s: %s", subject_id, e)
+            return None
+
+        if self._parse_pool:
+            return await asyncio.wrap_future(self._parse_pool.submit(KIND_BANGUMI_SUBJECT_STAFF, resp.content))
+        resp.encoding = resp.apparent_encoding
+        return self._parse_subject_staff(BeautifulSoup(resp.text, "html.parser"))
+
+    @staticmethod
+    def _parse_subject_staff(soup: BeautifulSoup) -> list[dict]:
+        """Parse every staff member's roles and episodes from a subject's staff page."""
+        staff: list[dict] = []
+        column = soup.find("div", id="columnInSubjectA")
+        if not column:
+            return staff
+
+        for block in column.find_all("div", class_=re.compile(r"^light_(odd|even)$")):
+            link = block.select_one("h2 a.l")
+            match = re.match(r"^/person/(\d+)", str(link.get("href", ""))) if link else None
+            if not link or not match:
+                continue
+
+            for badge in block.select("div.prsn_info span.badge_job"):
+                tip = badge.find_next_sibling("span")
+                episodes = ""
+                if tip and "tip" in (tip.get("class") or []):
+                    episodes = re.sub(r"^ep\.?\s*", "", tip.get_text(strip=True), flags=re.IGNORECASE)
+                staff.append({
+                    "person_id": match.group(1),
+                    "name": link.get_text(strip=True),
+                    "role": badge.get_text(strip=True),
+                    "episodes": episodes,
+                })
+
+        return staff
+
+
+def _parse_info_date(info: str) -> date | None:
+    """Extract the air date from a Bangumi info line such as "2026-01 / スタジオ"."""
+    match = re.search(r"(\d{4})[-年/](\d{1,2})(?:[-月/](\d{1,2}))?", info)
+    if not match:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3) or 1))
+    except ValueError:
+        return None
+
+
+def _merge_wiki_page_entry(on_disk: dict, ours: dict) -> dict:
+    """Keep credits another worker parsed for other names from the same page content."""
+    if on_disk.get("hash") != ours["hash"]:
+        return ours
+    return {**ours, "credits": {**on_disk["credits"], **ours["credits"]}}
+
 
 class SakugaWikiScraper:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        archive: ResponseArchive | None = None,
+        request_interval: float = 2.0,
+        max_workers: int = 4,
+        page_cache_path: Path | str | None = None,
+        rate_limiter: HostRateLimiter | None = None,
+        parse_pool: ParsePool | None = None,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+    ) -> None:
+        self._archive = archive
         self._session = requests.Session()
         self._session.headers.update(DEFAULT_HEADERS)
+        self._limiter = rate_limiter or HostRateLimiter(request_interval)
+        self._parse_pool = parse_pool
+        self._page_cache_path = Path(page_cache_path) if page_cache_path else None
+        self._page_cache: dict[str, dict] = _load_json_cache(self._page_cache_path)
+        self._page_cache_lock = threading.Lock()
+        self._page_cache_updated: set[str] = set()
+        self._http = AsyncHttpClient(
+            self._session, self._limiter, per_host=max_workers, max_bytes=max_response_bytes
+        )
+
+    def close(self) -> None:
+        """Release the HTTP worker threads and connections."""
+        self._http.close()
+        self._session.close()
 
     def search(self, name: str) -> list[dict]:
         """Search for an animator on Sakuga@wiki."""
+        results: list[dict] = asyncio.run(self.search_async(name))
+        return results
+
+    async def search_async(self, name: str) -> list[dict]:
         url = f"{BASE_URL_SAKUGAWIKI}/sakuga/search"
         params = {"keyword": name}
 
         try:
             logger.info("Searching Sakuga@wiki for: %s", name)
-            resp = self._session.get(url, params=params, timeout=30)
+            resp = await self._http.get(url, content_types=HTML_TYPES, params=params)
             resp.raise_for_status()
             resp.encoding = resp.apparent_encoding
 
+            if self._archive:
+                self._archive.store(KIND_SAKUGAWIKI_SEARCH, f"sakugawiki_{name}", resp.url, resp.text)
+
             soup = BeautifulSoup(resp.text, "html.parser")
             return self._parse_search_results(soup)
 
@@ -152,7 +511,8 @@ class SakugaWikiScraper:
             logger.error("Failed to search Sakuga@wiki: %s", e)
             return []
 
-    def _parse_search_results(self, soup: BeautifulSoup) -> list[dict]:
+    @staticmethod
+    def _parse_search_results(soup: BeautifulSoup) -> list[dict]:
         """Parse search results from Sakuga@wiki."""
         results: list[dict] = []
         search_list = soup.find("ul", class_="search-list")
@@ -175,6 +535,102 @@ class SakugaWikiScraper:
 
         return results
 
+    def fetch_credits(self, name: str, results: list[dict]) -> list[dict]:
+        """Crawl search result pages and extract the credit lines mentioning a name.
+
+        Pages are fetched concurrently (bounded by ``max_workers``) with a per-host
+        interval. Unchanged pages (304, or same content hash) reuse cached credits.
+        """
+        credits: list[dict] = asyncio.run(self.fetch_credits_async(name, results))
+        return credits
+
+    async def fetch_credits_async(self, name: str, results: list[dict]) -> list[dict]:
+        pages = {r["url"]: r["title"] for r in results}
+        per_page = await asyncio.gather(*(self._fetch_page_credits(name, url, title) for url, title in pages.items()))
+
+        if self._page_cache_path:
+            with self._page_cache_lock:
+                updated, self._page_cache_updated = self._page_cache_updated, set()
+                _save_json_cache(self._page_cache_path, self._page_cache, updated, merge=_merge_wiki_page_entry)
+        return [credit for credits in per_page for credit in credits]
+
+    async def _fetch_page_credits(self, name: str, url: str, title: str) -> list[dict]:
+        with self._page_cache_lock:
+            cached = self._page_cache.get(url)
+        cached_credits: list[dict] | None = cached["credits"].get(name) if cached else None
+
+        headers: dict[str, str] = {}
+        if cached and cached_credits is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            logger.info("Fetching Sakuga@wiki page: %s", url)
+            resp = await self._http.get(url, content_types=HTML_TYPES, headers=headers)
+            if resp.status_code == 304 and cached_credits is not None:
+                return cached_credits
+            resp.raise_for_status()
+        except (requests.RequestException, ConnectionError) as e:
+            logger.error("Failed to fetch Sakuga@wiki page %s: %s", url, e)
+            return cached_credits or []
+
+        digest = hashlib.sha256(resp.content).hexdigest()
+        if cached and cached["hash"] == digest and cached_credits is not None:
+            return cached_credits
+
+        if self._parse_pool:
+            # Other pages keep downloading while a worker process parses this one
+            future = self._parse_pool.submit(KIND_SAKUGAWIKI_PAGE, resp.content, name, title, url)
+            credits = await asyncio.wrap_future(future)
+        else:
+            resp.encoding = resp.apparent_encoding
+            credits = self._parse_credit_lines(BeautifulSoup(resp.text, "html.parser"), name, title, url)
+
+        with self._page_cache_lock:
+            entry = self._page_cache.get(url)
+            if not entry or entry["hash"] != digest:
+                entry = {"hash": digest, "credits": {}}
+                self._page_cache[url] = entry
+            entry["etag"] = resp.headers.get("ETag", "")
+            entry["last_modified"] = resp.headers.get("Last-Modified", "")
+            entry["credits"][name] = credits
+            self._page_cache_updated.add(url)
+        return credits
+
+    @staticmethod
+    def _parse_credit_lines(soup: BeautifulSoup, name: str, title: str, url: str) -> list[dict]:
+        """Extract structured credits from the lines of a wiki page that mention a name."""
+        body = soup.find(id="wikibody") or soup.body or soup
+        credits: list[dict] = []
+        for line in body.get_text("\n").splitlines():
+            line = line.strip()
+            position = line.find(name)
+            if position < 0:
+                continue
+
+            episode_match = re.search(r"第\s*(\d+)\s*話|#\s*(\d+)", line)
+            credits.append({
+                "title": title,
+                "url": url,
+                "episode": (episode_match.group(1) or episode_match.group(2)) if episode_match else "",
+                "role": SakugaWikiScraper._find_role(line[:position]),
+                "line": line,
+            })
+        return credits
+
+    @staticmethod
+    def _find_role(prefix: str) -> str:
+        """Return the role keyword ending closest before the name, preferring the longest."""
+        best_role, best_end = "", -1
+        for role in WIKI_ROLE_KEYWORDS:
+            pos = prefix.rfind(role)
+            # Keywords are sorted longest first, so "総作画監督" wins over "作画監督" on a tie
+            if pos >= 0 and pos + len(role) > best_end:
+                best_role, best_end = role, pos + len(role)
+        return best_role
+
 
 ANILIST_ROLE_MAP: dict[str, str] = {
     "Key Animation": "原画",
@@ -194,29 +650,35 @@ ANILIST_ROLE_MAP: dict[str, str] = {
     "Effects Animation": "エフェクト作画",
 }
 
-ANILIST_API_URL = "https://graphql.anilist.co"
+WIKI_ROLE_KEYWORDS: list[str] = sorted(
+    {*ANILIST_ROLE_MAP.values(), "作監", "総作監", "作監補佐", "コンテ", "原画", "第二原画", "動画"},
+    key=len,
+    reverse=True,
+)
 
-ANILIST_QUERY = """
-query ($search: String!) {
-  Staff(search: $search) {
-    id
-    name {
-      full
-      native
-    }
-    staffMedia(sort: START_DATE_DESC, perPage: 25) {
-      edges {
-        staffRole
-        node {
-          id
-          title {
-            romaji
-            native
-          }
-          startDate {
-            year
-            month
-          }
+ANILIST_API_URL = "https://graphql.anilist.co"
+# AniList allows 90 requests per minute; one per second leaves room for other clients on the same IP
+ANILIST_REQUEST_INTERVAL = 1.0
+
+ANILIST_STAFF_FRAGMENT = """
+fragment StaffCredits on Staff {
+  id
+  name {
+    full
+    native
+  }
+  staffMedia(sort: START_DATE_DESC, perPage: 25) {
+    edges {
+      staffRole
+      node {
+        id
+        title {
+          romaji
+          native
+        }
+        startDate {
+          year
+          month
         }
       }
     }
@@ -224,32 +686,116 @@ query ($search: String!) {
 }
 """
 
+ANILIST_QUERY = """
+query ($search: String!) {
+  Staff(search: $search) {
+    ...StaffCredits
+  }
+}
+""" + ANILIST_STAFF_FRAGMENT
+
+ANILIST_QUERY_BY_ID = """
+query ($id: Int!) {
+  Staff(id: $id) {
+    ...StaffCredits
+  }
+}
+""" + ANILIST_STAFF_FRAGMENT
+
+
+def _is_not_found(error: dict) -> bool:
+    return error.get("status") == 404 or "not found" in str(error.get("message", "")).lower()
+
 
 class AniListScraper:
+    def __init__(
+        self,
+        archive: ResponseArchive | None = None,
+        identity: IdentityCache | None = None,
+        rate_limiter: HostRateLimiter | None = None,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+    ) -> None:
+        self._archive = archive
+        self._identity = identity
+        self._session = requests.Session()
+        self._http = AsyncHttpClient(
+            self._session, rate_limiter or HostRateLimiter(0), max_bytes=max_response_bytes
+        )
+
+    def close(self) -> None:
+        """Release the HTTP worker threads and connections."""
+        self._http.close()
+        self._session.close()
+
     def fetch_works(self, name: str) -> list[dict]:
-        """Fetch staff credits from AniList GraphQL API."""
+        """Fetch staff credits from AniList GraphQL API.
+
+        With an identity cache, the name is resolved to a staff ID once and later
+        runs query ``Staff(id:)`` directly until the entry needs revalidation.
+        """
+        works: list[dict] = asyncio.run(self.fetch_works_async(name))
+        return works
+
+    async def fetch_works_async(self, name: str) -> list[dict]:
         try:
             logger.info("Fetching AniList credits for: %s", name)
-            resp = requests.post(
-                ANILIST_API_URL,
-                json={"query": ANILIST_QUERY, "variables": {"search": name}},
-                timeout=30,
-            )
-            resp.raise_for_status()
+            pinned_id = self._identity.get("anilist", name) if self._identity else None
+
+            if pinned_id and self._identity and not self._identity.needs_revalidation("anilist", name):
+                staff = await self._query(ANILIST_QUERY_BY_ID, {"id": int(pinned_id)}, name)
+            else:
+                staff = await self._query(ANILIST_QUERY, {"search": name}, name)
+                if pinned_id and (not staff or str(staff["id"]) != pinned_id):
+                    if staff:
+                        logger.warning(
+                            "AniList search for %s now matches staff %s, keeping pinned staff %s",
+                            name, staff["id"], pinned_id,
+                        )
+                    # Also when the search finds nobody: the pinned staff may still exist under another name
+                    staff = await self._query(ANILIST_QUERY_BY_ID, {"id": int(pinned_id)}, name)
+
+            if pinned_id and self._identity and not staff:
+                # Never switch to another person in the same run; the next run resolves the name afresh
+                logger.warning("AniList staff %s for %s no longer exists, resolving next run", pinned_id, name)
+                self._identity.forget("anilist", name)
+                return []
 
-            data = resp.json()
-            staff = data.get("data", {}).get("Staff")
             if not staff:
                 logger.warning("No staff found on AniList for: %s", name)
                 return []
 
+            if self._identity and self._identity.needs_revalidation("anilist", name):
+                self._identity.set("anilist", name, str(staff["id"]))
+
             return self._parse_edges(staff["staffMedia"]["edges"])
 
         except (requests.RequestException, ConnectionError) as e:
             logger.error("Failed to fetch AniList credits: %s", e)
             return []
 
-    def _parse_edges(self, edges: list[dict]) -> list[dict]:
+    async def _query(self, query: str, variables: dict, name: str) -> dict | None:
+        """Run a Staff query and return the staff object, or None if AniList has no such staff."""
+        resp = await self._http.post(
+            ANILIST_API_URL,
+            content_types=("application/json",),
+            json={"query": query, "variables": variables},
+        )
+        # AniList answers an unknown Staff(id:) with 404 and a "Not Found." GraphQL error
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+
+        if self._archive:
+            self._archive.store(KIND_ANILIST_STAFF, f"anilist_{name}", f"{ANILIST_API_URL}#{name}", resp.text)
+
+        body = resp.json()
+        if any(_is_not_found(error) for error in body.get("errors") or []):
+            return None
+        staff: dict | None = (body.get("data") or {}).get("Staff")
+        return staff
+
+    @staticmethod
+    def _parse_edges(edges: list[dict]) -> list[dict]:
         """Parse staff media edges into a flat list."""
         results: list[dict] = []
         for edge in edges:
@@ -265,7 +811,7 @@ class AniListScraper:
                 "id": str(node.get("id", "")),
                 "title": title_data.get("native", "") or title_data.get("romaji", ""),
                 "title_romaji": title_data.get("romaji", ""),
-                "role": self._translate_role(edge.get("staffRole", "")),
+                "role": AniListScraper._translate_role(edge.get("staffRole", "")),
                 "date": date,
             })
 
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FIELDS = ("title", "title_cn", "title_romaji", "role", "date", "info")
+
+# Latin words / numbers, or runs of CJK (kana, kanji, hangul) characters
+TOKEN_RE = re.compile(r"[0-9a-z]+|[぀-ヿ㐀-鿿豈-﫿가-힯]+")
+
+# Bump when the schema or tokenization changes; older index files are rebuilt
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (source, item_key)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (token, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS meta (
+    source TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+"""
+
+
+def tokenize(text: str) -> set[str]:
+    """Latin words as-is, CJK runs as character bigrams plus the run's last character.
+
+    Every CJK character thus starts a bigram or is a unigram of its own, which
+    lets a one-character query match by prefix.
+    """
+    tokens: set[str] = set()
+    for run in TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if run.isascii():
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.add(run[-1])
+    return tokens
+
+
+def _item_key(item: dict) -> str:
+    return hashlib.sha1(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _content_hash(items: list[dict]) -> str:
+    canonical = json.dumps(items, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CreditSearchIndex:
+    """Persistent inverted index over stored credits, kept in a SQLite file.
+
+    ``update`` is called with a source's full item list and only inserts and
+    deletes the items that changed, so keeping the index current costs in
+    proportion to the diff rather than the whole history. The content hash of
+    each indexed source is kept in ``meta``, so a source already indexed at
+    its current content is skipped without diffing. The history file's
+    signature is kept next to it, so callers can skip unchanged files without
+    reading them.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self._path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self._path)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Older files are refilled from the histories by the next saves or `search`
+                self._conn.executescript(
+                    "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS docs; DROP TABLE IF EXISTS meta;"
+                )
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def signature(self, source: str) -> tuple[int, int] | None:
+        """(mtime_ns, size) of the history file a source was last indexed from, if recorded."""
+        row = self._connect().execute("SELECT mtime_ns, size FROM meta WHERE source = ?", (source,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return row[0], row[1]
+
+    def update(self, source: str, items: list[dict], signature: tuple[int, int] | None = None) -> None:
+        """Make the indexed items of a source match ``items``, read from a file with ``signature``."""
+        conn = self._connect()
+        content_hash = _content_hash(items)
+        mtime_ns, size = signature or (None, None)
+        row = conn.execute("SELECT content_hash FROM meta WHERE source = ?", (source,)).fetchone()
+        if row and row[0] == content_hash:
+            with conn:
+                conn.execute("UPDATE meta SET mtime_ns = ?, size = ? WHERE source = ?", (mtime_ns, size, source))
+            return
+
+        new_items = {_item_key(item): item for item in items}
+        existing = dict(conn.execute("SELECT item_key, doc_id FROM docs WHERE source = ?", (source,)).fetchall())
+
+        removed = [doc_id for key, doc_id in existing.items() if key not in new_items]
+        added = [(key, item) for key, item in new_items.items() if key not in existing]
+
+        with conn:
+            conn.executemany("DELETE FROM postings WHERE doc_id = ?", [(doc_id,) for doc_id in removed])
+            conn.executemany("DELETE FROM docs WHERE doc_id = ?", [(doc_id,) for doc_id in removed])
+            for key, item in added:
+                cursor = conn.execute(
+                    "INSERT INTO docs (source, item_key, date, data) VALUES (?, ?, ?, ?)",
+                    (source, key, item.get("date", "") or item.get("info", ""), json.dumps(item, ensure_ascii=False)),
+                )
+                text = " ".join(str(item.get(field, "")) for field in INDEXED_FIELDS)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO postings (token, doc_id) VALUES (?, ?)",
+                    [(token, cursor.lastrowid) for token in tokenize(text)],
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (source, content_hash, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                (source, content_hash, mtime_ns, size),
+            )
+
+        if removed or added:
+            logger.info("Search index for %s: %d added, %d removed", source, len(added), len(removed))
+
+    def remove(self, source: str) -> None:
+        """Drop a source, e.g. one whose history file is gone."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM postings WHERE doc_id IN (SELECT doc_id FROM docs WHERE source = ?)", (source,)
+            )
+            conn.execute("DELETE FROM docs WHERE source = ?", (source,))
+            conn.execute("DELETE FROM meta WHERE source = ?", (source,))
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            for table in ("postings", "docs", "meta"):
+                conn.execute(f"DELETE FROM {table}")
+
+    def sources(self) -> list[str]:
+        return [row[0] for row in self._connect().execute("SELECT source FROM meta ORDER BY source")]
+
+    def search(self, query: str, source_prefix: str = "", limit: int = 20) -> list[dict]:
+        """Return credits containing every token of the query, newest first.
+
+        A single CJK character matches every bigram starting with it. Each
+        result is the stored item plus a ``source`` field.
+        """
+        tokens = sorted(tokenize(query))
+        if not tokens:
+            return []
+
+        clauses = []
+        params: list[str | int] = []
+        for token in tokens:
+            if len(token) == 1 and not token.isascii():
+                clauses.append("SELECT doc_id FROM postings WHERE token >= ? AND token < ?")
+                params += [token, chr(ord(token) + 1)]
+            else:
+                clauses.append("SELECT doc_id FROM postings WHERE token = ?")
+                params.append(token)
+
+        rows = self._connect().execute(
+            f"""
+            SELECT docs.source, docs.data FROM docs
+            WHERE docs.doc_id IN ({" INTERSECT ".join(clauses)})
+            AND docs.source LIKE ? ESCAPE '\\'
+            ORDER BY docs.date DESC, docs.doc_id DESC
+            LIMIT ?
+            """,
+            (*params, _like_prefix(source_prefix), limit),
+        ).fetchall()
+        return [{"source": source, **json.loads(data)} for source, data in rows]
+
+    def count(self) -> int:
+        row = self._connect().execute("SELECT COUNT(*) FROM docs").fetchone()
+        return int(row[0])
+
+
+def _like_prefix(prefix: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", prefix) + "%"
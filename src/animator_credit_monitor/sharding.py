@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+
+from animator_credit_monitor.watchlist import Target
+
+
+class HashRing:
+    """Consistent hashing of keys onto ``shards`` numbered 1..N.
+
+    Each shard owns ``vnodes`` points on the ring, so keys spread evenly and
+    changing the shard count only moves about 1/N of them to another shard.
+    """
+
+    def __init__(self, shards: int, vnodes: int = 64) -> None:
+        if shards < 1:
+            raise ValueError(f"Shard count must be at least 1: {shards}")
+        points = sorted(
+            (_hash(f"shard-{shard}#{vnode}"), shard) for shard in range(1, shards + 1) for vnode in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def owner(self, key: str) -> int:
+        """Return the shard a key belongs to."""
+        position = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[position]
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse ``"I/N"`` (1-based shard I of N)."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like 1/4: {spec!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}: {spec!r}")
+    return index, count
+
+
+def target_key(target: Target) -> str:
+    """Stable key a target is sharded by (the name, so resolving its Bangumi ID never moves it)."""
+    return f"name:{target.name}" if target.name else f"bangumi:{target.bangumi_id}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
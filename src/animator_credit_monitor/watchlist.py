@@ -0,0 +1,35 @@
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Target:
+    """A person to monitor. Either field may be empty, but not both."""
+
+    name: str = ""
+    bangumi_id: str = ""
+
+    @property
+    def label(self) -> str:
+        return self.name or f"Bangumi {self.bangumi_id}"
+
+
+def load_watchlist(path: Path | str) -> list[Target]:
+    """Load targets from a JSON list of ``{"name": ..., "bangumi_id": ...}`` objects."""
+    with open(path, encoding="utf-8") as f:
+        entries: list[dict] = json.load(f)
+
+    targets = []
+    for entry in entries:
+        target = Target(name=str(entry.get("name", "")), bangumi_id=str(entry.get("bangumi_id", "")))
+        if not target.name and not target.bangumi_id:
+            logger.warning("Skipping watchlist entry without name or bangumi_id: %s", entry)
+            continue
+        targets.append(target)
+
+    logger.info("Loaded %d targets from %s", len(targets), path)
+    return targets
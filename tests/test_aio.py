@@ -0,0 +1,196 @@
+import asyncio
+import io
+import threading
+import time
+from typing import Any
+
+import pytest
+import requests
+
+from animator_credit_monitor.aio import AsyncHttpClient, ChallengePage, ResponseRejected
+from animator_credit_monitor.ratelimit import HostRateLimiter
+
+
+class SlowSession(requests.Session):
+    """Stand-in session that records how many requests per host are in flight at once."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+        self.in_flight: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def request(self, method: str | bytes, url: str | bytes, *args: Any, **kwargs: Any) -> requests.Response:
+        host = str(url).split("/")[2]
+        with self._lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight[host] -= 1
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"ok")
+        return response
+
+
+class HandshakeLimiter(HostRateLimiter):
+    """Limiter whose reservation for one host blocks until another host reserves."""
+
+    def __init__(self) -> None:
+        super().__init__(0)
+        self.other_reserved = threading.Event()
+        self.waited: bool | None = None
+
+    def reserve(self, url: str) -> float:
+        if "a.example" in url:
+            self.waited = self.other_reserved.wait(timeout=2)
+        else:
+            self.other_reserved.set()
+        return super().reserve(url)
+
+
+class TestAsyncHttpClient:
+    def test_ホストごとの同時リクエスト数が制限される(self) -> None:
+        session = SlowSession(delay=0.02)
+        client = AsyncHttpClient(session, HostRateLimiter(0), per_host=2, max_in_flight=16)
+
+        async def run() -> list[requests.Response]:
+            urls = [f"https://{host}/page/{i}" for host in ("a.example", "b.example") for i in range(10)]
+            return await asyncio.gather(*(client.get(url) for url in urls))
+
+        responses = asyncio.run(run())
+        client.close()
+
+        assert len(responses) == 20
+        assert session.peak == {"a.example": 2, "b.example": 2}
+
+    def test_レート制限の予約はイベントループを止めない(self) -> None:
+        limiter = HandshakeLimiter()
+        client = AsyncHttpClient(SlowSession(delay=0), limiter)
+
+        async def run() -> None:
+            await asyncio.gather(client.get("https://a.example/1"), client.get("https://b.example/1"))
+
+        asyncio.run(run())
+        client.close()
+
+        assert limiter.waited is True
+
+    def test_タイムアウトするとrequestsのTimeoutになる(self) -> None:
+        client = AsyncHttpClient(SlowSession(delay=0.5), HostRateLimiter(0), timeout=0.05)
+
+        started = time.monotonic()
+        with pytest.raises(requests.Timeout):
+            asyncio.run(client.get("https://a.example/slow"))
+        client.close()
+
+        assert time.monotonic() - started < 0.4
+
+    def test_待機中のリクエストはキャンセルできる(self) -> None:
+        client = AsyncHttpClient(SlowSession(delay=0), HostRateLimiter(10.0))
+
+        async def run() -> None:
+            await client.get("https://a.example/1")
+            # The second request waits 10s for its rate-limit slot; cancel it
+            task = asyncio.create_task(client.get("https://a.example/2"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        started = time.monotonic()
+        asyncio.run(run())
+        client.close()
+
+        assert time.monotonic() - started < 1.0
+
+
+class CountingStream(io.BytesIO):
+    """Response body that records how many bytes were actually read."""
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class CannedSession(requests.Session):
+    def __init__(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        super().__init__()
+        self.stream = CountingStream(body)
+        self.status = status
+        self.canned_headers = headers
+
+    def request(self, method: str | bytes, url: str | bytes, *args: Any, **kwargs: Any) -> requests.Response:
+        assert kwargs["stream"] is True
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers.update(self.canned_headers)
+        response.raw = self.stream
+        response.url = str(url)
+        return response
+
+
+def fetch(session: CannedSession, max_bytes: int = 1024 * 1024) -> requests.Response:
+    client = AsyncHttpClient(session, HostRateLimiter(0), max_bytes=max_bytes)
+    try:
+        return asyncio.run(client.get("https://bangumi.tv/person/1/works", content_types=("text/",)))
+    finally:
+        client.close()
+
+
+class TestStreamedDownload:
+    def test_チャレンジページは先頭数KBだけで検出される(self) -> None:
+        body = b"<html><head><title>Just a moment...</title></head>" + b"x" * 5_000_000
+        session = CannedSession(503, body, {"Content-Type": "text/html"})
+
+        with pytest.raises(ChallengePage):
+            fetch(session)
+
+        assert session.stream.bytes_read < 200_000
+
+    def test_上限サイズを超える本文は途中で打ち切られる(self) -> None:
+        session = CannedSession(200, b"a" * 5_000_000, {"Content-Type": "text/html"})
+
+        with pytest.raises(ResponseRejected):
+            fetch(session, max_bytes=100_000)
+
+        assert session.stream.bytes_read < 300_000
+
+    def test_Content_Lengthが上限を超えると本文を読まない(self) -> None:
+        session = CannedSession(200, b"a" * 1000, {"Content-Type": "text/html", "Content-Length": "999999999"})
+
+        with pytest.raises(ResponseRejected):
+            fetch(session)
+
+        assert session.stream.bytes_read == 0
+
+    def test_想定外のContent_Typeは本文を読まずに中断する(self) -> None:
+        session = CannedSession(200, b"\x89PNG" * 1000, {"Content-Type": "image/png"})
+
+        with pytest.raises(ResponseRejected):
+            fetch(session)
+
+        assert session.stream.bytes_read == 0
+
+    def test_エラーステータスは先頭だけ読んでraise_for_statusできる(self) -> None:
+        session = CannedSession(500, b"e" * 5_000_000, {"Content-Type": "text/html"})
+
+        response = fetch(session)
+
+        assert session.stream.bytes_read < 200_000
+        with pytest.raises(requests.HTTPError):
+            response.raise_for_status()
+
+    def test_通常のページは全体を読み込んでtextで参照できる(self) -> None:
+        session = CannedSession(200, "<html>テスト</html>".encode(), {"Content-Type": "text/html; charset=utf-8"})
+
+        response = fetch(session)
+
+        assert response.text == "<html>テスト</html>"
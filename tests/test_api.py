@@ -0,0 +1,132 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from animator_credit_monitor.api import CreditStore, make_server, split_source_key
+from animator_credit_monitor.history import HistoryManager
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> HistoryManager:
+    history = HistoryManager(data_dir=tmp_path)
+    history.save("bangumi_12345", [
+        {"id": "1", "title": "進撃の巨人", "role": "原画", "info": "2013-04-07"},
+        {"id": "2", "title": "鬼滅の刃", "role": "作画監督", "info": "2019-04-06"},
+        {"id": "3", "title": "日付なし", "role": "原画", "info": ""},
+    ])
+    history.save("anilist_Name", [{"id": 10, "title": "Work", "role": "Key Animation", "date": "2020-07"}])
+    return history
+
+
+@pytest.fixture
+def base_url(history: HistoryManager) -> Iterator[str]:
+    store = CreditStore(history, refresh_interval=0)
+    store.refresh(force=True)
+    server = make_server(store, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url: str, etag: str = "") -> tuple[int, str, dict]:
+    request = urllib.request.Request(url, headers={"If-None-Match": etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["ETag"], json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, e.headers.get("ETag", ""), json.loads(body) if body else {}
+
+
+class TestSplitSourceKey:
+    def test_エピソードのキーは通常のbangumiと区別される(self) -> None:
+        assert split_source_key("bangumi_episodes_12345") == ("bangumi_episodes", "12345")
+        assert split_source_key("bangumi_12345") == ("bangumi", "12345")
+        assert split_source_key("sakugawiki_credits_名前") == ("sakugawiki_credits", "名前")
+
+
+class TestCreditStore:
+    def test_対象と役職と期間で絞り込み新しい順に返す(self, history: HistoryManager) -> None:
+        store = CreditStore(history)
+        store.refresh(force=True)
+
+        assert [c["title"] for c in store.query()] == ["Work", "鬼滅の刃", "進撃の巨人", "日付なし"]
+        assert [c["title"] for c in store.query(target="12345", role="原画")] == ["進撃の巨人", "日付なし"]
+        assert [c["title"] for c in store.query(date_from="2013-01", date_to="2019-12")] == ["鬼滅の刃", "進撃の巨人"]
+        assert [c["title"] for c in store.query(role="原画", date_to="2015-01")] == ["進撃の巨人"]
+        assert [c["title"] for c in store.query(source="anilist")] == ["Work"]
+
+    def test_変更された履歴だけを再読み込みする(self, history: HistoryManager) -> None:
+        store = CreditStore(history, refresh_interval=0)
+        store.refresh(force=True)
+        version = store.version
+
+        assert store.refresh() is False
+        assert store.version == version
+
+        history.save("anilist_Name", [
+            {"id": 10, "title": "Work", "role": "Key Animation", "date": "2020-07"},
+            {"id": 11, "title": "New Work", "role": "Key Animation", "date": "2024-01"},
+        ])
+        assert store.refresh() is True
+        assert store.version != version
+        assert store.query(source="anilist")[0]["title"] == "New Work"
+
+    def test_一覧は対象ごとのソースと件数を返す(self, history: HistoryManager) -> None:
+        store = CreditStore(history)
+        store.refresh(force=True)
+
+        assert store.targets() == [
+            {"target": "12345", "sources": {"bangumi": 3}},
+            {"target": "Name", "sources": {"anilist": 1}},
+        ]
+
+    def test_監視対象のラベルでソースをまとめる(self, history: HistoryManager) -> None:
+        history.save("sakugawiki_名前", [{"title": "作品", "url": "https://example.com"}])
+        labels = {"bangumi_12345": "名前", "sakugawiki_名前": "名前"}
+        store = CreditStore(history, target_labels=labels)
+        store.refresh(force=True)
+
+        assert store.targets() == [
+            {"target": "Name", "sources": {"anilist": 1}},
+            {"target": "名前", "sources": {"bangumi": 3, "sakugawiki": 1}},
+        ]
+        assert [c["title"] for c in store.query(target="名前", source="bangumi")][:1] == ["鬼滅の刃"]
+        assert store.query(target="12345") == []
+
+
+class TestApiServer:
+    def test_ETagが一致すれば304を返す(self, base_url: str) -> None:
+        status, etag, body = _get(f"{base_url}/credits?role=%E5%8E%9F%E7%94%BB")
+        assert status == 200
+        assert body["count"] == 2
+        assert etag
+
+        status, _, _ = _get(f"{base_url}/credits?role=%E5%8E%9F%E7%94%BB", etag)
+        assert status == 304
+
+    def test_ページングと不正なパラメータ(self, base_url: str) -> None:
+        status, _, body = _get(f"{base_url}/credits?limit=1&offset=1")
+        assert status == 200
+        assert body["count"] == 4
+        assert [c["title"] for c in body["credits"]] == ["鬼滅の刃"]
+
+        assert _get(f"{base_url}/credits?limit=abc")[0] == 400
+        assert _get(f"{base_url}/unknown")[0] == 404
+
+    def test_履歴が更新されるとETagが変わる(self, base_url: str, history: HistoryManager) -> None:
+        _, etag, _ = _get(f"{base_url}/targets")
+
+        history.save("anilist_Other", [{"id": 20, "title": "Other", "role": "Key Animation", "date": "2021-01"}])
+
+        status, new_etag, body = _get(f"{base_url}/targets", etag)
+        assert status == 200
+        assert new_etag != etag
+        assert [t["target"] for t in body["targets"]] == ["12345", "Name", "Other"]
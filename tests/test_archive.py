@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import responses
+
+from animator_credit_monitor.archive import (
+    KIND_BANGUMI_WORKS,
+    KIND_SAKUGAWIKI_SEARCH,
+    ResponseArchive,
+)
+from animator_credit_monitor.locks import FileLock
+from animator_credit_monitor.scraper import BangumiScraper
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class TestResponseArchive:
+    def test_同じ内容のレスポンスは一度だけ保存される(self, tmp_path: Path) -> None:
+        archive = ResponseArchive(tmp_path / "archive")
+
+        digest_a = archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/a", "<html>同じ</html>")
+        digest_b = archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/a", "<html>同じ</html>")
+
+        assert digest_a == digest_b
+        assert len(list((tmp_path / "archive").glob("objects/*/*.gz"))) == 1
+        assert len(archive.entries()) == 2
+        assert archive.read(digest_a) == "<html>同じ</html>"
+
+    def test_URLごとに最新のエントリがページ順で返される(self, tmp_path: Path) -> None:
+        archive = ResponseArchive(tmp_path / "archive")
+        archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p2", "old2", page=2)
+        archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p1", "new1", page=1)
+        archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p2", "new2", page=2)
+
+        latest = archive.latest_entries()
+
+        assert [archive.read(e["hash"]) for e in latest["bangumi_1"]] == ["new1", "new2"]
+
+    def test_最新の完了した実行のページだけが返され実行をまたいで混ざらない(self, tmp_path: Path) -> None:
+        root = tmp_path / "archive"
+        first = ResponseArchive(root)
+        for page in (1, 2, 3):
+            url = f"https://example.com/p{page}"
+            first.store(KIND_BANGUMI_WORKS, "bangumi_1", url, f"a{page}", page=page, last=page == 3)
+        second = ResponseArchive(root)
+        second.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p1", "b1", page=1, last=False)
+        second.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p2", "b2", page=2, last=True)
+        # Cut short by an error before its last page
+        third = ResponseArchive(root)
+        third.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/p1", "c1", page=1, last=False)
+
+        latest = ResponseArchive(root).latest_entries()
+
+        assert [first.read(e["hash"]) for e in latest["bangumi_1"]] == ["b1", "b2"]
+
+    def test_保持期間と件数上限を超えたレスポンスは削除される(self, tmp_path: Path) -> None:
+        archive = ResponseArchive(tmp_path / "archive", retention_days=1, keep_per_url=2)
+        for body in ["v1", "v2", "v3"]:
+            archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/a", body)
+        archive.store(KIND_BANGUMI_WORKS, "bangumi_2", "https://example.com/b", "expired")
+
+        # 最後のエントリを期限切れにする
+        index_path = tmp_path / "archive" / "index.jsonl"
+        lines = index_path.read_text(encoding="utf-8").splitlines()
+        expired = json.loads(lines[-1])
+        expired["fetched_at"] = time.time() - 3 * 86400
+        lines[-1] = json.dumps(expired)
+        index_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        removed = archive.prune()
+
+        assert removed == 2
+        assert [archive.read(e["hash"]) for e in archive.entries()] == ["v2", "v3"]
+
+    def test_pruneはアーカイブのロックが解放されるまで待つ(self, tmp_path: Path) -> None:
+        archive = ResponseArchive(tmp_path / "archive")
+        archive.store(KIND_BANGUMI_WORKS, "bangumi_1", "https://example.com/a", "v1")
+
+        lock = FileLock(tmp_path / "archive" / ".index.lock")
+        lock.acquire()
+        pruner = threading.Thread(target=archive.prune)
+        pruner.start()
+        try:
+            pruner.join(timeout=0.3)
+            assert pruner.is_alive()
+        finally:
+            lock.release()
+        pruner.join(timeout=5)
+
+        assert not pruner.is_alive()
+        assert [archive.read(e["hash"]) for e in archive.entries()] == ["v1"]
+
+    def test_アーカイブから全ソースを再パースできる(self, tmp_path: Path) -> None:
+        archive = ResponseArchive(tmp_path / "archive")
+        archive.store(
+            KIND_BANGUMI_WORKS,
+            "bangumi_12345",
+            "https://bangumi.tv/person/12345/works",
+            (FIXTURES_DIR / "bangumi_works.html").read_text(),
+        )
+        archive.store(
+            KIND_SAKUGAWIKI_SEARCH,
+            "sakugawiki_テスト",
+            "https://w.atwiki.jp/sakuga/search?keyword=テスト",
+            (FIXTURES_DIR / "sakugawiki_search.html").read_text(),
+        )
+
+        results = archive.reparse(workers=2)
+
+        assert [w["id"] for w in results["bangumi_12345"]] == ["100001", "100002", "100003"]
+        assert len(results["sakugawiki_テスト"]) == 3
+
+    def test_空のアーカイブの再パースは空の結果を返す(self, tmp_path: Path) -> None:
+        assert ResponseArchive(tmp_path / "archive").reparse() == {}
+
+    @responses.activate
+    def test_スクレイパーは取得したレスポンスをアーカイブに保存する(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "bangumi_works.html").read_text()
+        responses.add(responses.GET, "https://bangumi.tv/person/12345/works", body=html, status=200)
+        archive = ResponseArchive(tmp_path / "archive")
+
+        BangumiScraper(request_interval=0, archive=archive).fetch_works("12345")
+
+        entries = archive.entries()
+        assert len(entries) == 1
+        assert entries[0]["source"] == "bangumi_12345"
+        assert archive.read(entries[0]["hash"]) == html
+
+    @responses.activate
+    def test_途中で失敗した取得は再パースに使われない(self, tmp_path: Path) -> None:
+        page1 = (FIXTURES_DIR / "bangumi_works.html").read_text().replace(
+            '<span class="p_edge">( 1 / 1 )</span>',
+            '<a class="p" href="?sort=date&amp;page=2">2</a><span class="p_edge">( 1 / 2 )</span>',
+        )
+        page2 = (FIXTURES_DIR / "bangumi_works_page2.html").read_text()
+        changed = page1.replace("テスト作品A", "途中で失敗した回の作品")
+        for body, status in [(page1, 200), (page2, 200), (changed, 200), ("", 503)]:
+            responses.add(responses.GET, "https://bangumi.tv/person/12345/works", body=body, status=status)
+
+        BangumiScraper(request_interval=0, archive=ResponseArchive(tmp_path / "archive")).fetch_works("12345")
+        BangumiScraper(request_interval=0, archive=ResponseArchive(tmp_path / "archive")).fetch_works("12345")
+
+        results = ResponseArchive(tmp_path / "archive").reparse(workers=1)
+        assert len(results["bangumi_12345"]) == 4
+        assert "途中で失敗した回の作品" not in [work["title"] for work in results["bangumi_12345"]]
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from animator_credit_monitor.bootstrap import BootstrapState, BudgetedRateLimiter
+
+
+class TestBudgetedRateLimiter:
+    def test_予算分のリクエストで使い切りになる(self, tmp_path: Path) -> None:
+        limiter = BudgetedRateLimiter(tmp_path, 0, budget=2)
+
+        limiter.reserve("https://bangumi.tv/person/1/works")
+        assert not limiter.exhausted
+        limiter.reserve("https://w.atwiki.jp/sakuga/search")
+
+        assert limiter.exhausted
+        assert limiter.used == 2
+
+
+class TestBootstrapState:
+    def test_開始したが完了していない対象は再開後も残る(self, tmp_path: Path) -> None:
+        state = BootstrapState(tmp_path / "bootstrap_state.json")
+        state.start("name:A")
+        state.start("name:B")
+        state.finish("name:A")
+
+        reloaded = BootstrapState(tmp_path / "bootstrap_state.json")
+
+        assert not reloaded.in_progress("name:A")
+        assert reloaded.in_progress("name:B")
+
+    def test_別のシャードが記録した対象を上書きしない(self, tmp_path: Path) -> None:
+        first = BootstrapState(tmp_path / "bootstrap_state.json")
+        second = BootstrapState(tmp_path / "bootstrap_state.json")
+        first.start("name:A")
+        second.start("name:B")
+        first.finish("name:A")
+
+        reloaded = BootstrapState(tmp_path / "bootstrap_state.json")
+
+        assert not reloaded.in_progress("name:A")
+        assert reloaded.in_progress("name:B")
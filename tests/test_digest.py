@@ -0,0 +1,54 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from animator_credit_monitor.digest import DigestCollector
+
+
+class TestDigestCollector:
+    def test_複数ソースで同じ作品は1件にまとめて1回だけ通知する(self, tmp_path: Path) -> None:
+        digest = DigestCollector(tmp_path / "digest_pending.json", window_seconds=0)
+        digest.add("アニメーターA", "Bangumi", [{"title": "テスト作品A", "role": "原画", "info": "2026-01"}])
+        digest.add("アニメーターA", "AniList", [{"title": "テスト作品Ａ", "role": "原画 (ep 1)", "date": "2026-01"}])
+        digest.add("アニメーターA", "作画@wiki", [{"title": "テスト作品A（TV）", "url": "https://example.com"}])
+        digest.add("アニメーターB", "Bangumi", [{"title": "テスト作品A", "role": "作画監督"}])
+        notifier = MagicMock()
+
+        sent = digest.flush(notifier)
+
+        assert sent
+        notifier.notify.assert_called_once()
+        title, message = notifier.notify.call_args.args
+        assert "2件" in title
+        assert "  - テスト作品A [原画 / 原画 (ep 1)] (Bangumi, AniList, 作画@wiki)" in message
+        assert "■ アニメーターB" in message
+        assert digest.pending() == 0
+
+    def test_ウィンドウ期間内は通知せず次回実行に持ち越す(self, tmp_path: Path) -> None:
+        digest = DigestCollector(tmp_path / "digest_pending.json", window_seconds=3600)
+        digest.add("アニメーターA", "Bangumi", [{"title": "テスト作品A"}])
+        notifier = MagicMock()
+
+        assert not digest.flush(notifier)
+        notifier.notify.assert_not_called()
+
+        next_run = DigestCollector(tmp_path / "digest_pending.json", window_seconds=3600)
+        next_run.add("アニメーターA", "Bangumi", [{"title": "テスト作品B"}])
+        assert next_run.pending() == 2
+        assert next_run.flush(notifier, force=True)
+        notifier.notify.assert_called_once()
+
+    def test_大量のクレジットは行数上限で省略される(self, tmp_path: Path) -> None:
+        digest = DigestCollector(tmp_path / "digest_pending.json", window_seconds=0, max_lines=3)
+        digest.add("アニメーターA", "Bangumi", [{"title": f"作品{i}"} for i in range(10)])
+        notifier = MagicMock()
+
+        digest.flush(notifier)
+
+        message = notifier.notify.call_args.args[1]
+        assert "... 他 7 件" in message
+
+    def test_空のダイジェストは通知しない(self, tmp_path: Path) -> None:
+        notifier = MagicMock()
+
+        assert not DigestCollector(tmp_path / "digest_pending.json", window_seconds=0).flush(notifier)
+        notifier.notify.assert_not_called()
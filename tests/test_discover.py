@@ -0,0 +1,95 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+import responses
+
+from animator_credit_monitor.bootstrap import BudgetedRateLimiter
+from animator_credit_monitor.discover import DiscoverState, crawl, rank_candidates
+from animator_credit_monitor.history import HistoryManager
+from animator_credit_monitor.scraper import BangumiScraper
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+STAFF_HTML = (FIXTURES_DIR / "bangumi_subject_persons.html").read_text()
+
+
+def _run(tmp_path: Path, state: DiscoverState, budget: int = 100) -> tuple[int, BangumiScraper]:
+    limiter = BudgetedRateLimiter(tmp_path / "ratelimit", 0, budget)
+    scraper = BangumiScraper(subject_cache_path=tmp_path / "bangumi_subject_cache.json", rate_limiter=limiter)
+    expanded = asyncio.run(crawl(scraper, state, HistoryManager(data_dir=tmp_path), limiter))
+    return expanded, scraper
+
+
+def _add_staff_pages(*subject_ids: str) -> None:
+    for subject_id in subject_ids:
+        responses.add(responses.GET, f"https://bangumi.tv/subject/{subject_id}/persons", body=STAFF_HTML)
+
+
+class TestDiscover:
+    @responses.activate
+    def test_監視対象の作品スタッフから共演者を順位付けする(self, tmp_path: Path) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_12345", [{"id": "100001"}, {"id": "100002"}])
+        _add_staff_pages("100001", "100002")
+        state = DiscoverState(tmp_path / "discover_state.json")
+        state.start(["12345"], max_depth=1, roles=[])
+
+        expanded, scraper = _run(tmp_path, state)
+
+        assert expanded == 1
+        assert not state.in_progress
+        assert rank_candidates(state, scraper, exclude={"12345"}) == [
+            {"person_id": "67890", "name": "別の人", "score": 2.0, "subjects": 2, "roles": ["監督"]},
+        ]
+
+    @responses.activate
+    def test_予算切れで中断したクロールは次回キャッシュを使って再開する(self, tmp_path: Path) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_12345", [{"id": "100001"}, {"id": "100002"}])
+        _add_staff_pages("100001", "100002")
+        state = DiscoverState(tmp_path / "discover_state.json")
+        state.start(["12345"], max_depth=1, roles=[])
+
+        with patch("animator_credit_monitor.discover.SUBJECT_BATCH", 1):
+            assert _run(tmp_path, state, budget=1)[0] == 0
+            resumed = DiscoverState(tmp_path / "discover_state.json")
+            assert resumed.frontier == [["12345", 0]]
+            assert _run(tmp_path, resumed, budget=1)[0] == 1
+
+        assert [call.request.url for call in responses.calls] == [
+            "https://bangumi.tv/subject/100001/persons",
+            "https://bangumi.tv/subject/100002/persons",
+        ]
+
+    @responses.activate
+    def test_深さ2では共演者の作品もたどり訪問済みの人は再訪しない(self, tmp_path: Path) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_12345", [{"id": "100001"}])
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/person/67890/works",
+            body=(FIXTURES_DIR / "bangumi_works.html").read_text(),
+        )
+        _add_staff_pages("100001", "100002", "100003")
+        state = DiscoverState(tmp_path / "discover_state.json")
+        state.start(["12345"], max_depth=2, roles=[])
+
+        expanded, _ = _run(tmp_path, state)
+
+        assert expanded == 2
+        assert state.visited == {"12345": 0, "67890": 1}
+        assert state.expanded["67890"] == {"depth": 1, "subjects": ["100001", "100002", "100003"]}
+        # 100001 のスタッフはキャッシュ済みなので、人物ページ1回と新しい作品2件だけ取得する
+        assert len(responses.calls) == 4
+
+    def test_役職の指定に一致するスタッフだけを候補にする(self, tmp_path: Path) -> None:
+        state = DiscoverState(tmp_path / "discover_state.json")
+        state.start(["1"], max_depth=1, roles=["原画"])
+        state.expanded = {"1": {"depth": 0, "subjects": ["100"]}}
+        scraper = BangumiScraper(request_interval=0)
+        staff = [
+            {"person_id": "2", "name": "A", "role": "原画", "episodes": ""},
+            {"person_id": "3", "name": "B", "role": "監督", "episodes": ""},
+        ]
+
+        with patch.object(scraper, "cached_subject_staff", return_value=staff):
+            candidates = rank_candidates(state, scraper, exclude={"1"})
+
+        assert [c["person_id"] for c in candidates] == ["2"]
@@ -0,0 +1,61 @@
+from pathlib import Path
+from xml.etree import ElementTree
+
+from animator_credit_monitor.feeds import ATOM_NS, FeedWriter, feed_slug
+
+NS = {"atom": ATOM_NS}
+
+
+def _entry_titles(path: Path) -> list[str]:
+    root = ElementTree.parse(path).getroot()
+    return [entry.findtext("atom:title", namespaces=NS) or "" for entry in root.findall("atom:entry", NS)]
+
+
+class TestFeedWriter:
+    def test_対象ごとのフィードと全体フィードに新しい順で書き出す(self, tmp_path: Path) -> None:
+        feeds = FeedWriter(tmp_path, max_entries=10)
+        feeds.add("アニメーターA", "Bangumi", [{"id": "1", "title": "作品X", "role": "原画", "info": "2026-01"}])
+        feeds.add("アニメーターB", "AniList", [{"id": "2", "title": "作品Y", "role": "作画監督", "date": "2026-02"}])
+
+        written = feeds.flush()
+
+        assert sorted(path.name for path in written) == [
+            "all.xml", "target_アニメーターA.xml", "target_アニメーターB.xml",
+        ]
+        assert _entry_titles(tmp_path / "all.xml") == ["アニメーターB: 作品Y [作画監督]", "アニメーターA: 作品X [原画]"]
+        assert _entry_titles(tmp_path / "target_アニメーターA.xml") == ["アニメーターA: 作品X [原画]"]
+
+    def test_件数の上限を超えた古いエントリは捨てられる(self, tmp_path: Path) -> None:
+        for run in range(3):
+            feeds = FeedWriter(tmp_path, max_entries=2)
+            feeds.add("A", "Bangumi", [{"id": str(run), "title": f"作品{run}"}])
+            feeds.flush()
+
+        assert _entry_titles(tmp_path / "all.xml") == ["A: 作品2", "A: 作品1"]
+
+    def test_新規エントリの無いフィードは書き換えない(self, tmp_path: Path) -> None:
+        feeds = FeedWriter(tmp_path)
+        feeds.add("A", "Bangumi", [{"id": "1", "title": "作品X"}])
+        feeds.add("B", "Bangumi", [{"id": "2", "title": "作品Y"}])
+        feeds.flush()
+        mtime = (tmp_path / "target_B.xml").stat().st_mtime_ns
+
+        feeds.add("A", "Bangumi", [{"id": "3", "title": "作品Z"}])
+        written = feeds.flush()
+
+        assert sorted(path.name for path in written) == ["all.xml", "target_A.xml"]
+        assert (tmp_path / "target_B.xml").stat().st_mtime_ns == mtime
+
+    def test_同じクレジットは重複して追加されない(self, tmp_path: Path) -> None:
+        feeds = FeedWriter(tmp_path)
+        item = {"id": "1", "title": "作品X", "role": "原画"}
+        feeds.add("A", "Bangumi", [item])
+        feeds.flush()
+        feeds.add("A", "Bangumi", [item])
+        feeds.flush()
+
+        assert len(_entry_titles(tmp_path / "target_A.xml")) == 1
+
+    def test_ファイル名に使えない文字は置き換える(self) -> None:
+        assert feed_slug("Bangumi 12345") == "target_Bangumi_12345"
+        assert feed_slug("a/b:c") == "target_a_b_c"
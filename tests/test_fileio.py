@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from animator_credit_monitor.fileio import load_json, write_atomic, write_json_atomic
+
+
+class TestAtomicWrite:
+    def test_一時ファイルを残さずに書き込む(self, tmp_path: Path) -> None:
+        path = tmp_path / "sub" / "state.json"
+
+        write_json_atomic(path, {"名前": [1, 2]})
+        write_atomic(path.with_name("raw.bin"), b"\x00\x01")
+
+        assert load_json(path, {}, "state") == {"名前": [1, 2]}
+        assert sorted(p.name for p in path.parent.iterdir()) == ["raw.bin", "state.json"]
+
+    def test_存在しないか壊れたファイルは既定値を返す(self, tmp_path: Path) -> None:
+        broken = tmp_path / "broken.json"
+        broken.write_text("{", encoding="utf-8")
+
+        assert load_json(tmp_path / "missing.json", [], "state") == []
+        assert load_json(broken, {"seen": {}}, "state") == {"seen": {}}
+        assert load_json(None, {}, "state") == {}
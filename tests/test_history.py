@@ -1,5 +1,9 @@
+import gzip
 import json
+from datetime import date
 from pathlib import Path
+from typing import Any
+from unittest.mock import patch
 
 import pytest
 
@@ -126,3 +130,96 @@ class TestHistoryManager:
 
         assert len(diff) == 1
         assert diff[0]["title"] == "作品Y"
+
+    def test_内容が変わらない場合はファイルを書き込まない(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir)
+        data = [{"id": "1", "title": "作品A"}]
+
+        manager.save("bangumi", data)
+
+        with patch.object(Path, "write_bytes") as mock_write:
+            manager.save("bangumi", data)
+            # 別プロセス相当（ハッシュ未保持）でも既存ファイルと比較してスキップする
+            HistoryManager(data_dir=tmp_data_dir).save("bangumi", [{"title": "作品A", "id": "1"}])
+
+        mock_write.assert_not_called()
+
+    def test_内容が変わった場合はファイルを書き込む(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir)
+        manager.save("bangumi", [{"id": "1", "title": "作品A"}])
+
+        manager.save("bangumi", [{"id": "1", "title": "作品A"}, {"id": "2", "title": "作品B"}])
+
+        assert len(HistoryManager(data_dir=tmp_data_dir).load("bangumi")) == 2
+
+    def test_gzip圧縮で保存したファイルを透過的に読み込める(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir, compression="gzip")
+        data = [{"id": "1", "title": "作品A", "role": "原画"}]
+
+        manager.save("bangumi", data)
+
+        file_path = tmp_data_dir / "bangumi_history.json.gz"
+        assert file_path.exists()
+        assert json.loads(gzip.decompress(file_path.read_bytes())) == data
+        # 圧縮設定なしのマネージャーでも読み込める
+        assert HistoryManager(data_dir=tmp_data_dir).load("bangumi") == data
+
+    def test_圧縮形式を切り替えると古い形式のファイルは削除される(self, tmp_data_dir: Path) -> None:
+        data = [{"id": "1", "title": "作品A"}]
+        HistoryManager(data_dir=tmp_data_dir).save("bangumi", data)
+
+        HistoryManager(data_dir=tmp_data_dir, compression="gzip").save("bangumi", data)
+
+        assert not (tmp_data_dir / "bangumi_history.json").exists()
+        assert (tmp_data_dir / "bangumi_history.json.gz").exists()
+
+    def test_未知の圧縮形式はエラーになる(self, tmp_data_dir: Path) -> None:
+        with pytest.raises(ValueError):
+            HistoryManager(data_dir=tmp_data_dir, compression="lz4")
+
+
+def _on(day: str) -> Any:
+    return patch("animator_credit_monitor.history._today", return_value=date.fromisoformat(day))
+
+
+class TestHistoryRetention:
+    def test_一部だけ取得できた場合も消えた項目は再通知されない(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir)
+        full = [{"id": "1", "title": "作品A"}, {"id": "2", "title": "作品B"}]
+        with _on("2026-01-01"):
+            manager.save("bangumi", full)
+        with _on("2026-01-02"):
+            manager.save("bangumi", full[:1])
+        with _on("2026-01-03"):
+            diff = manager.detect_diff("bangumi", full)
+
+        assert diff == []
+        assert manager.load("bangumi") == full
+
+    def test_猶予期間を過ぎた項目は削除され墓標で再通知を防ぐ(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir, grace_days=7, tombstone_days=30)
+        item_a, item_b = {"id": "1", "title": "作品A"}, {"id": "2", "title": "作品B"}
+        with _on("2026-01-01"):
+            manager.save("bangumi", [item_a, item_b])
+        with _on("2026-01-10"):
+            manager.save("bangumi", [item_a])
+
+            assert manager.load("bangumi") == [item_a]
+            assert manager.detect_diff("bangumi", [item_a, item_b]) == []
+
+        with _on("2026-02-15"):
+            manager.save("bangumi", [item_a])
+            # 墓標の保持期間も過ぎたので、再び現れれば新規として扱う
+            assert manager.detect_diff("bangumi", [item_a, item_b]) == [item_b]
+
+    def test_compactは取得なしで猶予切れの項目を削除する(self, tmp_data_dir: Path) -> None:
+        manager = HistoryManager(data_dir=tmp_data_dir, grace_days=7)
+        with _on("2026-01-01"):
+            manager.save("bangumi", [{"id": "1", "title": "作品A"}])
+        with _on("2026-01-05"):
+            manager.compact("bangumi")
+            assert len(manager.load("bangumi")) == 1
+        with _on("2026-01-09"):
+            manager.compact("bangumi")
+            assert manager.load("bangumi") == []
+            assert manager.detect_diff("bangumi", [{"id": "1", "title": "作品A"}]) == []
@@ -0,0 +1,51 @@
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from animator_credit_monitor.identity import IdentityCache
+
+
+class TestIdentityCache:
+    def test_未解決の名前はNoneを返し再検証が必要になる(self, tmp_path: Path) -> None:
+        cache = IdentityCache(tmp_path / "identity_cache.json")
+
+        assert cache.get("anilist", "テスト") is None
+        assert cache.needs_revalidation("anilist", "テスト")
+
+    def test_解決したIDは別インスタンスからも読み込める(self, tmp_path: Path) -> None:
+        IdentityCache(tmp_path / "identity_cache.json").set("anilist", "テスト", "12345")
+
+        cache = IdentityCache(tmp_path / "identity_cache.json")
+
+        assert cache.get("anilist", "テスト") == "12345"
+        assert not cache.needs_revalidation("anilist", "テスト")
+        assert cache.get("bangumi", "テスト") is None
+
+    def test_TTLを過ぎたエントリは再検証が必要だがIDは保持される(self, tmp_path: Path) -> None:
+        cache = IdentityCache(tmp_path / "identity_cache.json", ttl_days=1)
+        cache.set("anilist", "テスト", "12345")
+
+        with patch("animator_credit_monitor.identity.time.time", return_value=time.time() + 2 * 86400):
+            assert cache.needs_revalidation("anilist", "テスト")
+            assert cache.get("anilist", "テスト") == "12345"
+
+    def test_forgetでエントリが削除される(self, tmp_path: Path) -> None:
+        cache = IdentityCache(tmp_path / "identity_cache.json")
+        cache.set("anilist", "テスト", "12345")
+
+        cache.forget("anilist", "テスト")
+
+        assert IdentityCache(tmp_path / "identity_cache.json").get("anilist", "テスト") is None
+
+    def test_同じファイルを共有する別インスタンスの変更を上書きしない(self, tmp_path: Path) -> None:
+        path = tmp_path / "identity_cache.json"
+        first = IdentityCache(path)
+        second = IdentityCache(path)
+
+        first.set("anilist", "A", "1")
+        second.set("anilist", "B", "2")
+        first.forget("anilist", "A")
+
+        reloaded = IdentityCache(path)
+        assert reloaded.get("anilist", "A") is None
+        assert reloaded.get("anilist", "B") == "2"
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from animator_credit_monitor.locks import FileLock
+
+
+class TestFileLock:
+    def test_保持中のロックは別のハンドルから取得できない(self, tmp_path: Path) -> None:
+        first = FileLock(tmp_path / "locks" / "bangumi_1.lock")
+        second = FileLock(tmp_path / "locks" / "bangumi_1.lock")
+
+        assert first.acquire(blocking=False)
+        assert not second.acquire(blocking=False)
+
+        first.release()
+        assert second.acquire(blocking=False)
+        second.release()
+
+    def test_withブロックを抜けると解放される(self, tmp_path: Path) -> None:
+        with FileLock(tmp_path / "a.lock") as lock:
+            assert lock.locked
+        assert not lock.locked
+        assert FileLock(tmp_path / "a.lock").acquire(blocking=False)
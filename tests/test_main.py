@@ -1,10 +1,18 @@
+import asyncio
+import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+import responses
 from click.testing import CliRunner
 
+from animator_credit_monitor.archive import ResponseArchive
+from animator_credit_monitor.bootstrap import BootstrapState
+from animator_credit_monitor.history import HistoryManager
+from animator_credit_monitor.identity import IdentityCache
 from animator_credit_monitor.main import cli
+from animator_credit_monitor.ratelimit import SharedHostRateLimiter
 
 
 @pytest.fixture
@@ -25,9 +33,9 @@ class TestCLI:
         assert result.exit_code != 0
         assert "TARGET_BANGUMI_ID" in result.output or "設定" in result.output
 
-    @patch("animator_credit_monitor.main.AniListScraper")
-    @patch("animator_credit_monitor.main.SakugaWikiScraper")
-    @patch("animator_credit_monitor.main.BangumiScraper")
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
     @patch("animator_credit_monitor.main.HistoryManager")
     def test_差分がある場合に通知が呼ばれる(
         self,
@@ -42,13 +50,15 @@ class TestCLI:
         mock_history.detect_diff.return_value = [{"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"}]
 
         mock_bangumi = mock_bangumi_cls.return_value
-        mock_bangumi.fetch_works.return_value = [{"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"}]
+        mock_bangumi.fetch_works_async.return_value = [
+            {"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"},
+        ]
 
         mock_wiki = mock_wiki_cls.return_value
-        mock_wiki.search.return_value = []
+        mock_wiki.search_async.return_value = []
 
         mock_anilist = mock_anilist_cls.return_value
-        mock_anilist.fetch_works.return_value = []
+        mock_anilist.fetch_works_async.return_value = []
 
         env = {
             "TARGET_BANGUMI_ID": "12345",
@@ -56,14 +66,38 @@ class TestCLI:
             "DATA_DIR": str(tmp_path),
         }
         with patch.dict("os.environ", env, clear=True):
-            result = runner.invoke(cli, ["check"])
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
 
         assert result.exit_code == 0
         assert "新作品" in result.output
 
-    @patch("animator_credit_monitor.main.AniListScraper")
-    @patch("animator_credit_monitor.main.SakugaWikiScraper")
-    @patch("animator_credit_monitor.main.BangumiScraper")
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_AniListへのリクエストも実行間で共有される間隔で制限される(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        mock_wiki_cls.return_value.search_async.return_value = []
+        mock_anilist_cls.return_value.fetch_works_async.return_value = []
+
+        with patch.dict("os.environ", {"TARGET_NAME": "テスト", "DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+
+        assert result.exit_code == 0
+        limiter = mock_anilist_cls.call_args.kwargs["rate_limiter"]
+        assert isinstance(limiter, SharedHostRateLimiter)
+        assert limiter.reserve("https://graphql.anilist.co") == 0
+        assert limiter.reserve("https://graphql.anilist.co") > 0
+        assert (tmp_path / "ratelimit" / "graphql.anilist.co.json").exists()
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
     @patch("animator_credit_monitor.main.HistoryManager")
     def test_差分がない場合は通知が呼ばれない(
         self,
@@ -78,13 +112,13 @@ class TestCLI:
         mock_history.detect_diff.return_value = []
 
         mock_bangumi = mock_bangumi_cls.return_value
-        mock_bangumi.fetch_works.return_value = [{"id": "1", "title": "既存作品"}]
+        mock_bangumi.fetch_works_async.return_value = [{"id": "1", "title": "既存作品"}]
 
         mock_wiki = mock_wiki_cls.return_value
-        mock_wiki.search.return_value = []
+        mock_wiki.search_async.return_value = []
 
         mock_anilist = mock_anilist_cls.return_value
-        mock_anilist.fetch_works.return_value = []
+        mock_anilist.fetch_works_async.return_value = []
 
         env = {
             "TARGET_BANGUMI_ID": "12345",
@@ -92,14 +126,15 @@ class TestCLI:
             "DATA_DIR": str(tmp_path),
         }
         with patch.dict("os.environ", env, clear=True):
-            result = runner.invoke(cli, ["check"])
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
 
         assert result.exit_code == 0
+        mock_history.detect_diff.assert_any_call("bangumi_12345", [{"id": "1", "title": "既存作品"}])
         assert "新しいクレジット" not in result.output
 
-    @patch("animator_credit_monitor.main.AniListScraper")
-    @patch("animator_credit_monitor.main.SakugaWikiScraper")
-    @patch("animator_credit_monitor.main.BangumiScraper")
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
     @patch("animator_credit_monitor.main.HistoryManager")
     def test_dry_runオプションで状態が保存されない(
         self,
@@ -114,13 +149,15 @@ class TestCLI:
         mock_history.detect_diff.return_value = [{"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"}]
 
         mock_bangumi = mock_bangumi_cls.return_value
-        mock_bangumi.fetch_works.return_value = [{"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"}]
+        mock_bangumi.fetch_works_async.return_value = [
+            {"id": "1", "title": "新作品", "role": "原画", "info": "2026-01"},
+        ]
 
         mock_wiki = mock_wiki_cls.return_value
-        mock_wiki.search.return_value = []
+        mock_wiki.search_async.return_value = []
 
         mock_anilist = mock_anilist_cls.return_value
-        mock_anilist.fetch_works.return_value = []
+        mock_anilist.fetch_works_async.return_value = []
 
         env = {
             "TARGET_BANGUMI_ID": "12345",
@@ -128,14 +165,15 @@ class TestCLI:
             "DATA_DIR": str(tmp_path),
         }
         with patch.dict("os.environ", env, clear=True):
-            result = runner.invoke(cli, ["check", "--dry-run"])
+            result = runner.invoke(cli, ["check", "--dry-run", "--include-unseeded"])
 
         assert result.exit_code == 0
+        assert "新作品" in result.output
         mock_history.save.assert_not_called()
 
-    @patch("animator_credit_monitor.main.AniListScraper")
-    @patch("animator_credit_monitor.main.SakugaWikiScraper")
-    @patch("animator_credit_monitor.main.BangumiScraper")
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
     @patch("animator_credit_monitor.main.HistoryManager")
     def test_bangumi_onlyオプションでwikiとAniListがスキップされる(
         self,
@@ -150,7 +188,7 @@ class TestCLI:
         mock_history.detect_diff.return_value = []
 
         mock_bangumi = mock_bangumi_cls.return_value
-        mock_bangumi.fetch_works.return_value = []
+        mock_bangumi.fetch_works_async.return_value = []
 
         env = {
             "TARGET_BANGUMI_ID": "12345",
@@ -158,15 +196,15 @@ class TestCLI:
             "DATA_DIR": str(tmp_path),
         }
         with patch.dict("os.environ", env, clear=True):
-            result = runner.invoke(cli, ["check", "--bangumi-only"])
+            result = runner.invoke(cli, ["check", "--include-unseeded", "--bangumi-only"])
 
         assert result.exit_code == 0
-        mock_wiki_cls.return_value.search.assert_not_called()
-        mock_anilist_cls.return_value.fetch_works.assert_not_called()
+        mock_wiki_cls.return_value.search_async.assert_not_called()
+        mock_anilist_cls.return_value.fetch_works_async.assert_not_called()
 
-    @patch("animator_credit_monitor.main.AniListScraper")
-    @patch("animator_credit_monitor.main.SakugaWikiScraper")
-    @patch("animator_credit_monitor.main.BangumiScraper")
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
     @patch("animator_credit_monitor.main.HistoryManager")
     def test_作画wiki失敗時にAniListにフォールバックする(
         self,
@@ -185,13 +223,13 @@ class TestCLI:
         mock_history.detect_diff.return_value = [anilist_item]
 
         mock_bangumi = mock_bangumi_cls.return_value
-        mock_bangumi.fetch_works.return_value = []
+        mock_bangumi.fetch_works_async.return_value = []
 
         mock_wiki = mock_wiki_cls.return_value
-        mock_wiki.search.return_value = []  # wiki fails
+        mock_wiki.search_async.return_value = []  # wiki fails
 
         mock_anilist = mock_anilist_cls.return_value
-        mock_anilist.fetch_works.return_value = [anilist_item]
+        mock_anilist.fetch_works_async.return_value = [anilist_item]
 
         env = {
             "TARGET_BANGUMI_ID": "",
@@ -199,9 +237,611 @@ class TestCLI:
             "DATA_DIR": str(tmp_path),
         }
         with patch.dict("os.environ", env, clear=True):
-            result = runner.invoke(cli, ["check"])
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
 
         assert result.exit_code == 0
         assert "AniList作品" in result.output
         assert "falling back to AniList" in result.output
-        mock_anilist.fetch_works.assert_called_once_with("テスト")
+        mock_anilist.fetch_works_async.assert_called_once_with("テスト")
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_reparseコマンドでアーカイブから履歴を再構築する(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        archive = ResponseArchive(tmp_path / "archive")
+        archive.store(
+            "bangumi_works",
+            "bangumi_12345",
+            "https://bangumi.tv/person/12345/works",
+            (Path(__file__).parent / "fixtures" / "bangumi_works.html").read_text(),
+        )
+
+        with patch.dict("os.environ", {"DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["reparse", "--workers", "1"])
+
+        assert result.exit_code == 0
+        assert "bangumi_12345: 3 items" in result.output
+        assert len(HistoryManager(data_dir=tmp_path).load("bangumi_12345")) == 3
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_HISTORY_COMPRESSIONが不正な場合はエラー終了する(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        env = {"HISTORY_COMPRESSION": "lz4", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["compact"])
+
+        assert result.exit_code == 1
+        assert "Error: HISTORY_COMPRESSION must be empty or one of gzip, zstd, not 'lz4'" in result.output
+        assert isinstance(result.exception, SystemExit)
+
+    @pytest.mark.parametrize(("name", "value", "message"), [
+        ("MAX_RESPONSE_BYTES", "5MB", "MAX_RESPONSE_BYTES must be a whole number of at least 1, not '5MB'"),
+        ("PARSE_WORKERS", "-1", "PARSE_WORKERS must be a whole number of at least 0, not '-1'"),
+        ("DIGEST_WINDOW_MINUTES", "1h", "DIGEST_WINDOW_MINUTES must be a number, not '1h'"),
+        ("FEED_ENTRIES", "many", "FEED_ENTRIES must be a whole number, not 'many'"),
+        ("SMTP_PORT", "smtp", "SMTP_PORT must be a whole number of at least 1, not 'smtp'"),
+    ])
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_数値の設定が不正な場合はエラー終了する(
+        self,
+        mock_bangumi_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+        name: str,
+        value: str,
+        message: str,
+    ) -> None:
+        mock_bangumi_cls.return_value.fetch_works_async.return_value = []
+        env = {"TARGET_BANGUMI_ID": "1", "SMTP_HOST": "localhost", "DATA_DIR": str(tmp_path), name: value}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+
+        assert result.exit_code == 1
+        assert f"Error: {message}" in result.output
+        assert isinstance(result.exception, SystemExit)
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_reparseは別の実行がロック中の履歴を上書きしない(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        ResponseArchive(tmp_path / "archive").store(
+            "bangumi_works",
+            "bangumi_12345",
+            "https://bangumi.tv/person/12345/works",
+            (Path(__file__).parent / "fixtures" / "bangumi_works.html").read_text(),
+        )
+        lock = HistoryManager(data_dir=tmp_path).lock("bangumi_12345")
+        assert lock.acquire(blocking=False)
+
+        with patch.dict("os.environ", {"DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["reparse", "--workers", "1"])
+        lock.release()
+
+        assert result.exit_code == 0
+        assert "Skipping bangumi_12345: another run holds it." in result.output
+        assert HistoryManager(data_dir=tmp_path).load("bangumi_12345") == []
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_作画wiki検索成功時はページ本文のクレジットも差分検知される(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        search_results = [{"title": "テスト作品A（TV）", "url": "https://w.atwiki.jp/sakuga/pages/101.html"}]
+        mock_wiki = mock_wiki_cls.return_value
+        mock_wiki.search_async.return_value = search_results
+        mock_wiki.fetch_credits_async.return_value = [{
+            "title": "テスト作品A（TV）", "url": search_results[0]["url"],
+            "episode": "2", "role": "総作画監督", "line": "第2話 総作画監督：テスト",
+        }]
+
+        env = {"TARGET_NAME": "テスト", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+
+        assert result.exit_code == 0
+        assert "第2話 [総作画監督]" in result.output
+        mock_wiki.fetch_credits_async.assert_called_once_with("テスト", search_results)
+        assert len(HistoryManager(data_dir=tmp_path).load("sakugawiki_credits_テスト")) == 1
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_ウォッチリストの複数対象の新規クレジットがダイジェスト1通にまとまる(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(
+            json.dumps([{"name": "アニメーターA", "bangumi_id": "1"}, {"name": "アニメーターB", "bangumi_id": "2"}]),
+            encoding="utf-8",
+        )
+        mock_bangumi_cls.return_value.fetch_works_async.side_effect = [
+            [{"id": "10", "title": "作品X", "role": "原画", "info": "2026-01"}],
+            [{"id": "20", "title": "作品Y", "role": "作画監督", "info": "2026-01"}],
+        ]
+        mock_wiki_cls.return_value.search_async.return_value = []
+        mock_anilist_cls.return_value.fetch_works_async.side_effect = [
+            [{"id": "100", "title": "作品X", "role": "原画 (ep 1)", "date": "2026-01"}],
+            [],
+        ]
+
+        env = {"WATCHLIST_FILE": str(watchlist), "DIGEST_WINDOW_MINUTES": "1e-9", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+
+        assert result.exit_code == 0
+        assert result.output.count("[新しいクレジット") == 1
+        assert "新しいクレジット まとめ (2件)" in result.output
+        assert "  - 作品X [原画] (Bangumi)" in result.output
+        assert "1 credits from AniList already reported by another source." in result.output
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_別ソースで通知済みの作品は次回実行時にも再通知されない(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        HistoryManager(data_dir=tmp_path).save(
+            "bangumi_1",
+            [{"id": "10", "title": "ウマ娘 シンデレラグレイ", "title_cn": "赛马娘", "role": "原画", "info": "2025-04"}],
+        )
+        mock_bangumi_cls.return_value.fetch_works_async.return_value = []
+        mock_wiki_cls.return_value.search_async.return_value = []
+        mock_anilist_cls.return_value.fetch_works_async.return_value = [
+            {"id": "180516", "title": "ウマ娘　シンデレラグレイ", "title_romaji": "Uma Musume: Cinderella Gray",
+             "role": "原画 (OP)", "date": "2025-04"},
+            {"id": "200000", "title": "新作アニメ", "title_romaji": "Shinsaku", "role": "原画", "date": "2026-01"},
+        ]
+
+        env = {"TARGET_BANGUMI_ID": "1", "TARGET_NAME": "テスト", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check"])
+
+        assert result.exit_code == 0
+        assert "新作アニメ" in result.output
+        assert "シンデレラグレイ [" not in result.output
+        assert len(HistoryManager(data_dir=tmp_path).load("anilist_テスト")) == 2
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_別ソースで通知済みの作品でも役職が違えば通知される(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        history = HistoryManager(data_dir=tmp_path)
+        history.save("bangumi_1", [{"id": "1", "title": "既存作品", "role": "原画", "info": "2020-01"}])
+        history.save("anilist_テスト", [{"id": "100", "title": "作品X", "role": "原画 (ep 1)", "date": "2026-01"}])
+        mock_bangumi_cls.return_value.fetch_works_async.return_value = [
+            {"id": "1", "title": "既存作品", "role": "原画", "info": "2020-01"},
+            {"id": "10", "title": "作品X", "role": "作画监督", "info": "2026-01"},
+            {"id": "10", "title": "作品X", "role": "原画", "info": "2026-01"},
+        ]
+        mock_wiki_cls.return_value.search_async.return_value = []
+        mock_anilist_cls.return_value.fetch_works_async.return_value = [
+            {"id": "100", "title": "作品X", "role": "原画 (ep 1)", "date": "2026-01"},
+        ]
+
+        env = {"TARGET_BANGUMI_ID": "1", "TARGET_NAME": "テスト", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check"])
+
+        assert result.exit_code == 0
+        assert "作画监督" in result.output
+        assert "1 credits from Bangumi already reported by another source." in result.output
+
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_FEED_ENTRIES指定時は新規クレジットをフィードに追記する(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        mock_bangumi_cls.return_value.fetch_works_async.return_value = [
+            {"id": "10", "title": "作品X", "role": "原画", "info": "2026-01"},
+        ]
+        mock_wiki_cls.return_value.search_async.return_value = []
+
+        env = {"TARGET_BANGUMI_ID": "1", "FEED_ENTRIES": "10", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded", "--bangumi-only"])
+
+        assert result.exit_code == 0
+        assert "作品X" in (tmp_path / "feeds" / "all.xml").read_text(encoding="utf-8")
+        assert (tmp_path / "feeds" / "target_Bangumi_1.xml").exists()
+
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_shard指定時は担当の対象だけをチェックする(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        targets = [{"bangumi_id": str(i)} for i in range(1, 9)]
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps(targets), encoding="utf-8")
+        mock_bangumi_cls.return_value.fetch_works_async.return_value = []
+
+        checked: list[str] = []
+        env = {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}
+        for shard in ("1/2", "2/2"):
+            with patch.dict("os.environ", env, clear=True):
+                result = runner.invoke(cli, ["check", "--include-unseeded", "--shard", shard])
+            assert result.exit_code == 0
+            checked.extend(call.args[0] for call in mock_bangumi_cls.return_value.fetch_works_async.call_args_list)
+            mock_bangumi_cls.return_value.fetch_works_async.reset_mock()
+
+        assert sorted(checked, key=int) == [str(i) for i in range(1, 9)]
+
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_複数対象は並行してチェックされ1件の失敗で止まらない(
+        self,
+        mock_bangumi_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps([{"bangumi_id": "1"}, {"bangumi_id": "2"}, {"bangumi_id": "3"}]))
+        second_started = asyncio.Event()
+
+        async def fetch_works(person_id: str) -> list[dict]:
+            if person_id == "1":
+                # Only finishes if target 2 is fetched while target 1 is still waiting
+                await asyncio.wait_for(second_started.wait(), timeout=2)
+            elif person_id == "2":
+                second_started.set()
+            else:
+                raise RuntimeError("broken page")
+            return [{"id": f"{person_id}0", "title": f"作品{person_id}", "role": "原画", "info": "2026-01"}]
+
+        mock_bangumi_cls.return_value.fetch_works_async.side_effect = fetch_works
+
+        env = {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded", "--bangumi-only"])
+
+        assert result.exit_code == 0
+        assert "作品1" in result.output
+        assert "作品2" in result.output
+        assert HistoryManager(data_dir=tmp_path).sources() == ["bangumi_1", "bangumi_2"]
+        mock_bangumi_cls.return_value.close.assert_called_once()
+
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_別の実行がロック中の対象はスキップする(
+        self,
+        mock_bangumi_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        lock = HistoryManager(data_dir=tmp_path).lock("bangumi_1")
+        assert lock.acquire(blocking=False)
+
+        with patch.dict("os.environ", {"TARGET_BANGUMI_ID": "1", "DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+        lock.release()
+
+        assert result.exit_code == 0
+        assert "Skipping Bangumi 1: already being checked by another run." in result.output
+        mock_bangumi_cls.return_value.fetch_works_async.assert_not_called()
+
+    @patch("animator_credit_monitor.main.MAX_CONCURRENT_TARGETS", 1)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_チェックが終わった対象のロックはすぐに解放される(
+        self,
+        mock_bangumi_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps([{"bangumi_id": "1"}, {"bangumi_id": "2"}]))
+        first_lock_free: list[bool] = []
+
+        async def fetch_works(person_id: str) -> list[dict]:
+            if person_id == "2":
+                lock = HistoryManager(data_dir=tmp_path).lock("bangumi_1")
+                first_lock_free.append(lock.acquire(blocking=False))
+                lock.release()
+            return []
+
+        mock_bangumi_cls.return_value.fetch_works_async.side_effect = fetch_works
+
+        env = {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--include-unseeded", "--bangumi-only"])
+
+        assert result.exit_code == 0
+        assert first_lock_free == [True]
+
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_ロックを取れない対象はエラーにせずスキップする(
+        self,
+        mock_bangumi_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        with (
+            patch.dict("os.environ", {"TARGET_BANGUMI_ID": "1", "DATA_DIR": str(tmp_path)}, clear=True),
+            patch("animator_credit_monitor.main.HistoryManager.lock") as mock_lock,
+        ):
+            mock_lock.return_value.acquire.side_effect = OSError(24, "Too many open files")
+            result = runner.invoke(cli, ["check", "--include-unseeded"])
+
+        assert result.exit_code == 0
+        assert "Skipping Bangumi 1: could not lock bangumi_1: " in result.output
+        mock_bangumi_cls.return_value.fetch_works_async.assert_not_called()
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_bootstrapは新しい対象だけ通知せずに履歴を作る(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps([{"bangumi_id": "1"}, {"name": "新人"}]), encoding="utf-8")
+        HistoryManager(data_dir=tmp_path).save("bangumi_1", [{"id": "10", "title": "既存作品"}])
+        mock_wiki_cls.return_value.search.return_value = []
+        mock_anilist_cls.return_value.fetch_works.return_value = [{"id": "100", "title": "作品", "role": "原画"}]
+
+        with patch.dict("os.environ", {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["bootstrap"])
+
+        assert result.exit_code == 0
+        assert "Seeded 新人: AniList 1" in result.output
+        assert "新しいクレジット" not in result.output
+        mock_bangumi_cls.return_value.fetch_works.assert_not_called()
+        assert len(HistoryManager(data_dir=tmp_path).load("anilist_新人")) == 1
+
+        with patch.dict("os.environ", {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["bootstrap"])
+        assert "All targets already have history." in result.output
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_bootstrapは一部のソースしか取れなかった対象を次回やり直す(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        env = {"TARGET_BANGUMI_ID": "1", "TARGET_NAME": "新人", "DATA_DIR": str(tmp_path)}
+        mock_bangumi_cls.return_value.fetch_works.return_value = [{"id": "10", "title": "作品"}]
+        mock_wiki_cls.return_value.search.return_value = []
+        mock_anilist_cls.return_value.fetch_works.return_value = []
+
+        with patch.dict("os.environ", env, clear=True):
+            first = runner.invoke(cli, ["bootstrap"])
+
+        assert "Partly seeded 新人: Bangumi 1; the other sources will be retried next run." in first.output
+        assert BootstrapState(tmp_path / "bootstrap_state.json").in_progress("name:新人")
+
+        mock_anilist_cls.return_value.fetch_works.return_value = [{"id": "100", "title": "作品", "role": "原画"}]
+        with patch.dict("os.environ", env, clear=True):
+            second = runner.invoke(cli, ["bootstrap"])
+
+        assert "Seeded 新人: Bangumi 1, AniList 1" in second.output
+        assert not BootstrapState(tmp_path / "bootstrap_state.json").in_progress("name:新人")
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_bootstrapはリクエスト予算を使い切ると次回に持ち越す(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps([{"bangumi_id": str(i)} for i in range(1, 4)]), encoding="utf-8")
+
+        def fetch_works(person_id: str) -> list[dict]:
+            limiter = mock_bangumi_cls.call_args.kwargs["rate_limiter"]
+            limiter.reserve(f"https://bangumi.tv/person/{person_id}/works")
+            limiter.reserve(f"https://bangumi.tv/person/{person_id}/works?page=2")
+            return [{"id": person_id, "title": f"作品{person_id}"}]
+
+        mock_bangumi_cls.return_value.fetch_works.side_effect = fetch_works
+        env = {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}
+
+        with patch.dict("os.environ", env, clear=True):
+            first = runner.invoke(cli, ["bootstrap", "--budget", "3", "--interval", "0"])
+        with patch.dict("os.environ", env, clear=True):
+            second = runner.invoke(cli, ["bootstrap", "--budget", "3", "--interval", "0"])
+
+        assert "Request budget of 3 spent; 1 targets left for the next run." in first.output
+        assert "Seeded 2 targets with 4 requests." in first.output
+        assert "Seeded 1 targets with 2 requests." in second.output
+        assert HistoryManager(data_dir=tmp_path).sources() == ["bangumi_1", "bangumi_2", "bangumi_3"]
+
+    @patch("animator_credit_monitor.main.AniListScraper", autospec=True)
+    @patch("animator_credit_monitor.main.SakugaWikiScraper", autospec=True)
+    @patch("animator_credit_monitor.main.BangumiScraper", autospec=True)
+    def test_bootstrapが終わっていない対象はcheckで通知されない(
+        self,
+        mock_bangumi_cls: MagicMock,
+        mock_wiki_cls: MagicMock,
+        mock_anilist_cls: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        watchlist = tmp_path / "watchlist.json"
+        watchlist.write_text(json.dumps([{"bangumi_id": str(i)} for i in range(1, 4)]), encoding="utf-8")
+
+        def seed_works(person_id: str) -> list[dict]:
+            limiter = mock_bangumi_cls.call_args.kwargs["rate_limiter"]
+            limiter.reserve(f"https://bangumi.tv/person/{person_id}/works")
+            limiter.reserve(f"https://bangumi.tv/person/{person_id}/works?page=2")
+            return [{"id": person_id, "title": f"旧作{person_id}"}]
+
+        env = {"WATCHLIST_FILE": str(watchlist), "DATA_DIR": str(tmp_path)}
+        mock_bangumi_cls.return_value.fetch_works.side_effect = seed_works
+        with patch.dict("os.environ", env, clear=True):
+            runner.invoke(cli, ["bootstrap", "--budget", "3", "--interval", "0"])
+        # 対象2のシード中に中断された状態を再現する
+        BootstrapState(tmp_path / "bootstrap_state.json").start("bangumi:2")
+
+        mock_bangumi_cls.return_value.fetch_works_async.side_effect = lambda person_id: [
+            {"id": person_id, "title": f"旧作{person_id}"},
+            {"id": f"{person_id}0", "title": f"新作{person_id}"},
+        ]
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["check", "--bangumi-only"])
+
+        assert result.exit_code == 0
+        assert "Skipping Bangumi 2: no history yet." in result.output
+        assert "Skipping Bangumi 3: no history yet." in result.output
+        assert "新作1" in result.output
+        assert "新作2" not in result.output
+        assert "旧作3" not in result.output
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_searchコマンドは既存の履歴からインデックスを作って検索する(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_12345", [
+            {"id": "1", "title": "進撃の巨人", "title_cn": "进击的巨人", "role": "原画", "info": "2013-04-07"},
+            {"id": "2", "title": "鬼滅の刃", "title_cn": "鬼灭之刃", "role": "作画監督", "info": "2019-04-06"},
+        ])
+
+        with patch.dict("os.environ", {"DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["search", "作画監督"])
+
+        assert result.exit_code == 0
+        assert "[bangumi_12345] 鬼灭之刃 / 作画監督 (2019-04-06)" in result.output
+        assert "进击的巨人" not in result.output
+        assert (tmp_path / "search_index.sqlite3").exists()
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_searchコマンドは変更のない履歴を読み直さない(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_1", [{"id": "1", "title": "作品A", "role": "原画"}])
+        HistoryManager(data_dir=tmp_path).save("bangumi_2", [{"id": "2", "title": "作品B", "role": "原画"}])
+
+        with patch.dict("os.environ", {"DATA_DIR": str(tmp_path)}, clear=True):
+            runner.invoke(cli, ["search", "原画"])
+            HistoryManager(data_dir=tmp_path).save("bangumi_2", [{"id": "3", "title": "作品C", "role": "原画"}])
+            with patch.object(HistoryManager, "load", autospec=True, side_effect=HistoryManager.load) as mock_load:
+                result = runner.invoke(cli, ["search", "原画"])
+
+        assert result.exit_code == 0
+        assert [call.args[1] for call in mock_load.call_args_list] == ["bangumi_2"]
+        assert "作品C" in result.output
+
+    @patch("animator_credit_monitor.main.make_server")
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_serveは履歴を監視対象のラベルでまとめる(
+        self,
+        mock_dotenv: MagicMock,
+        mock_make_server: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        history = HistoryManager(data_dir=tmp_path)
+        history.save("bangumi_1", [{"id": "1", "title": "作品A"}])
+        history.save("anilist_名前", [{"id": "2", "title": "作品B"}])
+        history.save("bangumi_2", [{"id": "3", "title": "作品C"}])
+        IdentityCache(tmp_path / "identity_cache.json").set("bangumi", "名前", "1")
+        mock_make_server.return_value.server_port = 8080
+
+        env = {"TARGET_NAME": "名前", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["serve"])
+
+        assert result.exit_code == 0
+        store = mock_make_server.call_args.args[0]
+        assert store.targets() == [
+            {"target": "2", "sources": {"bangumi": 1}},
+            {"target": "名前", "sources": {"bangumi": 1, "anilist": 1}},
+        ]
+
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_compactコマンドは全履歴に保持期間を適用する(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_1", [{"id": "1", "title": "作品A"}])
+        seen_path = tmp_path / "bangumi_1_history.seen.json"
+        seen = json.loads(seen_path.read_text(encoding="utf-8"))
+        seen["seen"] = {key: "2000-01-01" for key in seen["seen"]}
+        seen_path.write_text(json.dumps(seen), encoding="utf-8")
+
+        with patch.dict("os.environ", {"DATA_DIR": str(tmp_path)}, clear=True):
+            result = runner.invoke(cli, ["compact"])
+
+        assert result.exit_code == 0
+        assert "Compacted 1 histories." in result.output
+        assert HistoryManager(data_dir=tmp_path).load("bangumi_1") == []
+
+    @responses.activate
+    @patch("animator_credit_monitor.main.load_dotenv")
+    def test_discoverコマンドは共演者の候補を表示する(
+        self,
+        mock_dotenv: MagicMock,
+        runner: CliRunner,
+        tmp_path: Path,
+    ) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_12345", [{"id": "100001"}])
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/subject/100001/persons",
+            body=(Path(__file__).parent / "fixtures" / "bangumi_subject_persons.html").read_text(),
+        )
+
+        env = {"TARGET_BANGUMI_ID": "12345", "DATA_DIR": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            result = runner.invoke(cli, ["discover", "--interval", "0"])
+
+        assert result.exit_code == 0
+        assert "Expanded 1 persons with 1 requests." in result.output
+        assert "別の人 (bangumi 67890): 1 subjects, 監督" in result.output
@@ -0,0 +1,79 @@
+from animator_credit_monitor.matching import WorkIndex, normalize_roles, normalize_title, title_ngrams
+
+
+class TestNormalizeTitle:
+    def test_全角半角と記号と空白の違いを吸収する(self) -> None:
+        assert normalize_title("ウマ娘 シンデレラグレイ") == normalize_title("ウマ娘　シンデレラグレイ！")
+        assert normalize_title("Ｔｅｓｔ Anime") == "testanime"
+
+    def test_末尾の媒体表記を取り除く(self) -> None:
+        assert normalize_title("テスト作品A（TV）") == normalize_title("テスト作品A")
+        assert normalize_title("テスト作品B (劇場版)") == "テスト作品b"
+
+    def test_短いタイトルのngramはタイトル全体になる(self) -> None:
+        assert title_ngrams("a") == {"a"}
+        assert title_ngrams("") == set()
+        assert title_ngrams("abc") == {"ab", "bc"}
+
+
+class TestNormalizeRoles:
+    def test_BangumiとAniListの役職表記をそろえる(self) -> None:
+        assert normalize_roles("作画监督") == normalize_roles("作画監督 (ep 3)") == {"作画監督"}
+        assert normalize_roles("Key Animation") == {"原画"}
+        assert normalize_roles("原画 / 分镜") == {"原画", "絵コンテ"}
+        assert normalize_roles("") == set()
+
+
+class TestWorkIndex:
+    def test_BangumiとAniListと作画wikiの同じ作品が1つに統合される(self) -> None:
+        index = WorkIndex()
+        bangumi = index.add("Bangumi", {
+            "title": "ウマ娘 シンデレラグレイ", "title_cn": "赛马娘 灰姑娘格雷", "info": "2025-04",
+        })
+        anilist = index.add("AniList", {
+            "title": "ウマ娘　シンデレラグレイ", "title_romaji": "Uma Musume: Cinderella Gray", "date": "2025-04",
+        })
+        wiki = index.add("作画@wiki", {"title": "ウマ娘 シンデレラグレイ（TV）"})
+
+        assert bangumi == anilist == wiki
+        assert index.sources(bangumi) == {"Bangumi", "AniList", "作画@wiki"}
+        assert len(index) == 1
+
+    def test_ローマ字タイトルの表記ゆれも類似度で統合される(self) -> None:
+        index = WorkIndex()
+        first = index.add("AniList", {"title_romaji": "Kusuriya no Hitorigoto", "date": "2023-10"})
+
+        assert index.match({"title_romaji": "Kusuriya no Hitorigoto.", "date": "2023-10"}) == first
+        assert index.match({"title_romaji": "Kusuriya no Hitorigotо", "date": "2023-11"}) == first
+
+    def test_続編や別シーズンは統合されない(self) -> None:
+        index = WorkIndex()
+        index.add("Bangumi", {"title": "進撃の巨人 Season 2", "info": "2017-04"})
+
+        assert index.match({"title": "進撃の巨人 Season 3", "date": "2018-07"}) is None
+        assert index.match({"title": "テスト作品B"}) is None
+
+    def test_放送時期が大きく離れた同名作品は統合されない(self) -> None:
+        index = WorkIndex()
+        index.add("Bangumi", {"title": "鋼の錬金術師", "info": "2003-10"})
+
+        assert index.match({"title": "鋼の錬金術師", "date": "2009-04"}) is None
+        assert index.match({"title": "鋼の錬金術師"}) is not None
+
+    def test_多数の作品を投入しても正しい作品にリンクされる(self) -> None:
+        index = WorkIndex()
+        for i in range(2000):
+            index.add("Bangumi", {"title": f"テストシリーズ 第{i}期", "info": "2020-01"})
+        target = index.add("Bangumi", {"title": "まったく別のタイトル", "info": "2020-01"})
+
+        assert index.match({"title": "まったく別のタイトル！", "date": "2020-02"}) == target
+        assert index.match({"title": "テストシリーズ 第1500期", "date": "2020-01"}) == 1500
+
+    def test_他ソースの同じ作品でも役職が違えば報告済みとしない(self) -> None:
+        index = WorkIndex()
+        work_id = index.add("AniList", {"title": "作品X", "role": "原画 (ep 1)", "date": "2026-01"})
+
+        assert index.has_role(work_id, "原画", exclude_source="Bangumi")
+        assert not index.has_role(work_id, "作画監督", exclude_source="Bangumi")
+        assert not index.has_role(work_id, "原画", exclude_source="AniList")
+        assert index.has_role(work_id, "", exclude_source="Bangumi")
@@ -1,6 +1,20 @@
+import json
+import socketserver
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
 import pytest
 
-from animator_credit_monitor.notifier import ConsoleNotifier, Notifier
+from animator_credit_monitor.notifier import (
+    ConsoleNotifier,
+    Notifier,
+    OutboxNotifier,
+    SmtpNotifier,
+    WebhookNotifier,
+)
 
 
 class TestNotifier:
@@ -23,3 +37,202 @@ class TestNotifier:
         captured = capsys.readouterr()
         assert "新着クレジット" in captured.out
         assert "作品Aに原画として参加" in captured.out
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    received: list[dict] = []
+    fail_first = 0
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if _RecordingHandler.fail_first > 0:
+            _RecordingHandler.fail_first -= 1
+            self.send_response(503)
+        else:
+            _RecordingHandler.received.append(body)
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    messages: list[str] = []
+
+    def handle(self) -> None:
+        self.wfile.write(b"220 localhost ESMTP\r\n")
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = []
+                while (data_line := self.rfile.readline()) != b".\r\n":
+                    data.append(data_line.decode())
+                _SmtpHandler.messages.append("".join(data))
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+@pytest.fixture
+def webhook_url() -> Iterator[str]:
+    _RecordingHandler.received = []
+    _RecordingHandler.fail_first = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RecordingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hook"
+    server.shutdown()
+
+
+@pytest.fixture
+def smtp_port() -> Iterator[int]:
+    _SmtpHandler.messages = []
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+class _SlowNotifier(Notifier):
+    def __init__(self) -> None:
+        self.delivered: list[str] = []
+
+    def notify(self, title: str, message: str) -> None:
+        time.sleep(0.5)
+        self.delivered.append(title)
+
+
+class _BrokenNotifier(Notifier):
+    def notify(self, title: str, message: str) -> None:
+        raise ConnectionError("sink is down")
+
+
+class TestOutboxNotifier:
+    def test_Webhookとメールの複数シンクに配送される(self, tmp_path: Path, webhook_url: str, smtp_port: int) -> None:
+        sinks: list[Notifier] = [
+            WebhookNotifier(webhook_url),
+            SmtpNotifier("127.0.0.1", smtp_port, "monitor@example.com", ["team@example.com"]),
+        ]
+        outbox = OutboxNotifier(tmp_path / "outbox", sinks)
+
+        outbox.notify("新着クレジット", "作品Aに原画として参加")
+        outbox.notify("新着クレジット", "作品Bに作画監督として参加")
+        outbox.close(timeout=5)
+
+        messages = [r["message"] for r in _RecordingHandler.received]
+        assert messages == ["作品Aに原画として参加", "作品Bに作画監督として参加"]
+        assert len(_SmtpHandler.messages) == 2
+        assert outbox.pending() == 0
+
+    def test_遅いシンクがあってもnotifyはすぐに戻る(self, tmp_path: Path) -> None:
+        slow = _SlowNotifier()
+        outbox = OutboxNotifier(tmp_path / "outbox", [slow])
+
+        started = time.monotonic()
+        for i in range(3):
+            outbox.notify(f"通知{i}", "本文")
+        elapsed = time.monotonic() - started
+        outbox.close(timeout=5)
+
+        assert elapsed < 0.2
+        assert slow.delivered == ["通知0", "通知1", "通知2"]
+
+    def test_配送失敗時はバックオフして再試行する(self, tmp_path: Path, webhook_url: str) -> None:
+        _RecordingHandler.fail_first = 2
+        outbox = OutboxNotifier(tmp_path / "outbox", [WebhookNotifier(webhook_url)], backoff_base=0.05)
+
+        outbox.notify("新着クレジット", "再試行テスト")
+        deadline = time.monotonic() + 5
+        while not _RecordingHandler.received and time.monotonic() < deadline:
+            time.sleep(0.05)
+        outbox.close(timeout=5)
+
+        assert [r["message"] for r in _RecordingHandler.received] == ["再試行テスト"]
+
+    def test_未配送の通知は次回実行時に配送される(self, tmp_path: Path) -> None:
+        outbox = OutboxNotifier(tmp_path / "outbox", [_BrokenNotifier()], backoff_base=60)
+        outbox.notify("新着クレジット", "持ち越し")
+        outbox.close(timeout=1)
+        assert outbox.pending() == 1
+
+        class _RecoveredNotifier(_SlowNotifier):
+            name = "_BrokenNotifier"  # type: ignore[assignment]
+
+        recovered = _RecoveredNotifier()
+        next_run = OutboxNotifier(tmp_path / "outbox", [recovered])
+        # 前回のバックオフ待ちを解除して即時配送させる
+        for path in (tmp_path / "outbox" / "_BrokenNotifier").glob("*.json"):
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            entry["next_attempt_at"] = 0
+            path.write_text(json.dumps(entry), encoding="utf-8")
+        next_run.notify("新着クレジット", "今回分")
+        next_run.close(timeout=5)
+
+        assert sorted(recovered.delivered) == ["新着クレジット", "新着クレジット"]
+        assert next_run.pending() == 0
+
+    def test_上限回数失敗した通知はfailedに移動する(self, tmp_path: Path) -> None:
+        outbox = OutboxNotifier(tmp_path / "outbox", [_BrokenNotifier()], max_attempts=2, backoff_base=0.01)
+
+        outbox.notify("新着クレジット", "失敗")
+        deadline = time.monotonic() + 5
+        while outbox.pending() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        outbox.close(timeout=1)
+
+        assert outbox.pending() == 0
+        assert len(list((tmp_path / "outbox" / "failed" / "_BrokenNotifier").glob("*.json"))) == 1
+
+    def test_配送中に消えた通知や壊れた通知があっても配送を続ける(self, tmp_path: Path) -> None:
+        queue_dir = tmp_path / "outbox" / "_VanishingNotifier"
+
+        class _VanishingNotifier(Notifier):
+            def __init__(self) -> None:
+                self.delivered: list[str] = []
+
+            def notify(self, title: str, message: str) -> None:
+                if title == "消える":
+                    # 別の実行が先に配送して削除した状況を再現する
+                    for path in queue_dir.glob("*.json"):
+                        if "消える" in path.read_text(encoding="utf-8"):
+                            path.unlink()
+                    raise ConnectionError("sink is down")
+                self.delivered.append(title)
+
+        sink = _VanishingNotifier()
+        queue_dir.mkdir(parents=True)
+        (queue_dir / "0-broken.json").write_text(json.dumps({"title": "壊れた"}), encoding="utf-8")
+        outbox = OutboxNotifier(tmp_path / "outbox", [sink], backoff_base=0.01)
+
+        outbox.notify("消える", "本文")
+        outbox.notify("届く", "本文")
+        outbox.close(timeout=5)
+
+        assert sink.delivered == ["届く"]
+
+    def test_同じoutboxを共有する2つの実行でも通知は1回だけ配送される(self, tmp_path: Path) -> None:
+        delivered: list[str] = []
+
+        class _SharedNotifier(Notifier):
+            name = "shared"  # type: ignore[assignment]
+
+            def notify(self, title: str, message: str) -> None:
+                time.sleep(0.05)
+                delivered.append(title)
+
+        first = OutboxNotifier(tmp_path / "outbox", [_SharedNotifier()])
+        second = OutboxNotifier(tmp_path / "outbox", [_SharedNotifier()])
+        for i in range(5):
+            first.notify(f"通知{i}", "本文")
+        second.notify("通知5", "本文")
+        first.close(timeout=5)
+        second.close(timeout=5)
+
+        assert sorted(delivered) == [f"通知{i}" for i in range(6)]
+        assert first.pending() == 0
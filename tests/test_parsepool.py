@@ -0,0 +1,87 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import responses
+from bs4 import BeautifulSoup
+
+from animator_credit_monitor.archive import KIND_ANILIST_STAFF
+from animator_credit_monitor.parsepool import KIND_SAKUGAWIKI_PAGE, ParsePool, parse_body
+from animator_credit_monitor.scraper import BangumiScraper, SakugaWikiScraper
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[ParsePool]:
+    pool = ParsePool(2)
+    yield pool
+    pool.close()
+
+
+class TestParseBody:
+    def test_バイト列のままでもスレッド内のパース結果と同じになる(self) -> None:
+        body = (FIXTURES_DIR / "sakugawiki_page.html").read_bytes()
+        args = ("テストアニメーター", "テスト作品A（TV）", "https://w.atwiki.jp/sakuga/pages/101.html")
+
+        expected = SakugaWikiScraper()._parse_credit_lines(BeautifulSoup(body.decode("utf-8"), "html.parser"), *args)
+
+        assert parse_body(KIND_SAKUGAWIKI_PAGE, body, *args) == expected
+
+    def test_AniListのJSONレスポンスもパースできる(self) -> None:
+        body = json.dumps({
+            "data": {
+                "Staff": {
+                    "staffMedia": {
+                        "edges": [{
+                            "staffRole": "Key Animation",
+                            "node": {
+                                "id": 1,
+                                "title": {"romaji": "Test", "native": "テスト"},
+                                "startDate": {"year": 2026, "month": 1},
+                            },
+                        }]
+                    }
+                }
+            }
+        })
+
+        items = parse_body(KIND_ANILIST_STAFF, body)
+
+        assert items == [{"id": "1", "title": "テスト", "title_romaji": "Test", "role": "原画", "date": "2026-01"}]
+
+    def test_未知の種類はエラー(self) -> None:
+        with pytest.raises(ValueError):
+            parse_body("unknown", b"")
+
+
+class TestParsePool:
+    @responses.activate
+    def test_ワーカープロセスでパースしながら全ページを取得できる(self, pool: ParsePool) -> None:
+        page1_html = (FIXTURES_DIR / "bangumi_works.html").read_text().replace(
+            '<span class="p_edge">( 1 / 1 )</span>',
+            '<a class="p" href="?sort=date&amp;page=2">2</a><span class="p_edge">( 1 / 2 )</span>',
+        )
+        responses.add(responses.GET, "https://bangumi.tv/person/12345/works", body=page1_html)
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/person/12345/works?sort=date&page=2",
+            body=(FIXTURES_DIR / "bangumi_works_page2.html").read_text(),
+        )
+
+        works = BangumiScraper(request_interval=0, parse_pool=pool).fetch_works("12345")
+
+        assert len(works) == 4
+        assert works[0]["id"] == "100001"
+        assert works[3]["title"] == "テスト作品D"
+
+    @responses.activate
+    def test_作画wikiページのクレジット抽出をワーカープロセスで行う(self, pool: ParsePool) -> None:
+        url = "https://w.atwiki.jp/sakuga/pages/101.html"
+        responses.add(responses.GET, url, body=(FIXTURES_DIR / "sakugawiki_page.html").read_text())
+        results = [{"title": "テスト作品A（TV）", "url": url}]
+
+        credits = SakugaWikiScraper(request_interval=0, parse_pool=pool).fetch_credits("テストアニメーター", results)
+
+        assert [c["role"] for c in credits] == ["原画", "総作画監督", "原画"]
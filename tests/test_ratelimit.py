@@ -0,0 +1,48 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from animator_credit_monitor.ratelimit import HostRateLimiter, SharedHostRateLimiter
+
+
+class TestHostRateLimiter:
+    @patch("animator_credit_monitor.ratelimit.time.sleep")
+    @patch("animator_credit_monitor.ratelimit.time.monotonic", return_value=100.0)
+    def test_同じホストへの連続リクエストは間隔を空けて待機する(
+        self, mock_monotonic: MagicMock, mock_sleep: MagicMock
+    ) -> None:
+        limiter = HostRateLimiter(2.0)
+
+        limiter.wait("https://w.atwiki.jp/sakuga/pages/1.html")
+        limiter.wait("https://w.atwiki.jp/sakuga/pages/2.html")
+        limiter.wait("https://w.atwiki.jp/sakuga/pages/3.html")
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0]
+
+    @patch("animator_credit_monitor.ratelimit.time.sleep")
+    @patch("animator_credit_monitor.ratelimit.time.monotonic", return_value=100.0)
+    def test_異なるホストへのリクエストは待機しない(
+        self, mock_monotonic: MagicMock, mock_sleep: MagicMock
+    ) -> None:
+        limiter = HostRateLimiter(2.0)
+
+        limiter.wait("https://w.atwiki.jp/sakuga/pages/1.html")
+        limiter.wait("https://bangumi.tv/person/1/works")
+
+        mock_sleep.assert_not_called()
+
+
+class TestSharedHostRateLimiter:
+    @patch("animator_credit_monitor.ratelimit.time.sleep")
+    @patch("animator_credit_monitor.ratelimit.time.time", return_value=100.0)
+    def test_別インスタンス間でも同じホストの間隔が共有される(
+        self, mock_time: MagicMock, mock_sleep: MagicMock, tmp_path: Path
+    ) -> None:
+        worker_a = SharedHostRateLimiter(tmp_path, 2.0)
+        worker_b = SharedHostRateLimiter(tmp_path, 2.0)
+
+        worker_a.wait("https://bangumi.tv/person/1/works")
+        worker_b.wait("https://bangumi.tv/person/2/works")
+        worker_b.wait("https://w.atwiki.jp/sakuga/pages/1.html")
+        worker_a.wait("https://bangumi.tv/person/3/works")
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0]
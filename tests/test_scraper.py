@@ -1,7 +1,14 @@
+import asyncio
+import json
+import re
+from datetime import date
 from pathlib import Path
+from unittest.mock import patch
 
 import responses
+from bs4 import BeautifulSoup
 
+from animator_credit_monitor.identity import IdentityCache
 from animator_credit_monitor.scraper import AniListScraper, BangumiScraper, SakugaWikiScraper
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -59,6 +66,36 @@ class TestBangumiScraper:
         assert works[3]["id"] == "200001"
         assert works[3]["title"] == "テスト作品D"
 
+    @responses.activate
+    def test_複数人の作品リストを1つのイベントループで並行取得できる(self) -> None:
+        html = (FIXTURES_DIR / "bangumi_works.html").read_text()
+        responses.add(responses.GET, re.compile(r"https://bangumi\.tv/person/\d+/works"), body=html)
+        scraper = BangumiScraper(request_interval=0)
+
+        async def run() -> list[list[dict]]:
+            return await asyncio.gather(*(scraper.fetch_works_async(str(i)) for i in range(50)))
+
+        results = asyncio.run(run())
+
+        assert len(results) == 50
+        assert all(len(works) == 3 for works in results)
+
+    @responses.activate
+    def test_Cloudflareのチャレンジページはパースせず空リストを返す(self) -> None:
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/person/12345/works",
+            body="<html><head><title>Just a moment...</title></head><body></body></html>",
+            status=403,
+            content_type="text/html",
+        )
+
+        with patch.object(BangumiScraper, "_parse_works") as mock_parse:
+            works = BangumiScraper(request_interval=0).fetch_works("12345")
+
+        assert works == []
+        mock_parse.assert_not_called()
+
     @responses.activate
     def test_Bangumi日本語タイトルがない場合は中国語タイトルにフォールバックする(self) -> None:
         html = (FIXTURES_DIR / "bangumi_works.html").read_text()
@@ -102,6 +139,99 @@ class TestBangumiScraper:
 
         assert works == []
 
+    @responses.activate
+    def test_Bangumi作品リスト部分が同じなら前回のパース結果を再利用する(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "bangumi_works.html").read_text()
+        cache_path = tmp_path / "bangumi_page_cache.json"
+        responses.add(responses.GET, "https://bangumi.tv/person/12345/works", body=html, status=200)
+        # 作品リスト外（<title>）だけが変わったページ
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/person/12345/works",
+            body=html.replace("Test Person Works", "Test Person Works (updated)"),
+            status=200,
+        )
+
+        first = BangumiScraper(request_interval=0, page_cache_path=cache_path).fetch_works("12345")
+        with patch("animator_credit_monitor.scraper.BeautifulSoup") as mock_soup:
+            second = BangumiScraper(request_interval=0, page_cache_path=cache_path).fetch_works("12345")
+
+        mock_soup.assert_not_called()
+        assert second == first
+
+    @responses.activate
+    def test_Bangumi作品リスト部分が変わった場合は再パースする(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "bangumi_works.html").read_text()
+        cache_path = tmp_path / "bangumi_page_cache.json"
+        responses.add(responses.GET, "https://bangumi.tv/person/12345/works", body=html, status=200)
+        responses.add(
+            responses.GET,
+            "https://bangumi.tv/person/12345/works",
+            body=html.replace("<span class=\"badge_job\">動画</span>", "<span class=\"badge_job\">原画</span>"),
+            status=200,
+        )
+
+        scraper = BangumiScraper(request_interval=0, page_cache_path=cache_path)
+        scraper.fetch_works("12345")
+        works = scraper.fetch_works("12345")
+
+        assert works[2]["role"] == "原画"
+
+    def test_Bangumi作品リストがないページはフィンガープリントを持たない(self) -> None:
+        assert BangumiScraper._fingerprint(b"<html><body>Just a moment...</body></html>") is None
+
+    @responses.activate
+    def test_Bangumi人物検索で名前から人物IDを解決しキャッシュする(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "bangumi_person_search.html").read_text()
+        responses.add(responses.GET, "https://bangumi.tv/mono_search/%E3%83%86%E3%82%B9%E3%83%88", body=html)
+        identity = IdentityCache(tmp_path / "identity_cache.json")
+        scraper = BangumiScraper(request_interval=0, identity=identity)
+
+        assert scraper.resolve_person_id("テスト") == "50763"
+        assert scraper.resolve_person_id("テスト") == "50763"
+
+        assert len(responses.calls) == 1
+        assert identity.get("bangumi", "テスト") == "50763"
+
+    def test_Bangumiスタッフページから役職と話数をパースできる(self) -> None:
+        html = (FIXTURES_DIR / "bangumi_subject_persons.html").read_text()
+
+        staff = BangumiScraper(request_interval=0)._parse_subject_staff(BeautifulSoup(html, "html.parser"))
+
+        assert staff == [
+            {"person_id": "12345", "name": "テストアニメーター", "role": "原画", "episodes": "3, 7"},
+            {"person_id": "12345", "name": "テストアニメーター", "role": "作画監督", "episodes": "12"},
+            {"person_id": "67890", "name": "別の人", "role": "監督", "episodes": ""},
+        ]
+
+    @responses.activate
+    def test_Bangumi話数クレジットは新規か最近の作品だけ取得し放送済みはキャッシュする(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "bangumi_subject_persons.html").read_text()
+        responses.add(responses.GET, "https://bangumi.tv/subject/100001/persons", body=html)
+        responses.add(responses.GET, "https://bangumi.tv/subject/100002/persons", body=html)
+        works = [
+            {"id": "100001", "title": "新作", "info": "2020-01 / スタジオ"},
+            {"id": "100002", "title": "放送中", "info": f"{date.today():%Y-%m} / スタジオ"},
+            {"id": "100003", "title": "旧作", "info": "2015-04 / スタジオ"},
+        ]
+        cache_path = tmp_path / "bangumi_subject_cache.json"
+
+        scraper = BangumiScraper(request_interval=0, subject_cache_path=cache_path)
+        credits = scraper.fetch_episode_credits("12345", works, new_ids={"100001"})
+
+        assert [c["id"] for c in credits] == ["100001", "100001", "100002", "100002"]
+        assert credits[0]["episodes"] == "3, 7"
+        assert len(responses.calls) == 2
+
+        # 2回目: 放送済み（100001）はキャッシュのみ、放送中（100002）だけ再取得
+        scraper = BangumiScraper(request_interval=0, subject_cache_path=cache_path)
+        credits_again = scraper.fetch_episode_credits("12345", works, new_ids=set())
+
+        assert credits_again == credits
+        assert [call.request.url for call in responses.calls[2:]] == [
+            "https://bangumi.tv/subject/100002/persons",
+        ]
+
 
 class TestSakugaWikiScraper:
     @responses.activate
@@ -147,6 +277,71 @@ class TestSakugaWikiScraper:
 
         assert results == []
 
+    @responses.activate
+    def test_作画wikiページから対象者の名前を含む行をクレジットとして抽出する(self) -> None:
+        html = (FIXTURES_DIR / "sakugawiki_page.html").read_text()
+        responses.add(responses.GET, "https://w.atwiki.jp/sakuga/pages/101.html", body=html)
+        results = [{"title": "テスト作品A（TV）", "url": "https://w.atwiki.jp/sakuga/pages/101.html"}]
+
+        credits = SakugaWikiScraper(request_interval=0).fetch_credits("テストアニメーター", results)
+
+        assert len(credits) == 3
+        assert credits[0]["episode"] == "1"
+        assert credits[0]["role"] == "原画"
+        assert credits[0]["title"] == "テスト作品A（TV）"
+        assert credits[1]["episode"] == "2"
+        assert credits[1]["role"] == "総作画監督"
+        assert credits[2]["episode"] == ""
+        assert credits[2]["role"] == "原画"
+
+    @responses.activate
+    def test_作画wikiページの内容が同じなら再パースしない(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "sakugawiki_page.html").read_text()
+        responses.add(responses.GET, "https://w.atwiki.jp/sakuga/pages/101.html", body=html)
+        results = [{"title": "テスト作品A（TV）", "url": "https://w.atwiki.jp/sakuga/pages/101.html"}]
+        cache_path = tmp_path / "sakugawiki_page_cache.json"
+
+        first_scraper = SakugaWikiScraper(request_interval=0, page_cache_path=cache_path)
+        first = first_scraper.fetch_credits("テストアニメーター", results)
+        scraper = SakugaWikiScraper(request_interval=0, page_cache_path=cache_path)
+        with patch.object(scraper, "_parse_credit_lines") as mock_parse:
+            second = scraper.fetch_credits("テストアニメーター", results)
+
+        mock_parse.assert_not_called()
+        assert second == first
+
+    @responses.activate
+    def test_作画wikiキャッシュを共有する別プロセスの名前のクレジットを上書きしない(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "sakugawiki_page.html").read_text()
+        url = "https://w.atwiki.jp/sakuga/pages/101.html"
+        responses.add(responses.GET, url, body=html)
+        results = [{"title": "テスト作品A（TV）", "url": url}]
+        cache_path = tmp_path / "sakugawiki_page_cache.json"
+
+        # Both load the cache before either saves, as two sharded workers would
+        first = SakugaWikiScraper(request_interval=0, page_cache_path=cache_path)
+        second = SakugaWikiScraper(request_interval=0, page_cache_path=cache_path)
+        first.fetch_credits("テストアニメーター", results)
+        second.fetch_credits("別の人", results)
+
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+        assert set(cache[url]["credits"]) == {"テストアニメーター", "別の人"}
+
+    @responses.activate
+    def test_作画wikiページ取得失敗時はキャッシュ済みクレジットを返す(self, tmp_path: Path) -> None:
+        html = (FIXTURES_DIR / "sakugawiki_page.html").read_text()
+        url = "https://w.atwiki.jp/sakuga/pages/101.html"
+        responses.add(responses.GET, url, body=html, headers={"ETag": '"v1"'})
+        responses.add(responses.GET, url, status=503)
+        results = [{"title": "テスト作品A（TV）", "url": url}]
+        scraper = SakugaWikiScraper(request_interval=0, page_cache_path=tmp_path / "cache.json")
+
+        first = scraper.fetch_credits("テストアニメーター", results)
+        second = scraper.fetch_credits("テストアニメーター", results)
+
+        assert second == first
+        assert responses.calls[1].request.headers["If-None-Match"] == '"v1"'
+
 
 class TestAniListScraper:
     @responses.activate
@@ -230,6 +425,133 @@ class TestAniListScraper:
 
         assert results == []
 
+    @responses.activate
+    def test_AniListで解決済みのスタッフIDがあればIDで問い合わせる(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json")
+        identity.set("anilist", "テスト", "12345")
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 12345, "staffMedia": {"edges": []}}}},
+        )
+
+        AniListScraper(identity=identity).fetch_works("テスト")
+
+        body = json.loads(responses.calls[0].request.body)
+        assert "Staff(id: $id)" in body["query"]
+        assert body["variables"] == {"id": 12345}
+
+    @responses.activate
+    def test_AniList初回は名前検索してスタッフIDをキャッシュする(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json")
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 777, "staffMedia": {"edges": []}}}},
+        )
+
+        AniListScraper(identity=identity).fetch_works("テスト")
+
+        body = json.loads(responses.calls[0].request.body)
+        assert body["variables"] == {"search": "テスト"}
+        assert identity.get("anilist", "テスト") == "777"
+
+    @responses.activate
+    def test_AniList再検証で別人がヒットしても固定済みのスタッフIDを使い続ける(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json", ttl_days=0)
+        identity.set("anilist", "テスト", "12345")
+        edge = {
+            "staffRole": "Key Animation",
+            "node": {"id": 1, "title": {"romaji": "A", "native": "本人の作品"}, "startDate": {}},
+        }
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 99999, "staffMedia": {"edges": []}}}},
+        )
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 12345, "staffMedia": {"edges": [edge]}}}},
+        )
+
+        results = AniListScraper(identity=identity).fetch_works("テスト")
+
+        assert results[0]["title"] == "本人の作品"
+        assert identity.get("anilist", "テスト") == "12345"
+
+    @responses.activate
+    def test_AniList再検証で名前検索が空でも固定済みのスタッフIDで問い合わせる(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json", ttl_days=0)
+        identity.set("anilist", "テスト", "12345")
+        edge = {
+            "staffRole": "Key Animation",
+            "node": {"id": 1, "title": {"romaji": "A", "native": "本人の作品"}, "startDate": {}},
+        }
+        responses.add(responses.POST, "https://graphql.anilist.co", json={"data": {"Staff": None}})
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 12345, "staffMedia": {"edges": [edge]}}}},
+        )
+
+        results = AniListScraper(identity=identity).fetch_works("テスト")
+
+        assert json.loads(responses.calls[1].request.body)["variables"] == {"id": 12345}
+        assert results[0]["title"] == "本人の作品"
+        assert identity.get("anilist", "テスト") == "12345"
+
+    @responses.activate
+    def test_AniListで固定済みのスタッフIDが404なら破棄して次回に再解決する(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json")
+        identity.set("anilist", "テスト", "12345")
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            status=404,
+            json={"errors": [{"message": "Not Found.", "status": 404}], "data": {"Staff": None}},
+        )
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 777, "staffMedia": {"edges": []}}}},
+        )
+
+        assert AniListScraper(identity=identity).fetch_works("テスト") == []
+        assert len(responses.calls) == 1
+        assert identity.get("anilist", "テスト") is None
+
+        AniListScraper(identity=identity).fetch_works("テスト")
+
+        assert json.loads(responses.calls[1].request.body)["variables"] == {"search": "テスト"}
+        assert identity.get("anilist", "テスト") == "777"
+
+    @responses.activate
+    def test_AniListのNotFoundエラーはスタッフなしとして扱う(self) -> None:
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"errors": [{"message": "Not Found."}], "data": None},
+        )
+
+        assert AniListScraper().fetch_works("存在しない人") == []
+
+    @responses.activate
+    def test_AniList再検証で固定済みのスタッフが消えていても別人に切り替えない(self, tmp_path: Path) -> None:
+        identity = IdentityCache(tmp_path / "identity_cache.json", ttl_days=0)
+        identity.set("anilist", "テスト", "12345")
+        responses.add(
+            responses.POST,
+            "https://graphql.anilist.co",
+            json={"data": {"Staff": {"id": 99999, "staffMedia": {"edges": []}}}},
+        )
+        responses.add(responses.POST, "https://graphql.anilist.co", status=404, json={"data": {"Staff": None}})
+
+        results = AniListScraper(identity=identity).fetch_works("テスト")
+
+        assert results == []
+        assert identity.get("anilist", "テスト") is None
+
     @responses.activate
     def test_AniListで接続エラー時に空リストを返す(self) -> None:
         responses.add(
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from animator_credit_monitor.history import HistoryManager
+from animator_credit_monitor.search_index import CreditSearchIndex, tokenize
+
+
+class TestTokenize:
+    def test_CJKは2文字ずつと末尾1文字英数字は単語で分割される(self) -> None:
+        assert tokenize("進撃の巨人 Season 2") == {"進撃", "撃の", "の巨", "巨人", "人", "season", "2"}
+
+    def test_全角英数字は正規化される(self) -> None:
+        assert tokenize("ＯＰ") == {"op"}
+
+
+class TestCreditSearchIndex:
+    def test_タイトルと役職で検索できる(self, tmp_path: Path) -> None:
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        index.update("bangumi_1", [
+            {"title": "進撃の巨人", "title_cn": "进击的巨人", "role": "原画", "info": "2013-04-07"},
+            {"title": "鬼滅の刃", "title_cn": "鬼灭之刃", "role": "作画監督", "info": "2019-04-06"},
+        ])
+
+        assert [r["title"] for r in index.search("巨人")] == ["進撃の巨人"]
+        assert [r["title"] for r in index.search("进击")] == ["進撃の巨人"]
+        assert [r["title"] for r in index.search("作画監督 2019")] == ["鬼滅の刃"]
+        assert index.search("巨人 作画監督") == []
+
+    def test_結果は日付の新しい順でソースを含む(self, tmp_path: Path) -> None:
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        index.update("bangumi_1", [{"title": "作品A", "role": "原画", "info": "2010-01-01"}])
+        index.update("anilist_Name", [{"title": "作品B", "role": "原画", "date": "2020-01"}])
+
+        results = index.search("原画")
+
+        assert [(r["source"], r["title"]) for r in results] == [("anilist_Name", "作品B"), ("bangumi_1", "作品A")]
+        assert [r["title"] for r in index.search("原画", source_prefix="bangumi_")] == ["作品A"]
+
+    def test_更新は差分だけを反映し永続化される(self, tmp_path: Path) -> None:
+        path = tmp_path / "index.sqlite3"
+        index = CreditSearchIndex(path)
+        index.update("bangumi_1", [{"title": "作品A"}, {"title": "作品B"}])
+        index.update("bangumi_1", [{"title": "作品B"}, {"title": "作品C"}])
+        index.close()
+
+        reopened = CreditSearchIndex(path)
+        assert reopened.count() == 2
+        assert reopened.search("作品A") == []
+        assert [r["title"] for r in reopened.search("作品C")] == ["作品C"]
+
+    def test_1文字のCJKクエリは前方一致で検索できる(self, tmp_path: Path) -> None:
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        index.update("bangumi_1", [
+            {"title": "進撃の巨人", "role": "原画"},
+            {"title": "鬼滅の刃", "role": "作画監督"},
+        ])
+
+        assert [r["title"] for r in index.search("巨")] == ["進撃の巨人"]
+        assert [r["title"] for r in index.search("刃")] == ["鬼滅の刃"]
+        assert {r["title"] for r in index.search("画")} == {"進撃の巨人", "鬼滅の刃"}
+        assert [r["title"] for r in index.search("監 巨")] == []
+
+    def test_clearとremoveで索引から消える(self, tmp_path: Path) -> None:
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        index.update("bangumi_1", [{"title": "作品A"}])
+        index.update("bangumi_2", [{"title": "作品B"}])
+
+        index.clear()
+        assert index.count() == 0
+        assert index.sources() == []
+
+        index.update("bangumi_1", [{"title": "作品A"}])
+        index.remove("bangumi_1")
+        assert index.search("作品") == []
+
+    def test_変更のない履歴も未索引なら索引される(self, tmp_path: Path) -> None:
+        HistoryManager(data_dir=tmp_path).save("bangumi_1", [{"title": "作品A", "role": "原画"}])
+
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        history = HistoryManager(data_dir=tmp_path, search_index=index)
+        history.save("bangumi_1", [{"title": "作品A", "role": "原画"}])
+
+        assert [r["source"] for r in index.search("原画")] == ["bangumi_1"]
+        assert index.sources() == ["bangumi_1"]
+
+    def test_履歴の保存時にインデックスが更新される(self, tmp_path: Path) -> None:
+        index = CreditSearchIndex(tmp_path / "index.sqlite3")
+        history = HistoryManager(data_dir=tmp_path, search_index=index)
+
+        history.save("bangumi_1", [{"title": "作品A", "role": "原画"}])
+
+        assert [r["source"] for r in index.search("原画")] == ["bangumi_1"]
+        assert history.sources() == ["bangumi_1"]
@@ -0,0 +1,37 @@
+import pytest
+
+from animator_credit_monitor.sharding import HashRing, parse_shard, target_key
+from animator_credit_monitor.watchlist import Target
+
+
+class TestHashRing:
+    def test_キーは全シャードにおおむね均等に分散する(self) -> None:
+        ring = HashRing(4)
+        counts = [0] * 4
+        for i in range(4000):
+            counts[ring.owner(f"name:animator{i}") - 1] += 1
+
+        assert all(600 < count < 1400 for count in counts)
+
+    def test_シャード数を増やしても移動するキーは一部だけ(self) -> None:
+        before, after = HashRing(4), HashRing(5)
+        keys = [f"name:animator{i}" for i in range(2000)]
+
+        moved = sum(before.owner(key) != after.owner(key) for key in keys)
+
+        assert moved < len(keys) * 0.35
+        assert all(after.owner(key) == 5 for key in keys if before.owner(key) != after.owner(key))
+
+
+class TestParseShard:
+    def test_I_Nの形式を解釈する(self) -> None:
+        assert parse_shard("2/4") == (2, 4)
+
+    @pytest.mark.parametrize("spec", ["0/4", "5/4", "2", "a/b"])
+    def test_不正な指定はエラー(self, spec: str) -> None:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_名前があればBangumi_IDが後から解決されてもキーは変わらない() -> None:
+    assert target_key(Target(name="テスト")) == target_key(Target(name="テスト", bangumi_id="123"))
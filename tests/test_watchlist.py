@@ -0,0 +1,29 @@
+import json
+from pathlib import Path
+
+from animator_credit_monitor.watchlist import Target, load_watchlist
+
+
+class TestWatchlist:
+    def test_ウォッチリストJSONから監視対象を読み込める(self, tmp_path: Path) -> None:
+        path = tmp_path / "watchlist.json"
+        path.write_text(json.dumps([
+            {"name": "アニメーターA", "bangumi_id": "12345"},
+            {"name": "アニメーターB"},
+            {"bangumi_id": 67890},
+        ]), encoding="utf-8")
+
+        targets = load_watchlist(path)
+
+        assert targets == [
+            Target(name="アニメーターA", bangumi_id="12345"),
+            Target(name="アニメーターB"),
+            Target(bangumi_id="67890"),
+        ]
+        assert targets[2].label == "Bangumi 67890"
+
+    def test_名前もIDもないエントリはスキップされる(self, tmp_path: Path) -> None:
+        path = tmp_path / "watchlist.json"
+        path.write_text(json.dumps([{"note": "空"}, {"name": "アニメーターA"}]), encoding="utf-8")
+
+        assert load_watchlist(path) == [Target(name="アニメーターA")]